@@ -1,61 +1,95 @@
 """Article quality evaluator using LLMs."""
 
 import os
+import re
 import json
+import asyncio
+import hashlib
+from collections import OrderedDict
 from typing import Dict, Any, List, Optional
 from anthropic import AsyncAnthropic
+import fastjsonschema
+import httpx
+import orjson
 import logging
 
 logger = logging.getLogger(__name__)
 
-class ArticleEvaluator:
-    """Evaluates article quality using a stronger LLM."""
+class _LoopBoundTransport(httpx.AsyncBaseTransport):
+    """HTTP transport whose connection pool belongs to the running event loop.
     
-    def __init__(self, api_key: Optional[str] = None):
-        """Initialize the evaluator.
-        
-        Args:
-            api_key: Optional API key. If not provided, will try to get from environment.
-        """
-        self.api_key = api_key or os.getenv("ANTHROPIC_API_KEY")
-        if not self.api_key:
-            raise ValueError("API key must be provided either directly or via ANTHROPIC_API_KEY environment variable")
-            
-        self.client = AsyncAnthropic(api_key=self.api_key)
-        # Use a more powerful model for evaluation
-        self.model = os.getenv("ANTHROPIC_EVAL_MODEL", "claude-3-opus-20240229")
-        self.max_tokens = int(os.getenv("EVAL_MAX_TOKENS", "4096"))
-        self.temperature = float(os.getenv("EVAL_TEMPERATURE", "0.3"))  # Lower temperature for more consistent evaluation
+    Pooled connections can only be used from the loop that opened them, so
+    the pool is rebuilt when requests start coming from a different loop
+    (a second asyncio.run, a new pytest loop, a Streamlit rerun).
+    """
     
-    async def evaluate_article(
-        self,
-        content: str,
-        title: str,
-        keywords: List[str],
-        min_length: Optional[int] = None,
-        max_length: Optional[int] = None
-    ) -> Dict[str, Any]:
-        """Evaluate an article's quality.
-        
-        Args:
-            content: The article content
-            title: The article title
-            keywords: Expected keywords
-            min_length: Minimum expected length
-            max_length: Maximum expected length
-            
-        Returns:
-            Dictionary containing evaluation results
-        """
-        prompt = f"""You are an expert content evaluator specializing in SEO-optimized articles.
+    def __init__(self, **kwargs):
+        self._kwargs = kwargs
+        self._transport: Optional[httpx.AsyncHTTPTransport] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        loop = asyncio.get_running_loop()
+        if self._transport is None or self._loop is not loop:
+            # The old pool's connections died with their loop; drop it
+            self._transport = httpx.AsyncHTTPTransport(**self._kwargs)
+            self._loop = loop
+        return await self._transport.handle_async_request(request)
+    
+    async def aclose(self) -> None:
+        if self._transport is not None:
+            await self._transport.aclose()
+            self._transport = None
+
+# Shared across evaluator instances so keep-alive connections (and their TLS
+# sessions) are reused between evaluations instead of re-handshaking per call
+_http_client: Optional[httpx.AsyncClient] = None
+
+def _get_http_client() -> httpx.AsyncClient:
+    """Return the shared HTTP client, creating it on first use."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            transport=_LoopBoundTransport(
+                limits=httpx.Limits(
+                    max_connections=100,
+                    max_keepalive_connections=100,
+                    keepalive_expiry=60
+                ),
+                http2=True
+            ),
+            timeout=60
+        )
+    return _http_client
+
+# Caps Anthropic requests in flight across all generators and evaluators, so
+# a burst of work queues here instead of tripping the API's rate limits
+_api_semaphore: Optional[asyncio.Semaphore] = None
+_api_semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+
+def _get_api_semaphore() -> asyncio.Semaphore:
+    """Return the shared request semaphore for the running event loop."""
+    global _api_semaphore, _api_semaphore_loop
+    loop = asyncio.get_running_loop()
+    if _api_semaphore is None or _api_semaphore_loop is not loop:
+        _api_semaphore = asyncio.Semaphore(int(os.getenv("ANTHROPIC_MAX_CONCURRENCY", "8")))
+        _api_semaphore_loop = loop
+    return _api_semaphore
+
+# Retries of rate-limited (429) and overloaded (5xx) requests; the SDK backs
+# off exponentially with jitter and honours retry-after
+_MAX_RETRIES = int(os.getenv("ANTHROPIC_MAX_RETRIES", "5"))
+
+# Evaluation prompt; only the article-specific fields are filled in per call
+_PROMPT_TMPL = """You are an expert content evaluator specializing in SEO-optimized articles.
 Please evaluate this article thoroughly and provide a structured critique.
 
-Article Title: {title}
-Expected Keywords: {', '.join(keywords)}
-Length Requirements: {min_length or 'Not specified'} - {max_length or 'Not specified'} words
+Article Title: %(title)s
+Expected Keywords: %(keywords)s
+Length Requirements: %(min_length)s - %(max_length)s words
 
 Article Content:
-{content}
+%(content)s
 
 Evaluate the following aspects and provide a score from 1-10 for each:
 
@@ -91,7 +125,7 @@ Finally, provide:
 3. Top 3 recommendations for improvement
 
 IMPORTANT: Format your response as a valid JSON object with the following structure:
-{{
+{
     "structure_score": 8,
     "structure_strengths": ["..."],
     "structure_improvements": ["..."],
@@ -111,29 +145,203 @@ IMPORTANT: Format your response as a valid JSON object with the following struct
     "overall_score": 7.5,
     "main_issues": ["..."],
     "top_recommendations": ["..."]
-}}
+}
 
 Make sure your response is ONLY the JSON object, with no additional text before or after. Use double quotes for strings."""
 
+_ASPECTS = ("structure", "content", "seo", "regional")
+_STRING_LIST = {"type": "array", "items": {"type": "string"}}
+
+# Expected shape of the evaluation JSON requested by _PROMPT_TMPL. Scores are
+# required; the free-text lists are type-checked when present.
+EVALUATION_SCHEMA = {
+    "type": "object",
+    "required": [f"{aspect}_score" for aspect in _ASPECTS] + ["overall_score"],
+    "properties": {
+        **{f"{aspect}_score": {"type": "number"} for aspect in _ASPECTS},
+        **{
+            f"{aspect}_{field}": _STRING_LIST
+            for aspect in _ASPECTS
+            for field in ("strengths", "improvements", "recommendations")
+        },
+        "overall_score": {"type": "number"},
+        "main_issues": _STRING_LIST,
+        "top_recommendations": _STRING_LIST
+    }
+}
+
+# Compiled once at import; raises fastjsonschema.JsonSchemaException
+_validate_evaluation = fastjsonschema.compile(EVALUATION_SCHEMA)
+
+_HEADING_RE = re.compile(r"^(#{1,6}) +(.*?)\s*$", re.MULTILINE)
+
+def count_words(text: str) -> int:
+    """Count whitespace-separated words, as used for article length."""
+    return len(text.split())
+
+class ArticleEvaluator:
+    """Evaluates article quality using a stronger LLM."""
+    
+    def __init__(self, api_key: Optional[str] = None):
+        """Initialize the evaluator.
+        
+        Args:
+            api_key: Optional API key. If not provided, will try to get from environment.
+        """
+        self.api_key = api_key or os.getenv("ANTHROPIC_API_KEY")
+        if not self.api_key:
+            raise ValueError("API key must be provided either directly or via ANTHROPIC_API_KEY environment variable")
+            
+        self.client = AsyncAnthropic(
+            api_key=self.api_key,
+            http_client=_get_http_client(),
+            max_retries=_MAX_RETRIES
+        )
+        # Use a more powerful model for evaluation
+        self.model = os.getenv("ANTHROPIC_EVAL_MODEL", "claude-3-opus-20240229")
+        self.max_tokens = int(os.getenv("EVAL_MAX_TOKENS", "4096"))
+        self.temperature = float(os.getenv("EVAL_TEMPERATURE", "0.3"))  # Lower temperature for more consistent evaluation
+        # Set LLM_JUDGE_ENABLED=0 to rely on the structural checks alone and
+        # skip the second API call per article
+        self.llm_judge_enabled = os.getenv("LLM_JUDGE_ENABLED", "1") == "1"
+        
+        # Serialized evaluations keyed by a hash of the evaluation inputs, so
+        # re-evaluating an unchanged article skips the API call entirely
+        self.cache_size = int(os.getenv("EVAL_CACHE_SIZE", "256"))
+        self._cache: "OrderedDict[str, bytes]" = OrderedDict()
+    
+    @classmethod
+    async def aclose(cls) -> None:
+        """Close the HTTP connection pool shared by all evaluators."""
+        global _http_client
+        if _http_client is not None:
+            await _http_client.aclose()
+            _http_client = None
+    
+    def evaluate_structural(
+        self,
+        content: str,
+        title: str,
+        keywords: List[str],
+        min_length: Optional[int] = None,
+        max_length: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Check an article's structure without calling the LLM.
+        
+        Covers length, headings and keyword usage; it takes microseconds, so
+        callers can act on it while the LLM judge is still running.
+        
+        Args:
+            content: The article content
+            title: The article title
+            keywords: Expected keywords
+            min_length: Minimum expected length
+            max_length: Maximum expected length
+            
+        Returns:
+            Dictionary containing the structural checks
+        """
+        word_count = count_words(content)
+        headings = _HEADING_RE.findall(content)
+        sections = {text for level, text in headings if level == "##"}
+        lowered = content.lower()
+        keyword_counts = {keyword: lowered.count(keyword.lower()) for keyword in keywords}
+        
+        return {
+            "word_count": word_count,
+            "within_length": (
+                (min_length is None or word_count >= min_length)
+                and (max_length is None or word_count <= max_length)
+            ),
+            "has_title": bool(headings) and headings[0] == ("#", title),
+            "has_introduction": "Introduction" in sections,
+            "has_body": "Body Content" in sections,
+            "has_conclusion": "Conclusion" in sections,
+            "section_count": sum(level == "##" for level, _ in headings),
+            "keyword_counts": keyword_counts,
+            "keyword_hits": sum(keyword_counts.values()),
+            "missing_keywords": [keyword for keyword, count in keyword_counts.items() if not count]
+        }
+    
+    async def evaluate_article(
+        self,
+        content: str,
+        title: str,
+        keywords: List[str],
+        min_length: Optional[int] = None,
+        max_length: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Evaluate an article's quality with the LLM judge.
+        
+        Same as evaluate_semantic_llm.
+        """
+        return await self.evaluate_semantic_llm(
+            content=content,
+            title=title,
+            keywords=keywords,
+            min_length=min_length,
+            max_length=max_length
+        )
+    
+    async def evaluate_semantic_llm(
+        self,
+        content: str,
+        title: str,
+        keywords: List[str],
+        min_length: Optional[int] = None,
+        max_length: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Evaluate an article's quality with the LLM judge.
+        
+        Args:
+            content: The article content
+            title: The article title
+            keywords: Expected keywords
+            min_length: Minimum expected length
+            max_length: Maximum expected length
+            
+        Returns:
+            Dictionary containing evaluation results
+        """
+        keyword_list = ", ".join(keywords)
+        cache_key = self._cache_key(content, title, keyword_list, min_length, max_length)
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            self._cache.move_to_end(cache_key)
+            return orjson.loads(cached)
+        
+        prompt = _PROMPT_TMPL % {
+            "title": title,
+            "keywords": keyword_list,
+            "min_length": min_length or "Not specified",
+            "max_length": max_length or "Not specified",
+            "content": content
+        }
+
         try:
-            response = await self.client.messages.create(
-                model=self.model,
-                max_tokens=self.max_tokens,
-                temperature=self.temperature,
-                system="You are an expert content evaluator. Provide detailed, objective evaluations in valid JSON format with double quotes for strings.",
-                messages=[{
-                    "role": "user",
-                    "content": prompt
-                }]
-            )
+            async with _get_api_semaphore():
+                response = await self.client.messages.create(
+                    model=self.model,
+                    max_tokens=self.max_tokens,
+                    temperature=self.temperature,
+                    system="You are an expert content evaluator. Provide detailed, objective evaluations in valid JSON format with double quotes for strings.",
+                    messages=[{
+                        "role": "user",
+                        "content": prompt
+                    }]
+                )
             
             # Extract and parse JSON from response
             content = response.content[0].text.strip()
+            # Models sometimes wrap the JSON object in a markdown code fence
+            content = content.removeprefix("```json").removesuffix("```").strip()
             try:
                 # Try to parse as JSON directly
-                evaluation = json.loads(content)
+                evaluation = orjson.loads(content)
+                _validate_evaluation(evaluation)
+                self._store(cache_key, evaluation)
                 return evaluation
-            except json.JSONDecodeError as e:
+            except (orjson.JSONDecodeError, fastjsonschema.JsonSchemaException) as e:
                 logger.error(f"Failed to parse evaluation response as JSON: {e}")
                 logger.error(f"Raw response: {content}")
                 
@@ -142,8 +350,10 @@ Make sure your response is ONLY the JSON object, with no additional text before
                     # Replace single quotes with double quotes
                     fixed_content = content.replace("'", '"')
                     evaluation = json.loads(fixed_content)
+                    _validate_evaluation(evaluation)
+                    self._store(cache_key, evaluation)
                     return evaluation
-                except json.JSONDecodeError:
+                except (json.JSONDecodeError, fastjsonschema.JsonSchemaException):
                     return {
                         "error": "Failed to parse evaluation response",
                         "raw_response": content
@@ -153,4 +363,47 @@ Make sure your response is ONLY the JSON object, with no additional text before
             logger.error(f"Evaluation failed: {e}")
             return {
                 "error": str(e)
-            } 
\ No newline at end of file
+            }
+    
+    async def evaluate_batch(
+        self,
+        articles: List[Dict[str, Any]],
+        concurrency: int = 16
+    ) -> List[Dict[str, Any]]:
+        """Evaluate several articles concurrently.
+        
+        Args:
+            articles: Keyword arguments for evaluate_article, one dict per article
+            concurrency: Maximum number of evaluations in flight at once
+            
+        Returns:
+            Evaluation results in the same order as the input articles
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def _evaluate_one(article: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.evaluate_article(**article)
+        
+        return await asyncio.gather(*(_evaluate_one(article) for article in articles))
+    
+    def _cache_key(
+        self,
+        content: str,
+        title: str,
+        keyword_list: str,
+        min_length: Optional[int],
+        max_length: Optional[int]
+    ) -> str:
+        """Build the cache key for an evaluation request."""
+        key = f"{self.model}|{title}|{keyword_list}|{min_length}|{max_length}|{content}"
+        return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+    
+    def _store(self, cache_key: str, evaluation: Dict[str, Any]) -> None:
+        """Cache a successful evaluation, evicting the least recently used."""
+        if self.cache_size <= 0:
+            return
+        self._cache[cache_key] = orjson.dumps(evaluation)
+        self._cache.move_to_end(cache_key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
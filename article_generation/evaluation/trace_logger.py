@@ -1,13 +1,39 @@
 """Trace logging for article generation."""
 
 import os
-import json
-from datetime import datetime
+import re
+import gzip
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 from typing import Dict, Any, Optional
 import logging
 
+import orjson
+import simdjson
+
 logger = logging.getLogger(__name__)
 
+# Parsers are reused across calls since building one allocates its internal
+# buffers. simdjson.Parser is not thread-safe, so each thread gets its own.
+_local = threading.local()
+
+def _get_parser() -> simdjson.Parser:
+    """Return this thread's simdjson parser, creating it on first use."""
+    parser = getattr(_local, "parser", None)
+    if parser is None:
+        parser = _local.parser = simdjson.Parser()
+    return parser
+
+# Traces are appended to one JSON Lines shard per day, e.g. traces_20240115.jsonl
+_SHARD_NAME = re.compile(r"^traces_(\d{8})\.jsonl$")
+# Older traces were written one file per trace as <title>_<stamp>.json[.gz]
+_FILENAME_TIMESTAMP = re.compile(r"_(\d{8}_\d{6})\.json(?:\.gz)?$")
+_GZIP_MAGIC = b"\x1f\x8b"
+# Filename timestamps are truncated to the second
+_FILENAME_SLACK = timedelta(seconds=1)
+
 class TraceLogger:
     """Logger for recording article generation traces."""
     
@@ -46,10 +72,11 @@ class TraceLogger:
             error: Any error that occurred
             
         Returns:
-            The path to the saved trace file
+            The path to the trace shard the trace was appended to
         """
+        now = datetime.now()
         trace = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": now,
             "title": title,
             "keywords": keywords,
             "prompt": prompt,
@@ -58,24 +85,40 @@ class TraceLogger:
             "error": str(error) if error else None
         }
         
-        # Create filename from sanitized title and timestamp
-        safe_title = "".join(c if c.isalnum() else "_" for c in title.lower())
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{safe_title}_{timestamp}.json"
-        
-        # Save to appropriate directory
+        # Append to the day's shard in the appropriate directory
         save_dir = self.error_dir if error else self.success_dir
-        save_path = os.path.join(save_dir, filename)
+        save_path = os.path.join(save_dir, f"traces_{now:%Y%m%d}.jsonl")
         
         try:
-            with open(save_path, "w") as f:
-                json.dump(trace, f, indent=2)
+            # One write per trace keeps appends from interleaving
+            with open(save_path, "ab") as f:
+                f.write(orjson.dumps(trace, option=orjson.OPT_NON_STR_KEYS) + b"\n")
             logger.info(f"Saved trace to {save_path}")
             return save_path
         except Exception as e:
             logger.error(f"Failed to save trace: {e}")
             raise
     
+    async def log_trace_async(
+        self,
+        title: str,
+        keywords: list[str],
+        prompt: str,
+        response: Dict[str, Any],
+        metadata: Optional[Dict[str, Any]] = None,
+        error: Optional[Exception] = None
+    ) -> str:
+        """Log a trace without blocking the event loop.
+        
+        Runs log_trace in a worker thread; takes the same arguments.
+        
+        Returns:
+            The path to the trace shard the trace was appended to
+        """
+        return await asyncio.to_thread(
+            self.log_trace, title, keywords, prompt, response, metadata, error
+        )
+    
     def get_traces(
         self,
         success_only: bool = True,
@@ -92,30 +135,126 @@ class TraceLogger:
         Returns:
             List of trace dictionaries
         """
-        traces = []
         dirs = [self.success_dir]
         if not success_only:
             dirs.append(self.error_dir)
             
+        paths = []
         for directory in dirs:
-            for filename in os.listdir(directory):
-                if not filename.endswith(".json"):
-                    continue
-                    
-                filepath = os.path.join(directory, filename)
-                try:
-                    with open(filepath) as f:
-                        trace = json.load(f)
-                        
-                    trace_date = datetime.fromisoformat(trace["timestamp"])
-                    
-                    if start_date and trace_date < start_date:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if not entry.is_file():
                         continue
-                    if end_date and trace_date > end_date:
+                    
+                    # Skip shards and files whose name places them out of
+                    # range without opening them
+                    shard = _SHARD_NAME.match(entry.name)
+                    if shard:
+                        day = datetime.strptime(shard.group(1), "%Y%m%d").date()
+                        if start_date and day < start_date.date():
+                            continue
+                        if end_date and day > end_date.date():
+                            continue
+                    elif entry.name.endswith((".json", ".json.gz")):
+                        match = _FILENAME_TIMESTAMP.search(entry.name)
+                        if match and (start_date or end_date):
+                            file_date = datetime.strptime(match.group(1), "%Y%m%d_%H%M%S")
+                            if start_date and file_date + _FILENAME_SLACK < start_date:
+                                continue
+                            if end_date and file_date - _FILENAME_SLACK > end_date:
+                                continue
+                    else:
                         continue
                         
-                    traces.append(trace)
-                except Exception as e:
-                    logger.error(f"Failed to load trace {filepath}: {e}")
+                    paths.append(entry.path)
+        
+        def _read_and_parse(filepath: str) -> list[Dict[str, Any]]:
+            try:
+                return self._load_traces(filepath, start_date, end_date)
+            except Exception as e:
+                logger.error(f"Failed to load trace {filepath}: {e}")
+                return []
+        
+        # Overlap disk reads and parsing across files
+        max_workers = min(32, (os.cpu_count() or 1) * 4, max(len(paths), 1))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            traces = [
+                trace
+                for loaded in executor.map(_read_and_parse, paths)
+                for trace in loaded
+            ]
                     
-        return sorted(traces, key=lambda x: x["timestamp"], reverse=True) 
\ No newline at end of file
+        return sorted(traces, key=lambda x: x["timestamp"], reverse=True)
+    
+    @staticmethod
+    def _load_traces(
+        filepath: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> list[Dict[str, Any]]:
+        """Load the traces in a shard or single-trace file within the date range.
+        
+        Shards hold one JSON document per line; older single-trace files may
+        be plain or gzip-compressed JSON.
+        
+        Args:
+            filepath: Path to the shard or trace file
+            start_date: Only return traces after this date
+            end_date: Only return traces before this date
+            
+        Returns:
+            List of trace dictionaries
+        """
+        with open(filepath, "rb") as f:
+            data = f.read()
+        if data[:2] == _GZIP_MAGIC:
+            data = gzip.decompress(data)
+            
+        if not filepath.endswith(".jsonl"):
+            trace = TraceLogger._parse_trace(data, start_date, end_date)
+            return [trace] if trace is not None else []
+        
+        traces = []
+        for line in data.splitlines():
+            if not line.strip():
+                continue
+            try:
+                trace = TraceLogger._parse_trace(line, start_date, end_date)
+            except ValueError as e:
+                # A torn final line from an interrupted write
+                logger.error(f"Skipping malformed trace in {filepath}: {e}")
+                continue
+            if trace is not None:
+                traces.append(trace)
+        return traces
+    
+    @staticmethod
+    def _parse_trace(
+        data: bytes,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Parse a single trace document if it falls within the date range.
+        
+        Only the timestamp is read to filter; the full trace is materialized
+        once it passes. The parsed document must not outlive this call, since
+        the thread's parser cannot be reused while it is referenced.
+        
+        Args:
+            data: The encoded JSON trace
+            start_date: Only return the trace if after this date
+            end_date: Only return the trace if before this date
+            
+        Returns:
+            The trace dictionary, or None if outside the date range
+        """
+        doc = _get_parser().parse(data)
+            
+        trace_date = datetime.fromisoformat(doc["timestamp"])
+        
+        if start_date and trace_date < start_date:
+            return None
+        if end_date and trace_date > end_date:
+            return None
+            
+        return doc.as_dict()
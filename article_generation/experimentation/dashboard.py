@@ -2,6 +2,7 @@
 
 import os
 import streamlit as st
+import numpy as np
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
@@ -14,10 +15,9 @@ from .feedback import FeedbackManager
 def load_experiment(experiment_name: str) -> Optional[Experiment]:
     """Load an experiment by name."""
     try:
-        # Load experiment data from JSON file
-        experiment_path = os.path.join("experiments", f"{experiment_name}.json")
-        if not os.path.exists(experiment_path):
-            st.error(f"Experiment file not found: {experiment_path}")
+        # Load experiment data from its metadata file (or legacy JSON file)
+        if not _experiment_mtime(experiment_name):
+            st.error(f"Experiment file not found: {experiment_name}")
             return None
             
         # Create experiment instance
@@ -42,11 +42,77 @@ def load_experiment(experiment_name: str) -> Optional[Experiment]:
 def load_feedback() -> Optional[FeedbackManager]:
     """Load feedback data."""
     try:
-        return FeedbackManager()
+        mtime = max(
+            _file_mtime(os.path.join("feedback", filename))
+            for filename in ("criteria.json", "responses.jsonl", "feedback_data.json")
+        )
+        return _load_feedback_manager(mtime)
     except Exception as e:
         st.error(f"Failed to load feedback data: {e}")
         return None
 
+def _experiment_names(experiment_dir: str) -> List[str]:
+    """List experiments stored in a directory, in either file layout."""
+    names = []
+    with os.scandir(experiment_dir) as entries:
+        for entry in entries:
+            if not entry.is_file():
+                continue
+            if entry.name.endswith(".meta.json"):
+                name = entry.name[:-len(".meta.json")]
+            elif entry.name.endswith(".json"):
+                name = entry.name[:-len(".json")]
+            else:
+                continue
+            if name not in names:
+                names.append(name)
+    return names
+
+def _experiment_mtime(experiment_name: str) -> float:
+    """Get the latest modification time across an experiment's files."""
+    return max(
+        _file_mtime(os.path.join("experiments", f"{experiment_name}{suffix}"))
+        for suffix in (".meta.json", ".trials.jsonl", ".json")
+    )
+
+def _file_mtime(path: str) -> float:
+    """Get a file's modification time, or 0.0 if it does not exist.
+    
+    Passed to the cached loaders below so that a changed file on disk
+    invalidates the cached value.
+    """
+    try:
+        return os.stat(path).st_mtime
+    except FileNotFoundError:
+        return 0.0
+
+@st.cache_data
+def _load_experiment_df(experiment_name: str, mtime: float) -> pd.DataFrame:
+    """Load an experiment's trial data, cached until its files change.
+    
+    Rows are sorted by timestamp and indexed by it so date filtering can
+    slice the index instead of building a boolean mask.
+    """
+    experiment = Experiment(
+        name=experiment_name,
+        description="",
+        metrics=[]
+    )
+    df = experiment.to_dataframe()
+    if df.empty:
+        return df
+    df = df.sort_values("timestamp")
+    return df.set_index(pd.DatetimeIndex(df["timestamp"], name=None))
+
+@st.cache_resource(max_entries=1)
+def _load_feedback_manager(mtime: float) -> FeedbackManager:
+    """Load feedback data, cached until its files change.
+    
+    Only the latest manager is kept, so older ones and their open log
+    files are released once the data changes.
+    """
+    return FeedbackManager()
+
 def plot_metric_over_time(df: pd.DataFrame, metric: str):
     """Plot metric values over time with trend lines."""
     fig = px.scatter(
@@ -55,6 +121,7 @@ def plot_metric_over_time(df: pd.DataFrame, metric: str):
         y=metric,
         color="variant_name",  # Use variant_name for display
         trendline="lowess",
+        render_mode="webgl",
         title=f"{metric} Over Time by Variant"
     )
     st.plotly_chart(fig)
@@ -75,18 +142,23 @@ def plot_feedback_heatmap(feedback_manager: FeedbackManager):
         st.warning("No feedback data available")
         return
         
-    # Create DataFrame of ratings
-    data = []
-    for response in feedback_manager.responses:
-        row = {"article_id": response.article_id}
-        row.update(response.ratings)
-        data.append(row)
-    
-    df = pd.DataFrame(data)
-    if len(df.columns) <= 1:
+    # Build one float32 column per criterion directly from the responses
+    responses = feedback_manager.responses
+    keys = list(feedback_manager.criteria)
+    if not keys:
         st.warning("Insufficient feedback data for correlation analysis")
         return
         
+    n = len(responses)
+    df = pd.DataFrame({
+        key: np.fromiter(
+            (r.ratings.get(key, np.nan) for r in responses),
+            dtype=np.float32,
+            count=n
+        )
+        for key in keys
+    })
+        
     corr = df.corr()
     
     fig = go.Figure(data=go.Heatmap(
@@ -119,11 +191,7 @@ def main():
             st.warning("No experiments directory found")
             return
             
-        experiment_files = [
-            f.replace(".json", "") 
-            for f in os.listdir(experiment_dir) 
-            if f.endswith(".json")
-        ]
+        experiment_files = _experiment_names(experiment_dir)
         
         if not experiment_files:
             st.warning("No experiments found")
@@ -143,27 +211,33 @@ def main():
         st.write(f"Description: {experiment.description}")
         st.write(f"Metrics: {', '.join(experiment.metrics)}")
         st.write(f"Number of variants: {len(experiment.variants)}")
-        st.write(f"Number of trials: {len(experiment.trials)}")
         
-        # Convert to DataFrame for analysis
-        df = experiment.to_dataframe()
+        # Convert to DataFrame for analysis (cached across widget reruns).
+        # Trials are counted from it, which saves parsing the trial log
+        df = _load_experiment_df(
+            experiment_name,
+            _experiment_mtime(experiment_name)
+        )
+        st.write(f"Number of trials: {len(df)}")
         
+        time_range = experiment.time_range()
+        if time_range is None:
+            st.warning("No trials recorded yet")
+            return
+            
         # Time range filter
         st.subheader("Time Range")
+        first_trial, last_trial = time_range
         date_range = st.date_input(
             "Select Date Range",
             value=(
-                df["timestamp"].min().date(),
-                df["timestamp"].max().date()
+                first_trial.date(),
+                last_trial.date()
             )
         )
         if len(date_range) == 2:
             start_date, end_date = date_range
-            mask = (
-                (df["timestamp"].dt.date >= start_date) &
-                (df["timestamp"].dt.date <= end_date)
-            )
-            df = df[mask]
+            df = df.loc[str(start_date):str(end_date)]
         
         # Metric analysis
         st.subheader("Metric Analysis")
@@ -189,7 +263,8 @@ def main():
             if variant != results["baseline_variant"]:
                 st.write(f"\n{variant}:")
                 for metric_name, value in metrics.items():
-                    st.write(f"  {metric_name}: {value:+.2%}")
+                    p_value = results["significance"][variant][metric_name]["p_value"]
+                    st.write(f"  {metric_name}: {value:+.2%} (p = {p_value:.3f})")
         
     elif page == "Feedback Analysis":
         st.header("Feedback Analysis")
@@ -244,7 +319,7 @@ def main():
         
         experiment = load_experiment(st.selectbox(
             "Select Experiment",
-            [f.replace(".json", "") for f in os.listdir("experiments")]
+            _experiment_names("experiments")
         ))
         
         feedback_manager = load_feedback()
@@ -253,15 +328,14 @@ def main():
             return
             
         # Combine experiment and feedback data
-        df_experiment = experiment.to_dataframe()
-        
-        feedback_scores = {}
-        for trial in experiment.trials:
-            scores = feedback_manager.calculate_article_score(trial.id)
-            if scores:
-                feedback_scores[trial.id] = scores
+        df_experiment = _load_experiment_df(
+            experiment.name,
+            _experiment_mtime(experiment.name)
+        )
         
-        df_feedback = pd.DataFrame.from_dict(feedback_scores, orient="index")
+        df_feedback = feedback_manager.calculate_all_scores(
+            df_experiment["trial_id"].tolist() if not df_experiment.empty else []
+        )
         
         if not df_feedback.empty:
             # Merge experiment and feedback data
@@ -278,27 +352,21 @@ def main():
             automated_metrics = experiment.metrics
             human_metrics = df_feedback.columns
             
-            corr_data = []
-            for auto_metric in automated_metrics:
-                for human_metric in human_metrics:
-                    if auto_metric in df_combined and human_metric in df_combined:
-                        correlation = df_combined[auto_metric].corr(
-                            df_combined[human_metric]
-                        )
-                        corr_data.append({
-                            "Automated Metric": auto_metric,
-                            "Human Metric": human_metric,
-                            "Correlation": correlation
-                        })
+            auto_cols = [m for m in automated_metrics if m in df_combined]
+            human_cols = [m for m in human_metrics if m in df_combined]
             
-            if corr_data:
-                df_corr = pd.DataFrame(corr_data)
+            if auto_cols and human_cols:
+                # One correlation matrix over all metrics, then take the
+                # automated x human block
+                cols = list(dict.fromkeys(auto_cols + human_cols))
+                corr_block = df_combined[cols].corr().loc[auto_cols, human_cols]
                 fig = px.imshow(
-                    df_corr.pivot(
-                        index="Automated Metric",
-                        columns="Human Metric",
-                        values="Correlation"
-                    ),
+                    corr_block,
+                    labels={
+                        "x": "Human Metric",
+                        "y": "Automated Metric",
+                        "color": "Correlation"
+                    },
                     title="Correlation between Automated and Human Metrics",
                     color_continuous_scale="RdBu"
                 )
@@ -329,6 +397,7 @@ def main():
                     y=y_metric,
                     color="variant_name",
                     trendline="ols",
+                    render_mode="webgl",
                     title=f"{x_metric} vs {y_metric}"
                 )
                 st.plotly_chart(fig)
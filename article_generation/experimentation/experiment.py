@@ -1,23 +1,73 @@
 """Core experiment functionality for A/B testing article generation."""
 
 import os
-import json
-import uuid
+import io
+import sys
+import secrets
 import datetime
-from typing import Dict, List, Optional, Any, Union
+from typing import Dict, Iterable, List, Optional, Any, Tuple, Union
 from dataclasses import dataclass
 import pandas as pd
 import numpy as np
+import orjson
 from scipy import stats
 
-@dataclass
+from .storage import atomic_write, count_lines, drop_partial_line
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional; fall back to NumPy
+    njit = None
+
+# Trial writes are buffered and reach disk when the buffer fills or on
+# flush()/close()
+_TRIALS_BUFFER_SIZE = 64 * 1024
+
+# Slotted dataclasses drop the per-instance __dict__; dataclass(slots=...)
+# needs Python 3.10+
+_DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+def _columns_dtype(n_metrics: int) -> np.dtype:
+    """Record layout of the binary trial columns file.
+    
+    Each trial is one fixed-size record holding its variant code, timestamp
+    and declared metrics, so the file can be memory-mapped as an array.
+    """
+    return np.dtype([
+        ("code", "<i4"),
+        ("timestamp", "<M8[us]"),
+        ("metrics", "<f8", (n_metrics,))
+    ])
+
+def _welford_by_variant(codes, metrics, n_variants):
+    """Per-variant trial counts, metric means and M2 in one pass over trials.
+    
+    Applies the same Welford update as Experiment.record_trial, row by row.
+    Only used when numba is available to compile it.
+    """
+    n_metrics = metrics.shape[1]
+    counts = np.zeros(n_variants, dtype=np.int64)
+    means = np.zeros((n_variants, n_metrics))
+    m2 = np.zeros((n_variants, n_metrics))
+    for i in range(codes.shape[0]):
+        c = codes[i]
+        counts[c] += 1
+        for j in range(n_metrics):
+            delta = metrics[i, j] - means[c, j]
+            means[c, j] += delta / counts[c]
+            m2[c, j] += delta * (metrics[i, j] - means[c, j])
+    return counts, means, m2
+
+_welford_by_variant_jit = njit(cache=True)(_welford_by_variant) if njit else None
+
+@dataclass(**_DATACLASS_SLOTS)
 class Variant:
     """Represents a variant in an experiment."""
     name: str
     prompt_template: str
     metadata: Dict[str, Any]
 
-@dataclass
+@dataclass(**_DATACLASS_SLOTS)
 class Trial:
     """Represents a single trial in an experiment."""
     id: str
@@ -49,7 +99,30 @@ class Experiment:
         self.metrics = metrics
         self.experiment_dir = experiment_dir or os.path.join(os.getcwd(), "experiments")
         self.variants: Dict[str, Variant] = {}
-        self.trials: List[Trial] = []
+        
+        # Memoized analysis results, cleared whenever variants or trials change
+        self._analysis_cache: Dict[tuple, Any] = {}
+        
+        # Trial objects; None until first accessed when the experiment was
+        # opened from its memory-mapped columns file
+        self._trials: Optional[List[Trial]] = []
+        
+        # Columnar copy of trial metrics for vectorized analysis: row i holds
+        # self.trials[i]'s metrics in self.metrics order, and _codes[i] the
+        # index of its variant in _variant_ids. _trials_by_variant maps each
+        # variant to its rows so per-variant lookups need no scan (None until
+        # needed after a memory-mapped load)
+        self._variant_ids: List[str] = []
+        self._variant_index: Dict[str, int] = {}
+        self._trials_by_variant: Optional[Dict[str, List[int]]] = {}
+        self._reset_trial_arrays()
+        
+        # Append-only trial log and binary columns file, opened on the first
+        # recorded trial. The columns file is rewritten first when it does
+        # not match the log
+        self._trials_fp: Optional[io.BufferedWriter] = None
+        self._columns_fp: Optional[io.BufferedWriter] = None
+        self._columns_stale = False
         
         # Create experiment directory if it doesn't exist
         os.makedirs(self.experiment_dir, exist_ok=True)
@@ -73,14 +146,16 @@ class Experiment:
         Returns:
             The variant ID
         """
-        variant_id = str(uuid.uuid4())
+        variant_id = secrets.token_hex(16)
         variant = Variant(
             name=name,
             prompt_template=prompt_template,
             metadata=metadata or {}
         )
         self.variants[variant_id] = variant
-        self._save_experiment()
+        self._index_variant(variant_id)
+        self._analysis_cache.clear()
+        self._save_meta()
         return variant_id
     
     def record_trial(
@@ -99,40 +174,135 @@ class Experiment:
         Returns:
             The trial ID
         """
+        return self.record_trials(variant_id, [metrics], [metadata])[0]
+    
+    def record_trials(
+        self,
+        variant_id: str,
+        metrics: Iterable[Dict[str, float]],
+        metadata: Optional[Iterable[Optional[Dict[str, Any]]]] = None
+    ) -> List[str]:
+        """Record several trials for a variant with a single write.
+        
+        Args:
+            variant_id: ID of the variant used
+            metrics: Metric values for each trial (each must include all
+                experiment metrics)
+            metadata: Additional metadata for each trial, in the same order
+            
+        Returns:
+            The trial IDs, in order
+        """
+        metrics = list(metrics)
+        metadata = [None] * len(metrics) if metadata is None else list(metadata)
+        if len(metadata) != len(metrics):
+            raise ValueError("metrics and metadata must have the same length")
+        
         # Validate metrics
-        missing_metrics = set(self.metrics) - set(metrics.keys())
-        if missing_metrics:
-            raise ValueError(f"Missing required metrics: {missing_metrics}")
+        required = set(self.metrics)
+        for trial_metrics in metrics:
+            missing_metrics = required - trial_metrics.keys()
+            if missing_metrics:
+                raise ValueError(f"Missing required metrics: {missing_metrics}")
         
         # Ensure variant exists
         if variant_id not in self.variants:
             raise ValueError(f"Unknown variant: {variant_id}")
         
-        trial = Trial(
-            id=str(uuid.uuid4()),
-            variant_id=variant_id,
-            timestamp=datetime.datetime.now(),
-            metrics=metrics,
-            metadata=metadata or {}
-        )
-        self.trials.append(trial)
-        self._save_experiment()
-        return trial.id
+        now = datetime.datetime.now()
+        trials = [
+            Trial(
+                id=secrets.token_hex(16),
+                variant_id=variant_id,
+                timestamp=now,
+                metrics=trial_metrics,
+                metadata=trial_metadata or {}
+            )
+            for trial_metrics, trial_metadata in zip(metrics, metadata)
+        ]
+        # Open the logs before adding the trials in memory, so migrating a
+        # legacy file or rewriting the columns file does not write them twice
+        self._trials_writer()
+        # Encode before touching any in-memory state, so trials that cannot
+        # be serialized are rejected instead of kept without reaching the log
+        lines = b"".join(self._encode_trial(t) for t in trials)
+        if self._trials is not None:
+            self._trials.extend(trials)
+        for trial in trials:
+            self._append_trial_row(trial)
+        self._analysis_cache.clear()
+        self._save_trials_append(lines, len(trials))
+        return [trial.id for trial in trials]
+    
+    @property
+    def trials(self) -> List[Trial]:
+        """All recorded trials, read from the trial log on first access."""
+        if self._trials is None:
+            self.flush()
+            trials = self._decode_trials(self._read_trials(self._path(".trials.jsonl")))
+            if len(trials) == self._n_trials:
+                self._trials = trials
+            else:
+                # The columns file disagrees with the log; the log wins
+                self._set_trials(trials)
+                self._mark_columns_stale()
+        return self._trials
+    
+    def flush(self):
+        """Write any buffered trials to disk."""
+        for fp in (self._trials_fp, self._columns_fp):
+            if fp is not None:
+                fp.flush()
+    
+    def close(self):
+        """Flush buffered trials and close the trial log."""
+        if self._trials_fp is not None:
+            self._trials_fp.close()
+            self._trials_fp = None
+        if self._columns_fp is not None:
+            self._columns_fp.close()
+            self._columns_fp = None
+    
+    def __enter__(self) -> "Experiment":
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
     
     def analyze_results(self) -> Dict[str, Any]:
         """Analyze experiment results.
         
+        Results are cached until the next variant or trial is added, so
+        callers should treat the returned dictionary as read-only.
+        
         Returns:
-            Dictionary containing analysis results
+            Dictionary containing analysis results. ``variant_performance``
+            holds each variant's relative improvement over the baseline per
+            metric, and ``significance`` the matching Welch's t-test
+            (``t_statistic``, ``p_value``) and Cohen's d effect size.
         """
-        if not self.trials:
+        key = ("analyze_results",)
+        if key not in self._analysis_cache:
+            self._analysis_cache[key] = self._analyze_results()
+        return self._analysis_cache[key]
+    
+    def _analyze_results(self) -> Dict[str, Any]:
+        """Compute the analysis returned by analyze_results."""
+        if not self._n_trials:
             return {
                 "total_trials": 0,
                 "variant_performance": {}
             }
         
+        # Per-variant trial counts, metric means and sample variances are
+        # kept up to date as trials are recorded
+        counts = self._stat_count
+        means = self._stat_mean
+        with np.errstate(divide="ignore", invalid="ignore"):
+            variances = self._stat_m2 / (counts[:, None] - 1)
+        
         # Get all variant IDs that have trials
-        variant_ids = sorted(list(set(t.variant_id for t in self.trials)))
+        variant_ids = sorted(vid for vid in self._variant_ids if counts[self._variant_index[vid]])
         if not variant_ids:
             return {
                 "total_trials": 0,
@@ -141,125 +311,433 @@ class Experiment:
         
         # Find baseline variant ID - look for variant with name "baseline" first
         baseline_id = None
-        baseline_trials = []
-        
-        # First try to find a variant named "baseline"
         for vid, variant in self.variants.items():
             if variant.name.lower() == "baseline":
                 baseline_id = vid
-                baseline_trials = [t for t in self.trials if t.variant_id == vid]
                 break
         
         # If no baseline variant found or it has no trials, use the variant with most trials
-        if not baseline_trials:
-            variant_trial_counts = {}
-            for vid in variant_ids:
-                variant_trial_counts[vid] = len([t for t in self.trials if t.variant_id == vid])
-            
-            baseline_id = max(variant_trial_counts.items(), key=lambda x: x[1])[0]
-            baseline_trials = [t for t in self.trials if t.variant_id == baseline_id]
+        if baseline_id is None or not counts[self._variant_index[baseline_id]]:
+            baseline_id = max(variant_ids, key=lambda vid: counts[self._variant_index[vid]])
         
-        if not baseline_trials:
-            raise ValueError("No trials found for any variant")
+        baseline_row = self._variant_index[baseline_id]
+        baseline_means = means[baseline_row]
         
-        baseline_data = {
-            metric: [t.metrics[metric] for t in baseline_trials]
-            for metric in self.metrics
-        }
+        # Welch's t-test and Cohen's d for every variant and metric at once,
+        # straight from the running statistics
+        with np.errstate(divide="ignore", invalid="ignore"):
+            stds = np.sqrt(variances)
+            t_stat, p_value = stats.ttest_ind_from_stats(
+                means, stds, counts[:, None],
+                baseline_means, stds[baseline_row], counts[baseline_row],
+                equal_var=False
+            )
+            cohens_d = (means - baseline_means) / np.sqrt(
+                (variances + variances[baseline_row]) / 2
+            )
         
         results = {
-            "total_trials": len(self.trials),
+            "total_trials": self._n_trials,
             "baseline_variant": self.variants[baseline_id].name,
-            "variant_performance": {}
+            "variant_performance": {},
+            "significance": {}
         }
         
         # Calculate performance vs baseline for each variant
         for variant_id in variant_ids:
             if variant_id == baseline_id:
                 continue
+            row = self._variant_index[variant_id]
             
-            variant_performance = {}
-            for metric in self.metrics:
-                variant_data = [
-                    t.metrics[metric] 
-                    for t in self.trials 
-                    if t.variant_id == variant_id
-                ]
-                
-                if not variant_data or not baseline_data[metric]:
-                    continue
-                
-                # Calculate relative improvement
-                baseline_mean = np.mean(baseline_data[metric])
-                variant_mean = np.mean(variant_data)
-                
-                variant_performance[metric] = (variant_mean / baseline_mean) - 1
+            # Calculate relative improvement
+            with np.errstate(divide="ignore", invalid="ignore"):
+                improvement = means[row] / baseline_means - 1
             
+            variant_performance = {
+                metric: float(improvement[col])
+                for col, metric in enumerate(self.metrics)
+            }
             if variant_performance:
-                results["variant_performance"][self.variants[variant_id].name] = variant_performance
+                variant_name = self.variants[variant_id].name
+                results["variant_performance"][variant_name] = variant_performance
+                results["significance"][variant_name] = {
+                    metric: {
+                        "t_statistic": float(t_stat[row, col]),
+                        "p_value": float(p_value[row, col]),
+                        "cohens_d": float(cohens_d[row, col])
+                    }
+                    for col, metric in enumerate(self.metrics)
+                }
         
         return results
     
+    def get_variant_trials(self, variant_id: str) -> List[Trial]:
+        """Get the trials recorded for a variant.
+        
+        Args:
+            variant_id: ID of the variant
+            
+        Returns:
+            The variant's trials in the order they were recorded
+        """
+        if self._trials_by_variant is None:
+            order, _, starts = self._grouped_trials()
+            self._trials_by_variant = {
+                vid: rows.tolist()
+                for vid, rows in zip(self._variant_ids, np.split(order, starts[1:]))
+            }
+        trials = self.trials
+        return [trials[i] for i in self._trials_by_variant.get(variant_id, [])]
+    
+    def get_best_variant(self, metric: str) -> Optional[str]:
+        """Get the variant with the highest mean value of a metric.
+        
+        Args:
+            metric: Name of the metric to compare
+            
+        Returns:
+            The best variant's ID, or None if no variant has trials
+        """
+        key = ("get_best_variant", metric)
+        if key not in self._analysis_cache:
+            self._analysis_cache[key] = self._get_best_variant(metric)
+        return self._analysis_cache[key]
+    
+    def _get_best_variant(self, metric: str) -> Optional[str]:
+        """Compute the result of get_best_variant."""
+        col = self.metrics.index(metric)
+        with_trials = np.flatnonzero(self._stat_count)
+        if len(with_trials) <= 1:
+            # Nothing to compare
+            return self._variant_ids[with_trials[0]] if len(with_trials) else None
+            
+        counts = self._stat_count
+        means = self._stat_mean[:, col].copy()
+        means[(counts == 0) | np.isnan(means)] = -np.inf
+        return self._variant_ids[int(np.argmax(means))]
+    
     def to_dataframe(self) -> pd.DataFrame:
         """Convert experiment data to a pandas DataFrame.
         
         Returns:
             DataFrame containing all trial data
         """
-        data = []
-        for trial in self.trials:
-            row = {
-                "trial_id": trial.id,
-                "variant_id": trial.variant_id,
-                "variant_name": self.variants[trial.variant_id].name,
-                "timestamp": trial.timestamp
+        # Fixed columns come straight from the columnar store; variant IDs
+        # and names are dictionary-encoded since they repeat on every row
+        codes = self._codes[:self._n_trials]
+        variant_names = np.array(
+            [self.variants[vid].name for vid in self._variant_ids], dtype=object
+        )
+        metrics_arr = self._metrics_arr
+        columns = {
+            "trial_id": [t.id for t in self.trials],
+            "variant_id": pd.Categorical.from_codes(
+                codes, categories=self._variant_ids
+            ).remove_unused_categories(),
+            "variant_name": pd.Categorical(variant_names[codes]),
+            "timestamp": self._timestamps[:self._n_trials],
+            **{metric: metrics_arr[:, col] for col, metric in enumerate(self.metrics)}
+        }
+        df = pd.DataFrame(columns)
+        
+        # Undeclared metrics and metadata have no fixed schema, so only they
+        # are collected per row
+        metric_set = set(self.metrics)
+        extras = [
+            {
+                **{k: v for k, v in t.metrics.items() if k not in metric_set},
+                **t.metadata
             }
-            # Add metrics
-            row.update(trial.metrics)
-            # Add metadata
-            row.update(trial.metadata)
-            data.append(row)
+            for t in self.trials
+        ]
+        if any(extras):
+            extra_df = pd.DataFrame.from_records(extras)
+            for col in extra_df.columns:
+                df[col] = extra_df[col]
+        
+        return df
+    
+    def _grouped_trials(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Get the layout of trial rows grouped by variant.
         
-        return pd.DataFrame(data)
+        Cached with the analysis results until the trials change.
+        
+        Returns:
+            Tuple of (order, counts, starts): order stably sorts trial rows by
+            variant code, and counts[i]/starts[i] give variant i's number of
+            trials and the offset of its first row in that order
+        """
+        key = ("grouped_trials",)
+        if key not in self._analysis_cache:
+            codes = self._codes[:self._n_trials]
+            counts = np.bincount(codes, minlength=len(self._variant_ids))
+            self._analysis_cache[key] = (
+                np.argsort(codes, kind="stable"),
+                counts,
+                np.cumsum(counts) - counts
+            )
+        return self._analysis_cache[key]
     
-    def _save_experiment(self):
-        """Save experiment data to disk."""
-        experiment_data = {
+    def _group_sums(self, values: np.ndarray) -> np.ndarray:
+        """Sum per-trial values by variant.
+        
+        Rows are gathered into variant order so each variant's sum is one
+        contiguous np.add.reduceat segment.
+        
+        Args:
+            values: Array with one row per trial
+            
+        Returns:
+            Array with one row of sums per variant, zero for variants
+            without trials
+        """
+        order, counts, starts = self._grouped_trials()
+        sums = np.zeros((len(counts),) + values.shape[1:])
+        nonempty = counts > 0
+        if nonempty.any():
+            sums[nonempty] = np.add.reduceat(values[order], starts[nonempty], axis=0)
+        return sums
+    
+    def time_range(self) -> Optional[Tuple[datetime.datetime, datetime.datetime]]:
+        """Get the timestamps of the first and last recorded trials.
+        
+        Timestamps recorded with a time zone are reported in naive UTC.
+        
+        Returns:
+            Tuple of (earliest, latest), or None if there are no trials
+        """
+        if not self._n_trials:
+            return None
+        timestamps = self._timestamps[:self._n_trials]
+        return timestamps.min().item(), timestamps.max().item()
+    
+    @property
+    def _metrics_arr(self) -> np.ndarray:
+        """Trial metrics as a (trials x metrics) array view.
+        
+        C-contiguous once trials have been recorded in this session; a view
+        into the memory-mapped columns file right after loading.
+        """
+        return self._metrics_buf[:self._n_trials]
+    
+    def _reset_trial_arrays(self):
+        """Clear the columnar trial store."""
+        self._trials_by_variant = {variant_id: [] for variant_id in self._variant_ids}
+        self._analysis_cache.clear()
+        self._n_trials = 0
+        self._codes = np.empty(0, dtype=np.int32)
+        self._timestamps = np.empty(0, dtype="datetime64[us]")
+        self._metrics_buf = np.empty((0, len(self.metrics)), dtype=np.float64)
+        
+        # Running per-variant statistics (Welford): trial count, metric means
+        # and sums of squared deviations from the mean
+        n_variants, n_metrics = len(self._variant_ids), len(self.metrics)
+        self._stat_count = np.zeros(n_variants, dtype=np.int64)
+        self._stat_mean = np.zeros((n_variants, n_metrics))
+        self._stat_m2 = np.zeros((n_variants, n_metrics))
+    
+    def _index_variant(self, variant_id: str):
+        """Assign the next integer code to a variant."""
+        if variant_id not in self._variant_index:
+            self._variant_index[variant_id] = len(self._variant_ids)
+            self._variant_ids.append(variant_id)
+            if self._trials_by_variant is not None:
+                self._trials_by_variant[variant_id] = []
+            self._stat_count = np.append(self._stat_count, 0)
+            self._stat_mean = np.vstack([self._stat_mean, np.zeros(len(self.metrics))])
+            self._stat_m2 = np.vstack([self._stat_m2, np.zeros(len(self.metrics))])
+    
+    def _append_trial_row(self, trial: Trial, update_stats: bool = True):
+        """Append a trial's variant code, timestamp and metrics to the columnar store.
+        
+        Args:
+            trial: The trial to append
+            update_stats: Whether to fold the trial into the running
+                per-variant statistics; bulk loads rebuild them afterwards
+        """
+        n = self._n_trials
+        if n == len(self._codes):
+            # Grow geometrically so appends stay amortized O(1); copying into
+            # a fresh C-ordered buffer keeps rows contiguous (and moves rows
+            # out of a read-only memory map)
+            capacity = max(16, 2 * n)
+            codes = np.empty(capacity, dtype=np.int32)
+            codes[:n] = self._codes[:n]
+            timestamps = np.empty(capacity, dtype="datetime64[us]")
+            timestamps[:n] = self._timestamps[:n]
+            metrics_buf = np.empty((capacity, len(self.metrics)), dtype=np.float64)
+            metrics_buf[:n] = self._metrics_buf[:n]
+            self._codes, self._timestamps, self._metrics_buf = codes, timestamps, metrics_buf
+            
+        timestamp = trial.timestamp
+        if timestamp.tzinfo is not None:
+            # datetime64 has no time zone; store aware timestamps as UTC
+            timestamp = timestamp.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+        code = self._variant_index[trial.variant_id]
+        self._codes[n] = code
+        self._timestamps[n] = timestamp
+        if self._trials_by_variant is not None:
+            self._trials_by_variant[trial.variant_id].append(n)
+        row = self._metrics_buf[n]
+        row[:] = [trial.metrics.get(m, np.nan) for m in self.metrics]
+        self._n_trials = n + 1
+        
+        if update_stats:
+            self._stat_count[code] += 1
+            delta = row - self._stat_mean[code]
+            self._stat_mean[code] += delta / self._stat_count[code]
+            self._stat_m2[code] += delta * (row - self._stat_mean[code])
+    
+    def _rebuild_running_stats(self):
+        """Recompute the running per-variant statistics from all trials.
+        
+        With numba installed this is one compiled pass over the trials;
+        otherwise two grouped NumPy passes (means, then squared deviations)
+        instead of one Python-level Welford update per trial.
+        """
+        if _welford_by_variant_jit is not None:
+            self._stat_count, self._stat_mean, self._stat_m2 = _welford_by_variant_jit(
+                self._codes[:self._n_trials], self._metrics_arr, len(self._variant_ids)
+            )
+            return
+            
+        _, counts, _ = self._grouped_trials()
+        self._stat_count = counts.astype(np.int64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self._stat_mean = np.where(
+                counts[:, None] > 0,
+                self._group_sums(self._metrics_arr) / counts[:, None],
+                0.0
+            )
+        deviations = self._metrics_arr - self._stat_mean[self._codes[:self._n_trials]]
+        self._stat_m2 = self._group_sums(deviations * deviations)
+    
+    def _path(self, suffix: str) -> str:
+        """Get the path of one of this experiment's data files."""
+        return os.path.join(self.experiment_dir, f"{self.name}{suffix}")
+    
+    def _trials_writer(self) -> io.BufferedWriter:
+        """Get the trial log, opening it and the columns file on first use."""
+        if self._trials_fp is None:
+            path = self._path(".trials.jsonl")
+            if not os.path.exists(self._path(".meta.json")):
+                # First write since loading a legacy single-file experiment;
+                # saving the metadata moves its trials over as well
+                self._save_meta()
+            else:
+                drop_partial_line(path)
+            self._trials_fp = open(path, "ab", buffering=_TRIALS_BUFFER_SIZE)
+        if self._columns_fp is None:
+            path = self._path(".columns.bin")
+            if self._columns_stale:
+                atomic_write(path, self._encode_columns(0, self._n_trials))
+                self._columns_stale = False
+            self._columns_fp = open(path, "ab", buffering=_TRIALS_BUFFER_SIZE)
+        return self._trials_fp
+    
+    def _mark_columns_stale(self):
+        """Have the columns file rewritten from memory before the next append."""
+        self._columns_stale = True
+        if self._columns_fp is not None:
+            self._columns_fp.close()
+            self._columns_fp = None
+    
+    def _encode_columns(self, start: int, stop: int) -> bytes:
+        """Encode rows of the columnar store as columns file records."""
+        records = np.empty(stop - start, dtype=_columns_dtype(len(self.metrics)))
+        records["code"] = self._codes[start:stop]
+        records["timestamp"] = self._timestamps[start:stop]
+        records["metrics"] = self._metrics_buf[start:stop]
+        return records.tobytes()
+    
+    def _encode_trial(self, trial: Trial) -> bytes:
+        """Encode a trial as one JSONL record.
+        
+        The variant is stored as its integer code ("vc"), its position in
+        the metadata file's variants, rather than repeating the ID string.
+        """
+        return orjson.dumps({
+            "id": trial.id,
+            "vc": self._variant_index[trial.variant_id],
+            "timestamp": trial.timestamp,
+            "metrics": trial.metrics,
+            "metadata": trial.metadata
+        }, option=orjson.OPT_SERIALIZE_NUMPY) + b"\n"
+    
+    def _save_trials_append(self, lines: bytes, count: int):
+        """Append the most recently recorded trials to the log and columns file.
+        
+        Args:
+            lines: The trials' encoded JSONL records
+            count: How many trials were recorded
+        """
+        self._trials_writer().write(lines)
+        self._columns_fp.write(self._encode_columns(self._n_trials - count, self._n_trials))
+    
+    def _migrate_legacy_trials(self):
+        """Copy a legacy single-file experiment's trials to the trial log.
+        
+        Does nothing once the trial log exists or if there is no legacy file.
+        """
+        path = self._path(".trials.jsonl")
+        if os.path.exists(path) or not os.path.exists(self._path(".json")):
+            return
+        atomic_write(path, b"".join(self._encode_trial(t) for t in self.trials))
+    
+    def _save_meta(self):
+        """Save experiment metadata and variants to disk."""
+        # Whichever write comes first after loading a legacy experiment, its
+        # trials must reach the log before the metadata file marks the new
+        # layout as the one to load
+        self._migrate_legacy_trials()
+        meta = {
             "name": self.name,
             "description": self.description,
             "metrics": self.metrics,
-            "variants": {
-                name: {
-                    "name": v.name,
-                    "prompt_template": v.prompt_template,
-                    "metadata": v.metadata
-                }
-                for name, v in self.variants.items()
-            },
-            "trials": [
-                {
-                    "id": t.id,
-                    "variant_id": t.variant_id,
-                    "timestamp": t.timestamp.isoformat(),
-                    "metrics": t.metrics,
-                    "metadata": t.metadata
-                }
-                for t in self.trials
-            ]
+            "variants": self.variants
         }
         
-        path = os.path.join(self.experiment_dir, f"{self.name}.json")
-        with open(path, "w") as f:
-            json.dump(experiment_data, f, indent=2)
+        atomic_write(
+            self._path(".meta.json"),
+            orjson.dumps(meta, option=orjson.OPT_SERIALIZE_NUMPY)
+        )
     
     def _load_experiment(self):
-        """Load experiment data from disk."""
-        path = os.path.join(self.experiment_dir, f"{self.name}.json")
-        if not os.path.exists(path):
-            return
+        """Load experiment data from disk.
+        
+        Reads ``{name}.meta.json`` and memory-maps the trial columns in
+        ``{name}.columns.bin``, leaving ``{name}.trials.jsonl`` to be parsed
+        when trials are first accessed. Falls back to parsing the trial log
+        when the columns file is missing or out of date, and to a legacy
+        single-file ``{name}.json``.
+        """
+        meta_path = self._path(".meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path, "rb") as f:
+                data = orjson.loads(f.read())
+            self._apply_meta(data)
             
-        with open(path) as f:
-            data = json.load(f)
+            columns = self._map_columns()
+            if columns is not None:
+                self._set_columns(columns)
+                return
+            records = self._read_trials(self._path(".trials.jsonl"))
+        else:
+            path = self._path(".json")
+            if not os.path.exists(path):
+                return
+            with open(path, "rb") as f:
+                data = orjson.loads(f.read())
+            self._apply_meta(data)
+            records = data["trials"]
+            
+        self._set_trials(self._decode_trials(records))
+        self._mark_columns_stale()
+    
+    def _apply_meta(self, data: Dict[str, Any]):
+        """Set the description, metrics and variants from loaded data."""
+        self.description = data.get("description", self.description)
+        self.metrics = data.get("metrics", self.metrics)
             
         # Load variants
         self.variants = {
@@ -270,15 +748,108 @@ class Experiment:
             )
             for id, v in data["variants"].items()
         }
+    
+    def _decode_trials(self, records: List[Dict[str, Any]]) -> List[Trial]:
+        """Build Trial objects from trial records.
         
-        # Load trials
-        self.trials = [
+        Variant codes index the variants in file order, and resolving them
+        shares one ID string per variant across trials.
+        """
+        variant_ids = list(self.variants)
+        timestamps = self._parse_timestamps([t["timestamp"] for t in records])
+        return [
             Trial(
                 id=t["id"],
-                variant_id=t["variant_id"],
-                timestamp=datetime.datetime.fromisoformat(t["timestamp"]),
+                variant_id=variant_ids[t["vc"]] if "vc" in t else t["variant_id"],
+                timestamp=timestamp,
                 metrics=t["metrics"],
                 metadata=t["metadata"]
             )
-            for t in data["trials"]
-        ] 
\ No newline at end of file
+            for t, timestamp in zip(records, timestamps)
+        ]
+    
+    def _set_trials(self, trials: List[Trial]):
+        """Replace all trials, rebuilding the columnar store from them."""
+        self._trials = trials
+        self._variant_ids = []
+        self._variant_index = {}
+        self._trials_by_variant = {}
+        self._reset_trial_arrays()
+        for variant_id in self.variants:
+            self._index_variant(variant_id)
+        for trial in trials:
+            self._append_trial_row(trial, update_stats=False)
+        self._rebuild_running_stats()
+    
+    def _set_columns(self, columns: np.ndarray):
+        """Use memory-mapped columns file records as the columnar store.
+        
+        Trial objects and the per-variant row lists are built on demand.
+        """
+        self._trials = None
+        self._variant_ids = []
+        self._variant_index = {}
+        self._reset_trial_arrays()
+        self._trials_by_variant = None
+        for variant_id in self.variants:
+            self._index_variant(variant_id)
+        self._n_trials = len(columns)
+        self._codes = columns["code"]
+        self._timestamps = columns["timestamp"]
+        self._metrics_buf = columns["metrics"]
+        self._rebuild_running_stats()
+    
+    def _map_columns(self) -> Optional[np.ndarray]:
+        """Memory-map the columns file if it matches the trial log.
+        
+        Returns:
+            The columns file's records, or None if the file is missing or
+            does not hold exactly one record per logged trial
+        """
+        path = self._path(".columns.bin")
+        dtype = _columns_dtype(len(self.metrics))
+        try:
+            size = os.path.getsize(path)
+        except FileNotFoundError:
+            return None
+            
+        trials_path = self._path(".trials.jsonl")
+        n_logged = count_lines(trials_path) if os.path.exists(trials_path) else 0
+        if size % dtype.itemsize or size // dtype.itemsize != n_logged:
+            return None
+        if not size:
+            return np.empty(0, dtype=dtype)
+        return np.asarray(np.memmap(path, dtype=dtype, mode="r"))
+    
+    @staticmethod
+    def _parse_timestamps(values: List[str]) -> List[datetime.datetime]:
+        """Parse ISO 8601 timestamps in bulk.
+        
+        Falls back to parsing one at a time for inputs pandas cannot combine
+        into a single array, such as mixed UTC offsets.
+        """
+        try:
+            return list(pd.to_datetime(values, format="ISO8601").to_pydatetime())
+        except ValueError:
+            return [datetime.datetime.fromisoformat(v) for v in values]
+    
+    @staticmethod
+    def _read_trials(path: str) -> List[Dict[str, Any]]:
+        """Read trial records from a JSONL trial log.
+        
+        A truncated final line, left by a writer that did not exit cleanly,
+        is ignored.
+        """
+        if not os.path.exists(path):
+            return []
+            
+        trials = []
+        with open(path, "rb", buffering=_TRIALS_BUFFER_SIZE) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    trials.append(orjson.loads(line))
+                except orjson.JSONDecodeError:
+                    continue
+        return trials
@@ -1,13 +1,27 @@
 """Human feedback collection and management for article evaluation."""
 
 import os
-import json
+import sys
 import uuid
+import math
+import time
+import random
+import itertools
 import datetime
-from typing import Dict, List, Optional, Any, Union
-from dataclasses import dataclass
+from collections import deque
+from typing import Any, BinaryIO, Deque, Dict, FrozenSet, Iterator, List, Optional, Set, Tuple, Union
+from dataclasses import dataclass, field, fields
 
-@dataclass
+import numpy as np
+import orjson
+import pandas as pd
+
+from .storage import atomic_write, drop_partial_line
+
+# dataclass(slots=...) needs Python 3.10+
+_DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+@dataclass(**_DATACLASS_SLOTS)
 class FeedbackCriteria:
     """Defines a feedback criterion."""
     id: str
@@ -15,8 +29,18 @@ class FeedbackCriteria:
     description: str
     scale: List[Dict[str, str]]  # List of {value: description} pairs
     weight: float = 1.0
+    # Ratings allowed by the scale, derived once so validation is a lookup
+    valid_values: FrozenSet[int] = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        self.valid_values = frozenset(
+            int(value)
+            for entry in self.scale
+            # Entries are {value: description} pairs or bare values
+            for value in (entry.keys() if isinstance(entry, dict) else (entry,))
+        )
 
-@dataclass
+@dataclass(**_DATACLASS_SLOTS)
 class FeedbackResponse:
     """Represents a human feedback response."""
     id: str
@@ -27,21 +51,111 @@ class FeedbackResponse:
     comments: str
     metadata: Dict[str, Any]
 
+@dataclass(**_DATACLASS_SLOTS)
+class _Agg:
+    """Running aggregate of ratings, updated one rating at a time."""
+    count: int = 0
+    total: int = 0
+    m2: float = 0.0  # Sum of squared deviations from the mean (Welford)
+    min: Optional[int] = None
+    max: Optional[int] = None
+    
+    def add(self, value: int):
+        """Fold one rating into the aggregate."""
+        old_mean = self.total / self.count if self.count else 0.0
+        self.count += 1
+        self.total += value
+        self.m2 += (value - old_mean) * (value - self.total / self.count)
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+    
+    @property
+    def mean(self) -> float:
+        return self.total / self.count
+    
+    @property
+    def std(self) -> float:
+        """Sample standard deviation, 0.0 for a single rating."""
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
 class FeedbackManager:
     """Manages human feedback collection and analysis."""
     
-    def __init__(self, feedback_dir: Optional[str] = None):
+    def __init__(
+        self,
+        feedback_dir: Optional[str] = None,
+        uuid_ids: bool = False,
+        max_in_memory_responses: Optional[int] = None,
+        sample_size: int = 1000
+    ):
         """Initialize the feedback manager.
         
         Args:
             feedback_dir: Directory to store feedback data (default: ./feedback)
+            uuid_ids: Mint RFC 4122 UUIDs instead of the cheaper time-ordered
+                IDs (default: False)
+            max_in_memory_responses: Keep only this many of the most recent
+                responses in memory; scores and stats still cover all of them
+                (default: keep every response)
+            sample_size: Size of the uniform random sample of all responses
+                returned by get_response_sample (default: 1000)
+            
+        Raises:
+            ValueError: If max_in_memory_responses is less than 1
         """
+        if max_in_memory_responses is not None and max_in_memory_responses < 1:
+            raise ValueError("max_in_memory_responses must be at least 1")
         self.feedback_dir = feedback_dir or os.path.join(os.getcwd(), "feedback")
+        self.uuid_ids = uuid_ids
+        self.max_in_memory_responses = max_in_memory_responses
+        self.sample_size = sample_size
+        self._id_counter = itertools.count()
         self.criteria: Dict[str, FeedbackCriteria] = {}
-        self.responses: List[FeedbackResponse] = []
+        self.responses: Union[List[FeedbackResponse], Deque[FeedbackResponse]] = (
+            [] if max_in_memory_responses is None
+            else deque(maxlen=max_in_memory_responses)
+        )
+        
+        # Reservoir sample (Algorithm R) over every response recorded, which
+        # stays uniform when old responses are dropped from memory
+        self._sample: List[FeedbackResponse] = []
+        self._total_responses = 0
+        
+        # Running aggregates over all responses, so scores and stats need no
+        # scan and are unaffected by dropping responses from memory: per
+        # article and criterion, per criterion, the articles and evaluators
+        # seen, plus the response time range
+        self._article_agg: Dict[str, Dict[str, _Agg]] = {}
+        self._criterion_agg: Dict[str, _Agg] = {}
+        self._article_ids: Set[str] = set()
+        self._evaluator_ids: Set[str] = set()
+        self._min_ts: Optional[datetime.datetime] = None
+        self._max_ts: Optional[datetime.datetime] = None
+        
+        # Article scores computed since the article last got feedback or the
+        # criteria last changed
+        self._score_cache: Dict[str, Dict[str, float]] = {}
+        
+        # In-memory responses indexed by article and by evaluator
+        self._by_article: Dict[str, Deque[FeedbackResponse]] = {}
+        self._by_evaluator: Dict[str, Deque[FeedbackResponse]] = {}
+        
+        # Responses are appended to an unbuffered JSONL log, one write per
+        # response, opened on the first write; a legacy feedback_data.json
+        # is migrated at that point
+        self._responses_fh: Optional[BinaryIO] = None
+        self._legacy = False
+        
+        # Derived from criteria and refreshed by _criteria_changed: the IDs
+        # every response must rate, the criteria as a tuple, and their
+        # total weight
+        self._criteria_keys: FrozenSet[str] = frozenset()
+        self._criteria_items: Tuple[Tuple[str, FeedbackCriteria], ...] = ()
+        self._total_weight = 0.0
         
         # Create feedback directory if it doesn't exist
-        os.makedirs(self.feedback_dir, exist_ok=True)
+        if not os.path.isdir(self.feedback_dir):
+            os.makedirs(self.feedback_dir, exist_ok=True)
         
         # Load existing data
         self._load_feedback_data()
@@ -64,7 +178,7 @@ class FeedbackManager:
         Returns:
             The criterion ID
         """
-        criterion_id = str(uuid.uuid4())
+        criterion_id = self._new_id("crit")
         criterion = FeedbackCriteria(
             id=criterion_id,
             name=name,
@@ -73,7 +187,8 @@ class FeedbackManager:
             weight=weight
         )
         self.criteria[criterion_id] = criterion
-        self._save_feedback_data()
+        self._criteria_changed()
+        self._save_criteria()
         return criterion_id
     
     def record_feedback(
@@ -97,22 +212,21 @@ class FeedbackManager:
             The feedback response ID
         """
         # Validate ratings
-        missing_criteria = set(self.criteria.keys()) - set(ratings.keys())
+        missing_criteria = self._criteria_keys - ratings.keys()
         if missing_criteria:
             raise ValueError(f"Missing ratings for criteria: {missing_criteria}")
             
         # Validate rating values
         for criterion_id, rating in ratings.items():
             criterion = self.criteria[criterion_id]
-            valid_values = [int(v) for v in criterion.scale]
-            if rating not in valid_values:
+            if rating not in criterion.valid_values:
                 raise ValueError(
                     f"Invalid rating {rating} for criterion {criterion.name}. "
-                    f"Must be one of: {valid_values}"
+                    f"Must be one of: {sorted(criterion.valid_values)}"
                 )
         
         response = FeedbackResponse(
-            id=str(uuid.uuid4()),
+            id=self._new_id("fb"),
             article_id=article_id,
             evaluator_id=evaluator_id,
             timestamp=datetime.datetime.now(),
@@ -120,12 +234,18 @@ class FeedbackManager:
             comments=comments,
             metadata=metadata or {}
         )
-        self.responses.append(response)
-        self._save_feedback_data()
+        # Open the log first: migrating a legacy file writes out the
+        # responses held in memory, which must not include this one yet
+        fh = self._open_responses()
+        # Encode before updating the aggregates, so a response that cannot
+        # be serialized is rejected without being counted
+        line = self._encode_response(response)
+        self._add_response(response)
+        fh.write(line)
         return response.id
     
     def get_article_feedback(self, article_id: str) -> List[FeedbackResponse]:
-        """Get all feedback responses for an article.
+        """Get all feedback responses for an article held in memory.
         
         Args:
             article_id: ID of the article
@@ -133,10 +253,10 @@ class FeedbackManager:
         Returns:
             List of feedback responses
         """
-        return [r for r in self.responses if r.article_id == article_id]
+        return list(self._by_article.get(article_id, ()))
     
     def get_evaluator_feedback(self, evaluator_id: str) -> List[FeedbackResponse]:
-        """Get all feedback responses from an evaluator.
+        """Get all feedback responses from an evaluator held in memory.
         
         Args:
             evaluator_id: ID of the evaluator
@@ -144,43 +264,103 @@ class FeedbackManager:
         Returns:
             List of feedback responses
         """
-        return [r for r in self.responses if r.evaluator_id == evaluator_id]
+        return list(self._by_evaluator.get(evaluator_id, ()))
+    
+    def get_response_sample(self) -> List[FeedbackResponse]:
+        """Get a uniform random sample of all responses ever recorded.
+        
+        Unlike self.responses, the sample is not limited to the most recent
+        responses when max_in_memory_responses is set.
+        
+        Returns:
+            Up to sample_size feedback responses
+        """
+        return list(self._sample)
     
     def calculate_article_score(self, article_id: str) -> Dict[str, float]:
         """Calculate weighted average scores for an article.
         
+        Scores are cached until the article receives feedback or a criterion
+        is added, so callers should treat the returned dictionary as
+        read-only.
+        
         Args:
             article_id: ID of the article
             
         Returns:
             Dictionary containing average scores per criterion and overall score
         """
-        responses = self.get_article_feedback(article_id)
-        if not responses:
+        cached = self._score_cache.get(article_id)
+        if cached is not None:
+            return cached
+            
+        article_agg = self._article_agg.get(article_id)
+        if not article_agg:
             return {}
             
         scores = {}
-        total_weight = sum(c.weight for c in self.criteria.values())
-        
-        # Calculate average per criterion
-        for criterion_id, criterion in self.criteria.items():
-            criterion_ratings = [
-                r.ratings[criterion_id] 
-                for r in responses 
-                if criterion_id in r.ratings
-            ]
-            if criterion_ratings:
-                scores[criterion.name] = sum(criterion_ratings) / len(criterion_ratings)
-        
-        # Calculate weighted overall score
+        weighted_sum = 0.0
+        
+        # Calculate average per criterion, and the weighted overall score
+        for criterion_id, criterion in self._criteria_items:
+            agg = article_agg.get(criterion_id)
+            if agg:
+                scores[criterion.name] = agg.mean
+                weighted_sum += agg.mean * criterion.weight
         if scores:
-            weighted_sum = sum(
-                scores[c.name] * c.weight 
-                for c in self.criteria.values() 
-                if c.name in scores
-            )
-            scores["overall"] = weighted_sum / total_weight
+            scores["overall"] = weighted_sum / self._total_weight
+        
+        self._score_cache[article_id] = scores
+        return scores
+    
+    def calculate_all_scores(self, article_ids: Optional[List[str]] = None) -> pd.DataFrame:
+        """Calculate weighted average scores for many articles at once.
+        
+        Matches calculate_article_score for each article, reading the same
+        running aggregates, but weights all articles in one array operation.
+        
+        Args:
+            article_ids: Articles to score, in order (default: every article
+                with feedback, in the order first seen). Articles without
+                feedback are omitted.
+            
+        Returns:
+            DataFrame indexed by article ID with one column of average
+            ratings per criterion name, NaN where an article has no ratings
+            for it, plus the weighted "overall" score
+        """
+        if article_ids is None:
+            article_ids = list(self._article_agg)
+        else:
+            article_ids = [a for a in article_ids if self._article_agg.get(a)]
+        if not article_ids or not self._criteria_items:
+            return pd.DataFrame()
+            
+        criterion_ids = [cid for cid, _ in self._criteria_items]
+        nan = float("nan")
+        means = np.fromiter(
+            (
+                agg.mean if agg else nan
+                for article_id in article_ids
+                for agg in map(self._article_agg[article_id].get, criterion_ids)
+            ),
+            dtype=np.float64,
+            count=len(article_ids) * len(criterion_ids)
+        ).reshape(len(article_ids), len(criterion_ids))
+        weights = np.array([c.weight for _, c in self._criteria_items])
         
+        # Criteria without ratings for an article are left out of the weighted
+        # sum, but the total weight still includes them
+        rated = ~np.isnan(means)
+        overall = np.where(rated, means, 0.0) @ weights / self._total_weight
+        overall[~rated.any(axis=1)] = nan
+        
+        scores = pd.DataFrame(
+            means,
+            index=pd.Index(article_ids, name="article_id"),
+            columns=[c.name for _, c in self._criteria_items]
+        )
+        scores["overall"] = overall
         return scores
     
     def get_feedback_stats(self) -> Dict[str, Any]:
@@ -189,77 +369,191 @@ class FeedbackManager:
         Returns:
             Dictionary containing feedback statistics
         """
-        if not self.responses:
+        if not self._total_responses:
             return {}
             
         stats = {
-            "total_responses": len(self.responses),
-            "unique_articles": len({r.article_id for r in self.responses}),
-            "unique_evaluators": len({r.evaluator_id for r in self.responses}),
+            "total_responses": self._total_responses,
+            "unique_articles": len(self._article_ids),
+            "unique_evaluators": len(self._evaluator_ids),
             "criteria_stats": {},
             "time_range": {
-                "start": min(r.timestamp for r in self.responses),
-                "end": max(r.timestamp for r in self.responses)
+                "start": self._min_ts,
+                "end": self._max_ts
             }
         }
         
         # Calculate stats per criterion
-        for criterion_id, criterion in self.criteria.items():
-            all_ratings = [
-                r.ratings[criterion_id] 
-                for r in self.responses 
-                if criterion_id in r.ratings
-            ]
-            if all_ratings:
+        for criterion_id, criterion in self._criteria_items:
+            agg = self._criterion_agg.get(criterion_id)
+            if agg:
                 stats["criteria_stats"][criterion.name] = {
-                    "count": len(all_ratings),
-                    "mean": sum(all_ratings) / len(all_ratings),
-                    "min": min(all_ratings),
-                    "max": max(all_ratings)
+                    "count": agg.count,
+                    "mean": agg.mean,
+                    "std": agg.std,
+                    "min": agg.min,
+                    "max": agg.max
                 }
         
         return stats
     
-    def _save_feedback_data(self):
-        """Save feedback data to disk."""
+    def close(self):
+        """Close the response log."""
+        if self._responses_fh is not None:
+            self._responses_fh.close()
+            self._responses_fh = None
+    
+    def __enter__(self) -> "FeedbackManager":
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def _criteria_changed(self):
+        """Refresh the state derived from criteria and drop cached scores."""
+        self._criteria_keys = frozenset(self.criteria)
+        self._criteria_items = tuple(self.criteria.items())
+        self._total_weight = sum(c.weight for _, c in self._criteria_items)
+        self._score_cache.clear()
+    
+    def _add_response(self, response: FeedbackResponse):
+        """Keep a response in memory and fold it into the aggregates."""
+        if len(self.responses) == self.max_in_memory_responses:
+            # Drop the oldest response, which is also the oldest of its
+            # article and of its evaluator
+            evicted = self.responses[0]
+            for index, key in (
+                (self._by_article, evicted.article_id),
+                (self._by_evaluator, evicted.evaluator_id)
+            ):
+                index[key].popleft()
+                if not index[key]:
+                    del index[key]
+        self.responses.append(response)
+        
+        self._total_responses += 1
+        if len(self._sample) < self.sample_size:
+            self._sample.append(response)
+        else:
+            slot = random.randrange(self._total_responses)
+            if slot < self.sample_size:
+                self._sample[slot] = response
+        
+        self._aggregate(response)
+    
+    def _aggregate(self, response: FeedbackResponse):
+        """Fold a response into the running aggregates and lookup indexes."""
+        self._by_article.setdefault(response.article_id, deque()).append(response)
+        self._by_evaluator.setdefault(response.evaluator_id, deque()).append(response)
+        
+        self._article_ids.add(response.article_id)
+        self._evaluator_ids.add(response.evaluator_id)
+        
+        self._score_cache.pop(response.article_id, None)
+        article_agg = self._article_agg.setdefault(response.article_id, {})
+        for criterion_id, rating in response.ratings.items():
+            article_agg.setdefault(criterion_id, _Agg()).add(rating)
+            self._criterion_agg.setdefault(criterion_id, _Agg()).add(rating)
+        
+        if self._min_ts is None or response.timestamp < self._min_ts:
+            self._min_ts = response.timestamp
+        if self._max_ts is None or response.timestamp > self._max_ts:
+            self._max_ts = response.timestamp
+    
+    def _new_id(self, prefix: str) -> str:
+        """Mint an ID unique within this feedback store.
+        
+        The nanosecond clock keeps IDs distinct across sessions and the
+        counter within one.
+        """
+        if self.uuid_ids:
+            return str(uuid.uuid4())
+        return f"{prefix}-{time.time_ns():x}-{next(self._id_counter):x}"
+    
+    def _path(self, filename: str) -> str:
+        return os.path.join(self.feedback_dir, filename)
+    
+    @staticmethod
+    def _encode_response(response: FeedbackResponse) -> bytes:
+        """Encode a response as one JSONL line.
+        
+        orjson serializes the dataclass fields directly, with the timestamp
+        in ISO format and numpy values as plain numbers.
+        """
+        return orjson.dumps(
+            response,
+            option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
+    
+    def _migrate_legacy(self):
+        """Move data loaded from feedback_data.json over to the split layout.
+        
+        Responses are copied from the file rather than from memory, which
+        may no longer hold all of them.
+        """
+        self._legacy = False
+        self._save_criteria()
+        with open(self._path("feedback_data.json"), "rb") as f:
+            records = orjson.loads(f.read())["responses"]
+        atomic_write(self._path("responses.jsonl"), b"".join(
+            orjson.dumps(r, option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS)
+            for r in records
+        ))
+    
+    def _save_criteria(self):
+        """Save criteria to disk; they are small and rewritten whole."""
+        if self._legacy:
+            self._migrate_legacy()
+            return
+            
+        # Only constructor fields are stored; valid_values is derived
+        saved = [f.name for f in fields(FeedbackCriteria) if f.init]
         data = {
-            "criteria": {
-                cid: {
-                    "id": c.id,
-                    "name": c.name,
-                    "description": c.description,
-                    "scale": c.scale,
-                    "weight": c.weight
-                }
-                for cid, c in self.criteria.items()
-            },
-            "responses": [
-                {
-                    "id": r.id,
-                    "article_id": r.article_id,
-                    "evaluator_id": r.evaluator_id,
-                    "timestamp": r.timestamp.isoformat(),
-                    "ratings": r.ratings,
-                    "comments": r.comments,
-                    "metadata": r.metadata
-                }
-                for r in self.responses
-            ]
+            cid: {name: getattr(c, name) for name in saved}
+            for cid, c in self.criteria.items()
         }
-        
-        path = os.path.join(self.feedback_dir, "feedback_data.json")
-        with open(path, "w") as f:
-            json.dump(data, f, indent=2)
+        atomic_write(
+            self._path("criteria.json"),
+            orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        )
+    
+    def _open_responses(self) -> BinaryIO:
+        """Return the response log, opening it for appending if needed."""
+        if self._responses_fh is None:
+            path = self._path("responses.jsonl")
+            if self._legacy:
+                self._migrate_legacy()
+            else:
+                drop_partial_line(path)
+            self._responses_fh = open(path, "ab", buffering=0)
+        return self._responses_fh
     
     def _load_feedback_data(self):
-        """Load feedback data from disk."""
-        path = os.path.join(self.feedback_dir, "feedback_data.json")
-        if not os.path.exists(path):
+        """Load feedback data from disk.
+        
+        Reads criteria.json and responses.jsonl, falling back to the older
+        single feedback_data.json. A truncated final response line, left by
+        a writer that did not exit cleanly, is ignored.
+        """
+        criteria_path = self._path("criteria.json")
+        responses_path = self._path("responses.jsonl")
+        legacy_path = self._path("feedback_data.json")
+        
+        if os.path.exists(criteria_path) or os.path.exists(responses_path):
+            criteria = {}
+            if os.path.exists(criteria_path):
+                with open(criteria_path, "rb") as f:
+                    criteria = orjson.loads(f.read())
+            responses = self._read_response_log(responses_path)
+        elif os.path.exists(legacy_path):
+            with open(legacy_path, "rb") as f:
+                data = orjson.loads(f.read())
+            criteria = data["criteria"]
+            responses = data["responses"]
+            self._legacy = True
+        else:
             return
             
-        with open(path) as f:
-            data = json.load(f)
-            
         # Load criteria
         self.criteria = {
             cid: FeedbackCriteria(
@@ -269,12 +563,25 @@ class FeedbackManager:
                 scale=c["scale"],
                 weight=c["weight"]
             )
-            for cid, c in data["criteria"].items()
+            for cid, c in criteria.items()
         }
+        self._criteria_changed()
         
-        # Load responses
-        self.responses = [
-            FeedbackResponse(
+        # Load responses one at a time, rebuilding the running aggregates,
+        # indexes and sample as they stream in
+        self.responses.clear()
+        self._sample = []
+        self._total_responses = 0
+        self._article_agg = {}
+        self._criterion_agg = {}
+        self._article_ids = set()
+        self._evaluator_ids = set()
+        self._min_ts = None
+        self._max_ts = None
+        self._by_article = {}
+        self._by_evaluator = {}
+        for r in responses:
+            self._add_response(FeedbackResponse(
                 id=r["id"],
                 article_id=r["article_id"],
                 evaluator_id=r["evaluator_id"],
@@ -282,6 +589,18 @@ class FeedbackManager:
                 ratings=r["ratings"],
                 comments=r["comments"],
                 metadata=r["metadata"]
-            )
-            for r in data["responses"]
-        ] 
\ No newline at end of file
+            ))
+    
+    @staticmethod
+    def _read_response_log(path: str) -> Iterator[Dict[str, Any]]:
+        """Stream response records from a JSONL log, skipping malformed lines."""
+        if not os.path.exists(path):
+            return
+        with open(path, "rb") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    yield orjson.loads(line)
+                except orjson.JSONDecodeError:
+                    continue
@@ -0,0 +1,48 @@
+"""File helpers shared by the experiment and feedback stores."""
+
+import os
+
+# Buffer for whole-file rewrites and line scans
+WRITE_BUFFER_SIZE = 256 * 1024
+
+def atomic_write(path: str, data: bytes):
+    """Replace a file's contents without ever leaving it half-written.
+    
+    The data goes to a temporary file next to the target, which is then
+    renamed over it.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb", buffering=WRITE_BUFFER_SIZE) as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def drop_partial_line(path: str):
+    """Cut off a final line left unterminated by an interrupted write.
+    
+    Call before reopening an append-only log; otherwise the next appended
+    record would be glued onto the fragment and lost.
+    """
+    try:
+        f = open(path, "r+b")
+    except FileNotFoundError:
+        return
+    with f:
+        pos = f.seek(0, os.SEEK_END)
+        while pos > 0:
+            step = min(WRITE_BUFFER_SIZE, pos)
+            pos -= step
+            f.seek(pos)
+            chunk = f.read(step)
+            end = chunk.rfind(b"\n")
+            if end != -1:
+                f.truncate(pos + end + 1)
+                return
+        f.truncate(0)
+
+def count_lines(path: str) -> int:
+    """Count complete lines in a file without parsing them."""
+    count = 0
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(WRITE_BUFFER_SIZE), b""):
+            count += chunk.count(b"\n")
+    return count
@@ -1,12 +1,13 @@
 """Image generation using Flux Pro API."""
 
 import os
-from typing import Dict, Optional
+import asyncio
+from typing import Dict, List, Optional
 
 import fal_client
-from dotenv import load_dotenv
 
-load_dotenv()
+# Leading characters of an article that go into its image prompt
+PROMPT_CONTENT_CHARS = 500
 
 class ImageGenerator:
     def __init__(self):
@@ -33,24 +34,48 @@ class ImageGenerator:
         if seed is not None:
             arguments["seed"] = seed
             
-        # Create a handler for the request
-        handler = fal_client.submit(
+        # fal_client's calls block, so run them in a worker thread to keep
+        # the event loop free for other requests while the job runs
+        handler = await asyncio.to_thread(
+            fal_client.submit,
             "fal-ai/flux-pro/v1.1-ultra",
             arguments=arguments
         )
         
         # Wait for the result
-        result = fal_client.result("fal-ai/flux-pro/v1.1-ultra", handler.request_id)
+        result = await asyncio.to_thread(
+            fal_client.result, "fal-ai/flux-pro/v1.1-ultra", handler.request_id
+        )
         
         return {
             "prompt": prompt,
             "images": [img["url"] for img in result["images"]],
         }
+    
+    async def generate_images(
+        self,
+        prompts: List[str],
+        aspect_ratio: str = "16:9",
+        num_images: int = 3,
+        seed: Optional[int] = None,
+    ) -> List[Dict[str, str]]:
+        """Generate images for several prompts concurrently.
+        
+        Returns one generate_image result per prompt, in prompt order.
+        """
+        return await asyncio.gather(*(
+            self.generate_image(prompt, aspect_ratio, num_images, seed)
+            for prompt in prompts
+        ))
             
+    def _create_topic_image_prompt(self, topic: str, keywords: List[str]) -> str:
+        """Create an image prompt from an article's topic and keywords alone."""
+        return self._create_image_prompt(f"{topic}\nKeywords: {', '.join(keywords)}")
+    
     def _create_image_prompt(self, article_content: str) -> str:
         """Create an optimized prompt for image generation based on article content."""
         return f"""Create a professional, high-quality image that represents the following article content, set in Coatzacoalcos, Mexico:
-{article_content[:500]}...
+{article_content[:PROMPT_CONTENT_CHARS]}...
 
 Visual Style Requirements:
 - Professional and modern business look
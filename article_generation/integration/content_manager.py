@@ -1,67 +1,153 @@
 """Content manager for integrating article and image generation."""
 
 import os
-from typing import Dict, List, Optional
+import asyncio
+from typing import Dict, List, Optional, Tuple
 
 from ..llm.generator import ArticleGenerator
-from ..image_gen.generator import ImageGenerator
+from ..image_gen.generator import ImageGenerator, PROMPT_CONTENT_CHARS
 
 class ContentManager:
-    def __init__(self):
+    def __init__(self, base_path: Optional[str] = None):
         self.article_generator = ArticleGenerator()
         self.image_generator = ImageGenerator()
         
+        # Output directories used by save_content, resolved once
+        self.base_path = base_path or os.getcwd()
+        self._articles_dir, self._images_dir = self._output_dirs(self.base_path)
+        
     async def generate_content(
         self,
         topic: str,
         keywords: List[str],
         num_images: int = 1,
         aspect_ratio: str = "16:9",
+        image_from_article: bool = True,
     ) -> Dict:
-        """Generate a complete article with associated images."""
-        # Generate the article
-        article = await self.article_generator.generate_article(topic, keywords)
+        """Generate a complete article with associated images.
+        
+        The image prompt only uses the start of the article, so image
+        generation begins as soon as that much has streamed in and runs
+        alongside the rest of the article and its evaluation. With
+        ``image_from_article=False`` the prompt is built from the topic and
+        keywords instead, and both jobs start at once.
+        """
+        if not image_from_article:
+            article, images = await asyncio.gather(
+                self.article_generator.generate_article(topic, keywords),
+                self.image_generator.generate_image(
+                    prompt=self.image_generator._create_topic_image_prompt(topic, keywords),
+                    aspect_ratio=aspect_ratio,
+                    num_images=num_images
+                )
+            )
+            return {
+                "article": article,
+                "images": images["images"],
+            }
         
-        # Generate image based on article content
-        image_prompt = self.image_generator._create_image_prompt(article["content"])
-        images = await self.image_generator.generate_image(
-            prompt=image_prompt,
-            aspect_ratio=aspect_ratio,
-            num_images=num_images
-        )
+        prefix = asyncio.get_running_loop().create_future()
+        
+        def on_prefix(text: str):
+            if not prefix.done():
+                prefix.set_result(text)
+        
+        # Generate the article
+        article_task = asyncio.create_task(self.article_generator.generate_article(
+            topic,
+            keywords,
+            on_prefix=on_prefix,
+            prefix_chars=PROMPT_CONTENT_CHARS
+        ))
+        try:
+            await asyncio.wait({prefix, article_task}, return_when=asyncio.FIRST_COMPLETED)
+            if not prefix.done():
+                # The article finished, or failed, without reporting a prefix
+                prefix.set_result(article_task.result()["content"])
+            
+            # Generate image based on article content
+            image_prompt = self.image_generator._create_image_prompt(prefix.result())
+            article, images = await asyncio.gather(
+                article_task,
+                self.image_generator.generate_image(
+                    prompt=image_prompt,
+                    aspect_ratio=aspect_ratio,
+                    num_images=num_images
+                )
+            )
+        finally:
+            article_task.cancel()
         
         return {
             "article": article,
             "images": images["images"],
         }
+    
+    async def generate_batch(
+        self,
+        topics: List[Tuple[str, List[str]]],
+        num_images: int = 1,
+        aspect_ratio: str = "16:9",
+        image_from_article: bool = True,
+    ) -> List[Dict]:
+        """Generate content for several (topic, keywords) pairs concurrently.
+        
+        The article and image requests are network-bound, so running them
+        side by side makes the batch take about as long as its slowest item.
+        Results are returned in the order of ``topics``.
+        """
+        return await asyncio.gather(*(
+            self.generate_content(topic, keywords, num_images, aspect_ratio, image_from_article)
+            for topic, keywords in topics
+        ))
         
     def save_content(
         self,
         content: Dict,
         base_path: Optional[str] = None
     ) -> Dict[str, str]:
-        """Save the generated content to disk."""
-        base_path = base_path or os.getcwd()
-        articles_path = os.path.join(base_path, "generated_articles")
-        images_path = os.path.join(base_path, "generated_images")
+        """Save the generated content to disk.
         
-        # Create directories if they don't exist
-        os.makedirs(articles_path, exist_ok=True)
-        os.makedirs(images_path, exist_ok=True)
+        Files go under the manager's base path unless ``base_path`` is given.
+        """
+        if base_path is None:
+            articles_dir, images_dir = self._articles_dir, self._images_dir
+        else:
+            articles_dir, images_dir = self._output_dirs(base_path)
+        slug = content['article']['title'].lower().replace(' ', '_')
         
         # Save article
-        article_filename = f"{content['article']['title'].lower().replace(' ', '_')}.md"
-        article_path = os.path.join(articles_path, article_filename)
-        with open(article_path, "w") as f:
+        article_path = os.path.join(articles_dir, f"{slug}.md")
+        with open(article_path, "w", encoding="utf-8") as f:
             f.write(content["article"]["content"])
             
         # Save image URLs (actual image download could be implemented if needed)
-        images_filename = f"{content['article']['title'].lower().replace(' ', '_')}_images.txt"
-        images_path = os.path.join(images_path, images_filename)
-        with open(images_path, "w") as f:
+        images_path = os.path.join(images_dir, f"{slug}_images.txt")
+        with open(images_path, "w", encoding="utf-8") as f:
             f.write("\n".join(content["images"]))
             
         return {
             "article_path": article_path,
             "images_path": images_path,
-        } 
\ No newline at end of file
+        }
+    
+    async def save_content_async(
+        self,
+        content: Dict,
+        base_path: Optional[str] = None
+    ) -> Dict[str, str]:
+        """Save the generated content to disk without blocking the event loop.
+        
+        Runs save_content in a worker thread, so other generations keep
+        running while the files are written.
+        """
+        return await asyncio.to_thread(self.save_content, content, base_path)
+    
+    @staticmethod
+    def _output_dirs(base_path: str) -> Tuple[str, str]:
+        """Resolve and create the article and image directories under a base path."""
+        articles_dir = os.path.join(base_path, "generated_articles")
+        images_dir = os.path.join(base_path, "generated_images")
+        os.makedirs(articles_dir, exist_ok=True)
+        os.makedirs(images_dir, exist_ok=True)
+        return articles_dir, images_dir
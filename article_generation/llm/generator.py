@@ -1,17 +1,119 @@
 """Article generation using Anthropic's Claude."""
 
 import os
-from typing import Dict, List, Optional
+import time
+import asyncio
+import hashlib
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set, Tuple
 from anthropic import AsyncAnthropic
-from dotenv import load_dotenv
+import orjson
 import logging
 
 from ..evaluation.trace_logger import TraceLogger
-from ..evaluation.evaluator import ArticleEvaluator
+from ..evaluation.evaluator import (
+    ArticleEvaluator,
+    _MAX_RETRIES,
+    _get_api_semaphore,
+    _get_http_client
+)
 
-load_dotenv()
 logger = logging.getLogger(__name__)
 
+_SYSTEM_PROMPT = "You are an expert SEO content writer specializing in creating high-quality, engaging articles."
+
+# Instructions shared by every default SEO prompt. They come first and never
+# vary, so the API can cache them as a prompt prefix; the article's title,
+# keywords and length follow after them.
+_SEO_PREAMBLE = """IMPORTANT: Generate an SEO-optimized article that MUST follow these EXACT formatting requirements.
+
+The article MUST start with the EXACT title given in the article details at the end of this prompt, as a level-1 markdown heading.
+
+Then, it MUST use these EXACT section headers in this EXACT order:
+1. ## Introduction
+2. ## Body Content
+3. ## Conclusion
+
+Any deviation from these exact headers will cause the article to be rejected.
+
+Regional Context:
+- Target audience: Residential and commercial clients in Coatzacoalcos and nearby cities (Minatitlán)
+- Consider the coastal environment (Gulf of Mexico) and its challenges
+- Address high humidity and corrosion issues common in the region
+- Reference local industrial infrastructure and petrochemical industry presence
+- Include regional business opportunities and service coverage area
+
+Required Content Structure:
+
+## Introduction
+- Hook readers in the first paragraph
+- Include primary keyword within first 100 words
+- Establish local context and relevance
+- Preview main points
+- At least 300 words
+
+## Body Content
+- Length: As given in the article details
+- Use H3 subheadings for subsections
+- Include the keywords from the article details naturally
+- Use short, scannable paragraphs (2-4 sentences)
+- Include relevant statistics and data when possible
+- Address specific regional challenges and solutions
+- At least 700 words
+
+## Conclusion
+- Summarize key points
+- Include clear call-to-action
+- Reinforce local expertise and service value
+- At least 200 words
+
+Format Requirements:
+- Use proper markdown formatting
+- The article MUST start with exactly '# ' followed by the title
+- Main sections MUST use exactly '## Introduction', '## Body Content', and '## Conclusion'
+- Use '### ' for subsections
+- Include at least 3 numbered lists
+- Include at least 10 bullet points
+
+Remember to:
+- Maintain a professional yet approachable tone
+- Focus on local relevance and specific regional challenges
+- Include practical examples relevant to the Gulf coast region
+- Address both residential and commercial service aspects
+- Emphasize expertise in dealing with coastal environmental challenges
+- Use natural language that resonates with local readers
+- Include location-specific details when relevant
+
+Do not include any YAML frontmatter, metadata, schema markup, or technical SEO elements in the output. Just provide the clean article content in markdown format."""
+
+# Default SEO prompt: the shared instructions, then the article's details.
+# Built once, so each request only fills in the placeholders.
+_SEO_PROMPT_TEMPLATE = _SEO_PREAMBLE + """
+
+Article details:
+- Title (use exactly): # %(title)s
+- Body Content length: Between %(min_length)s and %(max_length)s words
+- Keywords to include naturally: %(keywords_csv)s"""
+
+def _cache_usage(message) -> Dict[str, int]:
+    """Prompt cache token counts reported for a message, if any."""
+    usage = getattr(message, "usage", None)
+    counts = {}
+    for field in ("cache_creation_input_tokens", "cache_read_input_tokens"):
+        value = getattr(usage, field, None)
+        if isinstance(value, int):
+            counts[field] = value
+    return counts
+
+def _log_background_failure(task: asyncio.Task):
+    """Log the exception of a finished background task, if it raised."""
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(
+            "Background LLM evaluation failed: %s: %s",
+            type(task.exception()).__name__, task.exception(),
+            exc_info=task.exception()
+        )
+
 class ArticleGenerator:
     def __init__(self, api_key: Optional[str] = None):
         """Initialize the ArticleGenerator.
@@ -23,14 +125,33 @@ class ArticleGenerator:
         if not self.api_key:
             raise ValueError("API key must be provided either directly or via ANTHROPIC_API_KEY environment variable")
             
-        self.client = AsyncAnthropic(api_key=self.api_key)
+        # Share the evaluator's pooled HTTP client, so generation and
+        # evaluation requests reuse the same keep-alive connections
+        self.client = AsyncAnthropic(
+            api_key=self.api_key,
+            http_client=_get_http_client(),
+            max_retries=_MAX_RETRIES
+        )
         self.model = os.getenv("ANTHROPIC_MODEL", "claude-3-opus-20240229")
         self.max_tokens = int(os.getenv("MAX_TOKENS", "4096"))
         self.temperature = float(os.getenv("TEMPERATURE", "0.7"))
+        self.min_length = int(os.getenv("MIN_ARTICLE_LENGTH", "1200"))
+        self.max_length = int(os.getenv("MAX_ARTICLE_LENGTH", "3000"))
+        
+        # Generated articles keyed by a hash of the request, so a repeated
+        # request (same title, keywords in any order and case, lengths and
+        # template) skips generation and evaluation; off unless
+        # ARTICLE_CACHE_SIZE is set. Entries expire after ARTICLE_CACHE_TTL
+        # seconds, or never if it is 0
+        self.cache_size = int(os.getenv("ARTICLE_CACHE_SIZE", "0"))
+        self.cache_ttl = float(os.getenv("ARTICLE_CACHE_TTL", "0"))
+        self._cache: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
         
         # Initialize evaluation tools
         self.trace_logger = TraceLogger()
         self.evaluator = ArticleEvaluator(api_key=self.api_key)
+        # LLM evaluations still running for results returned without them
+        self._pending_evaluations: Set[asyncio.Task] = set()
 
     async def generate_article(
         self,
@@ -39,6 +160,10 @@ class ArticleGenerator:
         min_length: Optional[int] = None,
         max_length: Optional[int] = None,
         prompt_template: Optional[str] = None,
+        on_prefix: Optional[Callable[[str], Any]] = None,
+        prefix_chars: int = 500,
+        on_token: Optional[Callable[[str], Any]] = None,
+        wait_for_llm_eval: bool = True,
     ) -> Dict[str, str]:
         """Generate an SEO-optimized article with the given title.
         
@@ -48,6 +173,17 @@ class ArticleGenerator:
             min_length: Minimum word length (optional)
             max_length: Maximum word length (optional)
             prompt_template: Custom prompt template to use (optional)
+            on_prefix: Called once with the article text streamed so far as
+                soon as it reaches ``prefix_chars`` characters (or with the
+                whole article if it is shorter), so callers can start
+                dependent work before generation finishes (optional)
+            prefix_chars: Text length that triggers ``on_prefix``
+            on_token: Called with each chunk of article text as it streams
+                in (optional)
+            wait_for_llm_eval: Whether to wait for the LLM judge. If False,
+                the result is returned with only the structural checks and
+                its ``evaluation`` is filled in once the judge finishes.
+                If the judge is disabled, ``evaluation`` stays None
             
         Returns:
             Dict containing the article title, content, keywords and evaluation results
@@ -55,76 +191,100 @@ class ArticleGenerator:
         Raises:
             Exception: If article generation fails
         """
+        cache_key = self._cache_key(title, keywords, min_length, max_length, prompt_template)
+        result = self._lookup(cache_key)
+        if result is not None:
+            result["keywords"] = keywords
+            logger.debug("Reusing cached article for %r", title)
+            if on_token is not None:
+                on_token(result["content"])
+            if on_prefix is not None:
+                on_prefix(result["content"])
+            return result
+            
         prompt = self._create_seo_prompt(title, keywords, min_length, max_length, prompt_template)
         
         try:
-            print("\n=== Making API Request ===")
-            print(f"Model: {self.model}")
-            print(f"Max tokens: {self.max_tokens}")
-            print(f"Temperature: {self.temperature}")
-            print(f"API Key (first 10 chars): {self.api_key[:10]}...")
-            print(f"API Key length: {len(self.api_key)}")
-            
-            message = await self.client.messages.create(
-                model=self.model,
-                max_tokens=self.max_tokens,
-                temperature=self.temperature,
-                system="You are an expert SEO content writer specializing in creating high-quality, engaging articles.",
-                messages=[{
-                    "role": "user",
-                    "content": prompt
-                }]
+            logger.debug(
+                "Making API request: model=%s max_tokens=%s temperature=%s",
+                self.model, self.max_tokens, self.temperature
             )
             
-            print("\n=== API Response ===")
-            print(f"Response type: {type(message)}")
-            if hasattr(message, 'content'):
-                print(f"Response content type: {type(message.content)}")
-                print(f"Response content: {message.content}")
+            # Stream only when someone consumes the partial text
+            request = self._message_request(prompt)
+            async with _get_api_semaphore():
+                if on_prefix is None and on_token is None:
+                    message = await self.client.messages.create(**request)
+                else:
+                    message = await self._stream_message(request, on_token, on_prefix, prefix_chars)
             
             content = message.content[0].text if hasattr(message, 'content') else message.completion
             
-            # Evaluate the article
-            print("\n=== Evaluating Article ===")
-            evaluation = await self.evaluator.evaluate_article(
-                content=content,
-                title=title,
-                keywords=keywords,
-                min_length=min_length,
-                max_length=max_length
-            )
-            
-            # Create response with evaluation
+            # Evaluate the article: structural checks right away, the LLM
+            # judge in the background
+            logger.debug("Evaluating article (%d characters)", len(content))
+            evaluation_args = {
+                "content": content,
+                "title": title,
+                "keywords": keywords,
+                "min_length": min_length,
+                "max_length": max_length
+            }
             result = {
                 "title": title,
                 "content": content,
                 "keywords": keywords,
-                "evaluation": evaluation
+                "evaluation": None,
+                "structural_evaluation": self.evaluator.evaluate_structural(**evaluation_args)
             }
             
-            # Log the successful generation with evaluation
-            self.trace_logger.log_trace(
-                title=title,
-                keywords=keywords,
-                prompt=prompt,
-                response=result,
-                metadata={"evaluation_included": True}
+            async def finish(evaluation: Optional[Dict[str, Any]]):
+                result["evaluation"] = evaluation
+                # Log the successful generation with evaluation
+                await self.trace_logger.log_trace_async(
+                    title=title,
+                    keywords=keywords,
+                    prompt=prompt,
+                    response=result,
+                    metadata={"evaluation_included": evaluation is not None, **_cache_usage(message)}
+                )
+                self._store(cache_key, result)
+            
+            if not self.evaluator.llm_judge_enabled:
+                await finish(None)
+                return result
+            
+            evaluation_task = asyncio.create_task(
+                self.evaluator.evaluate_semantic_llm(**evaluation_args)
             )
+            if wait_for_llm_eval:
+                await finish(await evaluation_task)
+            else:
+                async def finish_later():
+                    await finish(await evaluation_task)
+                
+                # Keep a reference so the task isn't garbage collected mid-flight
+                task = asyncio.create_task(finish_later())
+                self._pending_evaluations.add(task)
+                task.add_done_callback(self._pending_evaluations.discard)
+                # Nothing awaits the task, so report failures here instead of
+                # leaving them to "exception was never retrieved"
+                task.add_done_callback(_log_background_failure)
             
             return result
             
         except Exception as e:
-            print("\n=== API Error in generate_article ===")
-            print(f"Error type: {type(e)}")
-            print(f"Error message: {str(e)}")
+            logger.error("API error in generate_article: %s: %s", type(e).__name__, e)
             if hasattr(e, 'response'):
-                print(f"Response status: {e.response.status_code}")
-                print(f"Response body: {e.response.text}")
+                logger.error(
+                    "Response status: %s, body: %s",
+                    e.response.status_code, e.response.text
+                )
             if hasattr(e, 'request'):
-                print(f"Request details: {e.request}")
+                logger.error("Request details: %s", e.request)
                 
             # Log the failed generation
-            self.trace_logger.log_trace(
+            await self.trace_logger.log_trace_async(
                 title=title,
                 keywords=keywords,
                 prompt=prompt,
@@ -136,6 +296,141 @@ class ArticleGenerator:
             # Re-raise the exception
             raise
 
+    async def stream_article(
+        self,
+        title: str,
+        keywords: List[str],
+        min_length: Optional[int] = None,
+        max_length: Optional[int] = None,
+        prompt_template: Optional[str] = None,
+    ) -> AsyncIterator[str]:
+        """Stream the text of an SEO-optimized article as it is generated.
+        
+        Unlike generate_article, the article is neither evaluated nor logged.
+        
+        Args:
+            title: The exact title to use for the article
+            keywords: List of keywords to include in the article
+            min_length: Minimum word length (optional)
+            max_length: Maximum word length (optional)
+            prompt_template: Custom prompt template to use (optional)
+            
+        Yields:
+            Chunks of article text, in order
+        """
+        prompt = self._create_seo_prompt(title, keywords, min_length, max_length, prompt_template)
+        async with _get_api_semaphore():
+            async with self.client.messages.stream(**self._message_request(prompt)) as stream:
+                async for text in stream.text_stream:
+                    yield text
+
+    def _cache_key(
+        self,
+        title: str,
+        keywords: List[str],
+        min_length: Optional[int],
+        max_length: Optional[int],
+        prompt_template: Optional[str]
+    ) -> str:
+        """Build the cache key for a generation request.
+        
+        Keywords are compared ignoring order, case and surrounding
+        whitespace; the title must match exactly, as it is copied into the
+        article.
+        """
+        keyword_set = sorted({k.strip().casefold() for k in keywords})
+        key = orjson.dumps([
+            self.model,
+            self.temperature,
+            self.max_tokens,
+            title,
+            keyword_set,
+            min_length or self.min_length,
+            max_length or self.max_length,
+            prompt_template
+        ])
+        return hashlib.blake2b(key, digest_size=16).hexdigest()
+
+    def _lookup(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """Return a fresh copy of a cached article, or None if absent or expired."""
+        entry = self._cache.get(cache_key)
+        if entry is None:
+            return None
+        stored_at, data = entry
+        if self.cache_ttl > 0 and time.monotonic() - stored_at > self.cache_ttl:
+            del self._cache[cache_key]
+            return None
+        self._cache.move_to_end(cache_key)
+        return orjson.loads(data)
+
+    def _store(self, cache_key: str, result: Dict[str, Any]) -> None:
+        """Cache a generated article, evicting the least recently used."""
+        if self.cache_size <= 0:
+            return
+        self._cache[cache_key] = (time.monotonic(), orjson.dumps(result))
+        self._cache.move_to_end(cache_key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _message_request(self, prompt: str) -> Dict[str, Any]:
+        """Build the Messages API arguments for an article prompt.
+        
+        A default SEO prompt is sent as two content blocks, with a cache
+        breakpoint after the shared preamble so the system prompt and
+        preamble are read from the prompt cache on repeat requests.
+        """
+        content: Any = prompt
+        if prompt.startswith(_SEO_PREAMBLE):
+            content = [
+                {
+                    "type": "text",
+                    "text": _SEO_PREAMBLE,
+                    "cache_control": {"type": "ephemeral"}
+                },
+                {"type": "text", "text": prompt[len(_SEO_PREAMBLE):].lstrip()}
+            ]
+        return dict(
+            model=self.model,
+            max_tokens=self.max_tokens,
+            temperature=self.temperature,
+            system=_SYSTEM_PROMPT,
+            messages=[{
+                "role": "user",
+                "content": content
+            }]
+        )
+
+    async def _stream_message(
+        self,
+        request: Dict[str, Any],
+        on_token: Optional[Callable[[str], Any]] = None,
+        on_prefix: Optional[Callable[[str], Any]] = None,
+        prefix_chars: int = 500
+    ):
+        """Stream a message, handing each chunk of text to ``on_token`` and
+        the first ``prefix_chars`` characters to ``on_prefix`` as soon as
+        they arrive.
+        
+        Returns:
+            The final message, as messages.create would
+        """
+        parts = []
+        length = 0
+        notified = on_prefix is None
+        async with self.client.messages.stream(**request) as stream:
+            async for text in stream.text_stream:
+                if on_token is not None:
+                    on_token(text)
+                parts.append(text)
+                length += len(text)
+                if not notified and length >= prefix_chars:
+                    on_prefix("".join(parts))
+                    notified = True
+            message = await stream.get_final_message()
+        if not notified:
+            on_prefix("".join(parts))
+        return message
+
     def _create_seo_prompt(
         self,
         title: str,
@@ -156,77 +451,22 @@ class ArticleGenerator:
         Returns:
             The formatted prompt string
         """
-        min_length = min_length or int(os.getenv("MIN_ARTICLE_LENGTH", "1200"))
-        max_length = max_length or int(os.getenv("MAX_ARTICLE_LENGTH", "3000"))
+        min_length = min_length or self.min_length
+        max_length = max_length or self.max_length
+        keywords_csv = ", ".join(keywords)
         
         if prompt_template:
             # Use the provided template, replacing placeholders
             return prompt_template.format(
                 title=title,
-                keywords=', '.join(keywords),
+                keywords=keywords_csv,
                 min_length=min_length,
                 max_length=max_length
             )
         
-        # Default SEO prompt template
-        return f"""IMPORTANT: Generate an SEO-optimized article that MUST follow these EXACT formatting requirements.
-
-The article MUST start with this EXACT title:
-# {title}
-
-Then, it MUST use these EXACT section headers in this EXACT order:
-1. ## Introduction
-2. ## Body Content
-3. ## Conclusion
-
-Any deviation from these exact headers will cause the article to be rejected.
-
-Regional Context:
-- Target audience: Residential and commercial clients in Coatzacoalcos and nearby cities (Minatitlán)
-- Consider the coastal environment (Gulf of Mexico) and its challenges
-- Address high humidity and corrosion issues common in the region
-- Reference local industrial infrastructure and petrochemical industry presence
-- Include regional business opportunities and service coverage area
-
-Required Content Structure:
-
-## Introduction
-- Hook readers in the first paragraph
-- Include primary keyword within first 100 words
-- Establish local context and relevance
-- Preview main points
-- At least 300 words
-
-## Body Content
-- Length: Between {min_length} and {max_length} words
-- Use H3 subheadings for subsections
-- Include these keywords naturally: {', '.join(keywords)}
-- Use short, scannable paragraphs (2-4 sentences)
-- Include relevant statistics and data when possible
-- Address specific regional challenges and solutions
-- At least 700 words
-
-## Conclusion
-- Summarize key points
-- Include clear call-to-action
-- Reinforce local expertise and service value
-- At least 200 words
-
-Format Requirements:
-- Use proper markdown formatting
-- The article MUST start with exactly '# {title}'
-- Main sections MUST use exactly '## Introduction', '## Body Content', and '## Conclusion'
-- Use '### ' for subsections
-- Include at least 3 numbered lists
-- Include at least 10 bullet points
-
-Remember to:
-- Maintain a professional yet approachable tone
-- Focus on local relevance and specific regional challenges
-- Include practical examples relevant to the Gulf coast region
-- Address both residential and commercial service aspects
-- Emphasize expertise in dealing with coastal environmental challenges
-- Use natural language that resonates with local readers
-- Include location-specific details when relevant
-
-Do not include any YAML frontmatter, metadata, schema markup, or technical SEO elements in the output. Just provide the clean article content in markdown format.""" 
\ No newline at end of file
+        return _SEO_PROMPT_TEMPLATE % {
+            "title": title,
+            "min_length": min_length,
+            "max_length": max_length,
+            "keywords_csv": keywords_csv
+        }
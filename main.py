@@ -1,45 +1,58 @@
 """Main entry point for the Article Generation system."""
 
-import asyncio
+import hashlib
+import json
+import math
+import time
 import traceback
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional, Tuple
 import os
+import re
 import sys
-from datetime import datetime
-from dotenv import load_dotenv
 import urllib.parse
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import RedirectResponse, FileResponse, PlainTextResponse
+from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.responses import RedirectResponse, FileResponse, PlainTextResponse, StreamingResponse, ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel, Field
 from loguru import logger
+import anthropic
+from dotenv import load_dotenv
+
+# Load environment variables before the package modules read them
+load_dotenv()
 
 from article_generation.integration.content_manager import ContentManager
+from article_generation.evaluation.evaluator import ArticleEvaluator
 
-# Load environment variables
-load_dotenv()
+DEBUG_MODE = os.getenv("DEBUG_MODE", "False").lower() == "true"
+LOG_LEVEL = os.getenv("LOG_LEVEL", "DEBUG" if DEBUG_MODE else "INFO")
 
 # Configure Loguru
 # Remove default logger
 logger.remove()
-# Add console logger with custom format
+# Add console logger with custom format; enqueued so formatting and the
+# stdout write happen on loguru's worker thread instead of the event loop
 logger.add(
     sys.stdout,
     colorize=True,
     format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
-    level="INFO"
+    level="INFO",
+    enqueue=True
 )
-# Add file logger with rotation
+# Add file logger with rotation. Extended tracebacks with variable values
+# are costly to build and may leak request data, so they are debug-only.
 logger.add(
-    "logs/article_generation_{time}.log",
+    os.path.join(os.getenv("LOG_PATH", "logs"), "article_generation_{time}.log"),
     rotation="500 MB",
     retention="10 days",
     compression="zip",
-    level="DEBUG",
+    level=LOG_LEVEL,
     enqueue=True,
-    backtrace=True,
-    diagnose=True
+    backtrace=DEBUG_MODE,
+    diagnose=DEBUG_MODE
 )
 
 # Define base directory for generated content
@@ -49,11 +62,84 @@ IMAGES_DIR = os.path.join(BASE_DIR, "generated_images")
 
 # Get base URL from environment variable or use default
 BASE_URL = os.getenv("BASE_URL", "http://localhost:8000")
+# Where generated files are served from. Point STATIC_URL at a web server or
+# CDN serving the generated_* directories and set SERVE_STATIC_FILES=False
+# to keep file downloads off the API workers.
+STATIC_URL = os.getenv("STATIC_URL", BASE_URL)
+SERVE_STATIC_FILES = os.getenv("SERVE_STATIC_FILES", "True").lower() == "true"
+ARTICLES_URL = f"{STATIC_URL}/articles/"
+IMAGES_URL = f"{STATIC_URL}/images/"
+
+# Lines left out of parsed articles: HTML blocks and image suggestions
+SKIPPED_LINE_RE = re.compile(r'<div|<meta|</div>|\[Sugerencia de imagen:|Texto alt:')
+# Leading YAML frontmatter block
+FRONTMATTER_RE = re.compile(r'\A\s*---\n.*?\n---[ \t]*(?:\n|\Z)', re.DOTALL)
+# Markdown link or bare bracketed text (not an image); group 1 is the text
+MARKDOWN_LINK_RE = re.compile(r'(?<!!)\[([^\]]*)\](?:\([^)]*\))?')
+
+class _DigitStripTable(dict):
+    """str.translate table deleting every character for which isdigit() is true.
+    
+    Filled in on demand, so each distinct character is classified once and
+    later lookups stay in C.
+    """
+    def __missing__(self, codepoint: int) -> Optional[int]:
+        value = None if chr(codepoint).isdigit() else codepoint
+        self[codepoint] = value
+        return value
+
+_STRIP_DIGITS = _DigitStripTable()
+
+# Parsed article sections keyed by a hash of the markdown
+PARSE_CACHE_SIZE = int(os.getenv("PARSE_CACHE_SIZE", "512"))
+_SECTIONS_CACHE: "OrderedDict[bytes, Tuple[str, str, str]]" = OrderedDict()
 
 # Create necessary directories
 os.makedirs(ARTICLES_DIR, exist_ok=True)
 os.makedirs(IMAGES_DIR, exist_ok=True)
-logger.info(f"Created/verified directories: {ARTICLES_DIR}, {IMAGES_DIR}")
+logger.info("Created/verified directories: {}, {}", ARTICLES_DIR, IMAGES_DIR)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Share one content manager across requests and close its connections on shutdown."""
+    app.state.content_manager = None
+    yield
+    await ArticleEvaluator.aclose()
+
+def _file_url(base_url: str, path: str) -> str:
+    """URL of a generated file served under ``base_url``."""
+    return base_url + urllib.parse.quote(os.path.basename(path), safe="")
+
+def _overload_retry_after(error: Exception) -> Optional[float]:
+    """Return how long the API asked us to wait if the error is an overload.
+    
+    Returns 0 when the API is overloaded but gave no Retry-After, and None
+    for any other error.
+    """
+    if not isinstance(error, anthropic.APIStatusError):
+        return None
+    # Overloads mid-stream arrive as error events on a 200 response
+    body = error.body if isinstance(error.body, dict) else {}
+    error_type = (body.get("error") or {}).get("type")
+    if error.status_code != 529 and error_type != "overloaded_error":
+        return None
+    try:
+        return max(0.0, float(error.response.headers.get("retry-after", 0)))
+    except ValueError:
+        return 0.0
+
+def get_content_manager(request: Request) -> ContentManager:
+    """Get the app's content manager, creating it on first use.
+    
+    Used as a dependency of the generation endpoints. Reusing the manager
+    keeps the API clients and their pooled connections alive between
+    requests instead of reconnecting for every article.
+    """
+    app = request.app
+    if app.state.content_manager is None:
+        app.state.content_manager = ContentManager()
+        logger.debug("Content manager initialized")
+    return app.state.content_manager
 
 app = FastAPI(
     title="Article Generation API",
@@ -61,18 +147,28 @@ app = FastAPI(
     version="0.1.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # Mount the static directories
-app.mount("/articles", StaticFiles(directory=ARTICLES_DIR), name="articles")
-app.mount("/images", StaticFiles(directory=IMAGES_DIR), name="images")
-logger.info("Static directories mounted successfully")
+if SERVE_STATIC_FILES:
+    app.mount("/articles", StaticFiles(directory=ARTICLES_DIR), name="articles")
+    app.mount("/images", StaticFiles(directory=IMAGES_DIR), name="images")
+    logger.info("Static directories mounted successfully")
+else:
+    logger.info("Static directories served from {}", STATIC_URL)
 
 class GenerateRequest(BaseModel):
     topic: str
     keywords: List[str]
     num_images: int = Field(default=1, ge=1, description="Number of images to generate")
     aspect_ratio: str = Field(default="16:9", pattern="^[0-9]+:[0-9]+$", description="Image aspect ratio in format width:height")
+    image_from_article: bool = Field(default=True, description="Base the image prompt on the article's opening text; if false, on the topic and keywords, so the image starts without waiting for the article")
+
+class StreamRequest(BaseModel):
+    topic: str
+    keywords: List[str]
 
 class Article(BaseModel):
     title: str
@@ -96,63 +192,52 @@ async def root():
 
 @app.post("/generate", response_model=GenerateResponse)
 @logger.catch
-async def generate_content(request: GenerateRequest) -> dict:
+async def generate_content(
+    request: GenerateRequest,
+    content_manager: ContentManager = Depends(get_content_manager)
+) -> ORJSONResponse:
     """Generate an article with images based on the given topic and keywords."""
-    logger.info(f"Received generation request for topic: {request.topic}")
-    logger.debug(f"Request details: {request.dict()}")
+    logger.info("Received generation request for topic: {}", request.topic)
+    logger.opt(lazy=True).debug("Request details: {}", lambda: request.model_dump())
     
-    start_time = datetime.now()
-    max_retries = 3
-    base_delay = 1  # Base delay in seconds
+    start_time = time.perf_counter()
     
     try:
-        content_manager = ContentManager()
-        logger.debug("Content manager initialized")
-        
-        # Implement retry logic with exponential backoff
-        for attempt in range(max_retries):
-            try:
-                logger.info(f"Starting content generation (attempt {attempt + 1}/{max_retries})")
-                content = await content_manager.generate_content(
-                    topic=request.topic,
-                    keywords=request.keywords,
-                    num_images=request.num_images,
-                    aspect_ratio=request.aspect_ratio,
-                )
-                logger.success("Content generation completed successfully")
-                break
-            except Exception as e:
-                if 'overloaded_error' in str(e) and attempt < max_retries - 1:
-                    delay = base_delay * (2 ** attempt)  # Exponential backoff
-                    logger.warning(f"API overloaded. Retrying in {delay} seconds... (attempt {attempt + 1}/{max_retries})")
-                    await asyncio.sleep(delay)
-                    continue
-                raise  # Re-raise the exception if it's not an overload error or we're out of retries
-        
-        logger.debug("Saving generated content to files")
-        paths = content_manager.save_content(content)
-        logger.debug(f"Content saved to paths: {paths}")
-        
-        # Read the generated files
+        # The Anthropic client already retries overloads with backoff, so an
+        # overload that reaches here is passed on to the caller with the
+        # API's Retry-After rather than retried again
         try:
-            with open(paths['article_path'], 'r', encoding='utf-8') as f:
-                article_content = f.read()
-            with open(paths['images_path'], 'r', encoding='utf-8') as f:
-                images_content = f.read()
-            logger.debug("Successfully read generated files")
+            logger.info("Starting content generation")
+            content = await content_manager.generate_content(
+                topic=request.topic,
+                keywords=request.keywords,
+                num_images=request.num_images,
+                aspect_ratio=request.aspect_ratio,
+                image_from_article=request.image_from_article,
+            )
+            logger.success("Content generation completed successfully")
         except Exception as e:
-            logger.error(f"Error reading generated files: {str(e)}")
+            retry_after = _overload_retry_after(e)
+            if retry_after is None:
+                raise
+            logger.warning("API overloaded. Asking the client to retry in {:.1f} seconds", retry_after)
             raise HTTPException(
-                status_code=500,
-                detail=f"Error reading generated files: {str(e)}"
+                status_code=503,
+                detail="The generation API is overloaded, please retry later",
+                headers={"Retry-After": str(math.ceil(retry_after))} if retry_after else None
             )
         
-        # Convert local paths to URLs using environment-based base URL
-        article_filename = urllib.parse.quote(os.path.basename(paths['article_path']))
-        images_filename = urllib.parse.quote(os.path.basename(paths['images_path']))
+        logger.debug("Saving generated content to files")
+        paths = await content_manager.save_content_async(content)
+        logger.debug("Content saved to paths: {}", paths)
         
-        article_url = f"{BASE_URL}/articles/{article_filename}"
-        image_url = f"{BASE_URL}/images/{images_filename}"
+        # The saved article is exactly the generated text, so parse that
+        # rather than reading the file back from disk
+        article_content = content["article"]["content"]
+        
+        # Convert local paths to URLs using environment-based base URL
+        article_url = _file_url(ARTICLES_URL, paths['article_path'])
+        image_url = _file_url(IMAGES_URL, paths['images_path'])
         
         # Parse the markdown content
         article = parse_markdown_to_simple_article(
@@ -162,171 +247,187 @@ async def generate_content(request: GenerateRequest) -> dict:
             title=request.topic
         )
         
+        # Returned as a response object so FastAPI skips re-validating it
+        # against GenerateResponse; the model still documents the endpoint
         response = {
-            "article": article,
+            "article": article.model_dump(),
             "status": "success",
-            "generation_time": (datetime.now() - start_time).total_seconds()
+            "generation_time": time.perf_counter() - start_time
         }
         
-        logger.info(f"Generation completed for topic: {request.topic}")
-        return response
+        logger.info("Generation completed for topic: {}", request.topic)
+        return ORJSONResponse(response)
         
+    except HTTPException:
+        raise
     except Exception as e:
-        error_details = {
-            "error": str(e),
-            "traceback": traceback.format_exc()
-        }
-        logger.error(f"Error during content generation: {str(e)}")
+        logger.error("Error during content generation: {}", e)
         logger.exception("Full error details:")
         raise HTTPException(
             status_code=500,
             detail=f"An error occurred: {str(e)}\nTraceback: {traceback.format_exc()}"
         )
 
+@app.post("/generate/stream")
+async def generate_content_stream(
+    request: StreamRequest,
+    content_manager: ContentManager = Depends(get_content_manager)
+) -> StreamingResponse:
+    """Stream an article's text as server-sent events while it is generated.
+    
+    Each ``data`` event carries a JSON object with the next chunk of text;
+    a final ``done`` event, or an ``error`` event, ends the stream. No images
+    are generated and nothing is saved.
+    """
+    logger.info("Received streaming request for topic: {}", request.topic)
+    generator = content_manager.article_generator
+    
+    async def events() -> AsyncIterator[str]:
+        try:
+            async for text in generator.stream_article(request.topic, request.keywords):
+                yield f"data: {json.dumps({'text': text})}\n\n"
+        except Exception as e:
+            logger.error("Error during streaming generation: {}", e)
+            yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+            return
+        yield "event: done\ndata: {}\n\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
+    )
+
 def parse_markdown_to_simple_article(markdown_content: str, image_url: str, article_url: str, title: str) -> Article:
     """Parse markdown content into a simple article structure."""
     try:
-        introduction = []
-        body = []
-        conclusion = []
-        in_conclusion = False
-        in_introduction = False
-        
-        # Remove YAML frontmatter and schema markup
-        content_parts = markdown_content.split('---')
-        if len(content_parts) >= 3:
-            # Get the YAML frontmatter
-            yaml_content = content_parts[1]
-            # Remove schema markup section if present
-            yaml_lines = [line for line in yaml_content.split('\n') 
-                        if not line.strip().startswith('Schema Markup:') 
-                        and not ('"@' in line or '{' in line or '}' in line)]
-            # Reconstruct the frontmatter without schema
-            content_parts[1] = '\n'.join(yaml_lines)
-            # Get the main content
-            main_content = '---'.join(content_parts[2:]).strip()
-        else:
-            main_content = markdown_content.strip()
-        
-        # Process content line by line
-        cleaned_lines = []
-        in_code_block = False
-        in_schema_block = False
-        
-        for line in main_content.split('\n'):
-            line = line.strip()
-            
-            # Skip empty lines
-            if not line:
-                continue
-                
-            # Check for schema block start/end
-            if 'Schema Markup:' in line or '"@context"' in line:
-                in_schema_block = True
-                continue
-            if in_schema_block and '}' in line:
-                in_schema_block = False
-                continue
-            
-            # Skip if in schema block
-            if in_schema_block:
-                continue
-                
-            # Handle code blocks
-            if line.startswith('```'):
-                in_code_block = not in_code_block
-                continue
-            
-            # Skip if in code block
-            if in_code_block:
-                continue
-                
-            # Skip HTML blocks
-            if any(skip in line for skip in ['<div', '<meta', '</div>']):
-                continue
-                
-            # Skip image suggestions
-            if '[Sugerencia de imagen:' in line or 'Texto alt:' in line:
-                continue
-                
-            # Clean up markdown links that aren't images
-            if '[' in line and ']' in line and not line.startswith('!['):
-                # Keep only the text inside the brackets
-                parts = line.split('[')
-                cleaned_parts = []
-                for part in parts:
-                    if ']' in part:
-                        # Extract text inside brackets and remove the link part
-                        text = part.split(']')[0]
-                        cleaned_parts.append(text)
-                    else:
-                        cleaned_parts.append(part)
-                line = ' '.join(cleaned_parts)
-            
-            cleaned_lines.append(line)
-        
-        # Parse sections
-        for line in cleaned_lines:
-            if line.startswith('# '):
-                continue
-            elif line.startswith('## '):
-                if 'introducci' in line.lower() or 'introduction' in line.lower():
-                    in_introduction = True
-                    in_conclusion = False
-                elif 'conclusi' in line.lower():
-                    in_conclusion = True
-                    in_introduction = False
-                else:
-                    in_introduction = False
-                    in_conclusion = False
-                    body.append(line)
-            elif line.startswith('### '):
-                # Keep section titles but remove numbers if present
-                if any(c.isdigit() for c in line):
-                    line = '### ' + ''.join(c for c in line[4:] if not c.isdigit()).strip('. ')
-                body.append(line)
-            else:
-                if in_conclusion:
-                    conclusion.append(line)
-                elif in_introduction:
-                    introduction.append(line)
-                else:
-                    body.append(line)
+        introduction, body, conclusion = _article_sections(markdown_content)
         
         # Create clean markdown
-        clean_markdown = f"# {title}\n\n"
+        parts = [f"# {title}\n\n"]
         if introduction:
-            clean_markdown += "## Introduction\n\n"
-            clean_markdown += '\n'.join(introduction).strip() + '\n\n'
-        clean_markdown += '\n'.join(body).strip() + '\n\n'
+            parts.append(f"## Introduction\n\n{introduction}\n\n")
+        parts.append(f"{body}\n\n")
         if conclusion:
-            clean_markdown += f"## Conclusion\n\n"
-            clean_markdown += '\n'.join(conclusion).strip() + '\n'
+            parts.append(f"## Conclusion\n\n{conclusion}\n")
         
         # Add links to the markdown
-        clean_markdown += f"\n---\n\n"
-        clean_markdown += f"[View Full Article]({article_url}) | [View Images]({image_url})\n"
+        parts.append(f"\n---\n\n[View Full Article]({article_url}) | [View Images]({image_url})\n")
         
         return Article(
             title=title,
-            introduction='\n'.join(introduction).strip(),
-            body='\n'.join(body).strip(),
-            conclusion='\n'.join(conclusion).strip(),
+            introduction=introduction,
+            body=body,
+            conclusion=conclusion,
             image_url=image_url,
             article_url=article_url,
-            markdown=clean_markdown
+            markdown=''.join(parts)
         )
         
     except Exception as e:
-        logger.error(f"Error parsing markdown to article: {str(e)}")
+        logger.error("Error parsing markdown to article: {}", e)
         raise
 
+def _article_sections(markdown_content: str) -> Tuple[str, str, str]:
+    """Split article markdown into its introduction, body and conclusion.
+    
+    Results are memoized by a hash of the content, so re-parsing the same
+    article (e.g. a cached generation served again) is a dictionary lookup.
+    """
+    key = hashlib.blake2b(markdown_content.encode(), digest_size=16).digest()
+    sections = _SECTIONS_CACHE.get(key)
+    if sections is not None:
+        _SECTIONS_CACHE.move_to_end(key)
+        return sections
+    
+    sections = _parse_sections(markdown_content)
+    if PARSE_CACHE_SIZE > 0:
+        _SECTIONS_CACHE[key] = sections
+        while len(_SECTIONS_CACHE) > PARSE_CACHE_SIZE:
+            _SECTIONS_CACHE.popitem(last=False)
+    return sections
+
+def _parse_sections(markdown_content: str) -> Tuple[str, str, str]:
+    """Clean up article markdown and sort its lines into sections."""
+    introduction = []
+    body = []
+    conclusion = []
+    section = body
+    in_code_block = False
+    in_schema_block = False
+    
+    # Remove YAML frontmatter, if any
+    frontmatter = FRONTMATTER_RE.match(markdown_content)
+    main_content = markdown_content[frontmatter.end():] if frontmatter else markdown_content
+    
+    # Clean up and sort the lines into sections in a single pass
+    for line in main_content.split('\n'):
+        line = line.strip()
+        
+        # Skip empty lines
+        if not line:
+            continue
+        
+        # Check for schema block start/end
+        if 'Schema Markup:' in line or '"@context"' in line:
+            in_schema_block = True
+            continue
+        if in_schema_block:
+            if '}' in line:
+                in_schema_block = False
+            continue
+        
+        # Handle code blocks
+        if line.startswith('```'):
+            in_code_block = not in_code_block
+            continue
+        if in_code_block:
+            continue
+        
+        # Skip HTML blocks and image suggestions
+        if SKIPPED_LINE_RE.search(line):
+            continue
+        
+        # Keep only the text of markdown links that aren't images
+        if '[' in line and not line.startswith('!['):
+            line = MARKDOWN_LINK_RE.sub(r'\1', line)
+        
+        if line.startswith('# '):
+            continue
+        elif line.startswith('## '):
+            heading = line.lower()
+            if 'introducci' in heading or 'introduction' in heading:
+                section = introduction
+            elif 'conclusi' in heading:
+                section = conclusion
+            else:
+                section = body
+                body.append(line)
+        elif line.startswith('### '):
+            # Keep section titles but remove numbers if present
+            subtitle = line[4:].translate(_STRIP_DIGITS)
+            if len(subtitle) != len(line) - 4:
+                line = '### ' + subtitle.strip('. ')
+            body.append(line)
+        else:
+            section.append(line)
+    
+    introduction = '\n'.join(introduction).strip()
+    body = '\n'.join(body).strip()
+    conclusion = '\n'.join(conclusion).strip()
+    
+    return introduction, body, conclusion
+
 if __name__ == "__main__":
     logger.info("Starting Article Generation API")
     import uvicorn
+    # Auto-reload is for development only: it runs a file watcher and a
+    # single worker. Otherwise serve with one worker per CPU unless
+    # WEB_CONCURRENCY says otherwise.
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
         port=int(os.environ.get("PORT", 8000)),
-        reload=True
+        reload=DEBUG_MODE,
+        workers=None if DEBUG_MODE else int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1)))
     ) 
\ No newline at end of file
@@ -1,5 +1,9 @@
 """Script to run the experiment dashboard."""
 
+from dotenv import load_dotenv
+
+load_dotenv()
+
 from article_generation.experimentation.dashboard import main
 
 if __name__ == "__main__":
@@ -2,8 +2,12 @@
 
 import os
 import asyncio
+from dotenv import load_dotenv
+
+load_dotenv()
+
 from article_generation.llm.generator import ArticleGenerator
-from article_generation.evaluation.evaluator import ArticleEvaluator
+from article_generation.evaluation.evaluator import ArticleEvaluator, count_words
 from article_generation.experimentation.experiment import Experiment
 from article_generation.experimentation.feedback import FeedbackManager
 
@@ -103,51 +107,66 @@ async def run_experiment():
             metrics=["structure_score", "content_score", "seo_score"]
         )
         
-        # Add variants
-        for variant_name, prompt_template in PROMPT_VARIANTS.items():
-            experiment.add_variant(
+        # Add variants, keeping a name -> ID lookup for recording trials
+        variant_ids = {
+            variant_name: experiment.add_variant(
                 name=variant_name,
                 prompt_template=prompt_template
             )
+            for variant_name, prompt_template in PROMPT_VARIANTS.items()
+        }
+        
+        # Run every (test case, variant) trial concurrently; the generator
+        # caps requests in flight at ANTHROPIC_MAX_CONCURRENCY
+        trials = [
+            (test_case, variant_name, prompt_template)
+            for test_case in TEST_CASES
+            for variant_name, prompt_template in PROMPT_VARIANTS.items()
+        ]
+        print(f"\nGenerating {len(trials)} articles")
+        results = await asyncio.gather(
+            *(
+                # Generate article using variant's prompt template
+                generator.generate_article(
+                    title=test_case["title"],
+                    keywords=test_case["keywords"],
+                    min_length=1200,
+                    max_length=2000,
+                    prompt_template=prompt_template
+                )
+                for test_case, variant_name, prompt_template in trials
+            ),
+            return_exceptions=True
+        )
         
-        # Run trials for each test case
-        for test_case in TEST_CASES:
-            print(f"\nGenerating articles for: {test_case['title']}")
-            
-            for variant_name, prompt_template in PROMPT_VARIANTS.items():
-                print(f"\nTrying variant: {variant_name}")
-                try:
-                    # Generate article using variant's prompt template
-                    result = await generator.generate_article(
-                        title=test_case["title"],
-                        keywords=test_case["keywords"],
-                        min_length=1200,
-                        max_length=2000,
-                        prompt_template=prompt_template
-                    )
-                    
-                    # Record trial
-                    experiment.record_trial(
-                        variant_name=variant_name,
-                        metrics={
-                            "structure_score": result["evaluation"]["structure_score"],
-                            "content_score": result["evaluation"]["content_score"],
-                            "seo_score": result["evaluation"]["seo_score"]
-                        },
-                        metadata={
-                            "title": test_case["title"],
-                            "keywords": test_case["keywords"],
-                            "content_length": len(result["content"].split())
-                        }
-                    )
-                    
-                    print(f"Successfully generated and recorded trial for {variant_name}")
-                    
-                except Exception as e:
-                    print(f"Error generating article for variant {variant_name}: {str(e)}")
-                    continue
+        # Record trials in order
+        for (test_case, variant_name, _), result in zip(trials, results):
+            try:
+                if isinstance(result, BaseException):
+                    raise result
+                
+                experiment.record_trial(
+                    variant_id=variant_ids[variant_name],
+                    metrics={
+                        "structure_score": result["evaluation"]["structure_score"],
+                        "content_score": result["evaluation"]["content_score"],
+                        "seo_score": result["evaluation"]["seo_score"]
+                    },
+                    metadata={
+                        "title": test_case["title"],
+                        "keywords": test_case["keywords"],
+                        "content_length": count_words(result["content"])
+                    }
+                )
+                
+                print(f"Successfully generated and recorded trial for {variant_name} ({test_case['title']})")
+                
+            except Exception as e:
+                print(f"Error generating article for variant {variant_name} ({test_case['title']}): {str(e)}")
+                continue
         
-        # Analyze results
+        # Flush buffered trials to disk and analyze results
+        experiment.close()
         analysis = experiment.analyze_results()
         print("\n=== Experiment Results ===")
         print(f"Total trials: {analysis['total_trials']}")
@@ -1,16 +1,10 @@
 import asyncio
 import json
-import os
-from datetime import datetime
-from article_generation.llm.generator import ArticleGenerator
+from dotenv import load_dotenv
+
+load_dotenv()
 
-def get_latest_trace(success_dir):
-    """Get the most recent trace file."""
-    files = os.listdir(success_dir)
-    if not files:
-        return None
-    files.sort(reverse=True)  # Latest file will be first
-    return os.path.join(success_dir, files[0])
+from article_generation.llm.generator import ArticleGenerator
 
 async def main():
     # Initialize generator
@@ -56,17 +50,15 @@ async def main():
         
         # Check latest trace
         print("\nChecking latest trace...")
-        success_dir = os.path.join(os.getcwd(), "traces", "success")
-        latest_trace = get_latest_trace(success_dir)
+        traces = generator.trace_logger.get_traces()
         
-        if latest_trace:
-            with open(latest_trace, 'r') as f:
-                trace = json.load(f)
-                if 'evaluation' in trace['response']:
-                    print("Evaluation results found in trace!")
-                    print(json.dumps(trace['response']['evaluation'], indent=2))
-                else:
-                    print("No evaluation results in trace!")
+        if traces:
+            trace = traces[0]
+            if 'evaluation' in trace['response']:
+                print("Evaluation results found in trace!")
+                print(json.dumps(trace['response']['evaluation'], indent=2))
+            else:
+                print("No evaluation results in trace!")
         else:
             print("No trace files found!")
         
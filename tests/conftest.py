@@ -1,40 +1,110 @@
 """Shared pytest fixtures for Article Generation system tests."""
 
+import asyncio
+import json
 import pytest
 import os
-from dotenv import load_dotenv
-from typing import Dict, List
-from unittest.mock import AsyncMock, MagicMock
+from types import MappingProxyType, SimpleNamespace
+from typing import Mapping, Tuple
 
-@pytest.fixture(autouse=True)
-def load_env():
-    """Load environment variables before each test."""
-    print("\n=== Loading Environment Variables ===")
-    load_dotenv()
+try:
+    import uvloop
+except ImportError:  # not available on Windows
+    uvloop = None
+
+_CONFTEST_DIR = os.path.dirname(os.path.abspath(__file__))
+_BASE_DIR = os.path.dirname(_CONFTEST_DIR)
+_TEST_DATA_DIR = os.path.join(_CONFTEST_DIR, "data")
+try:
+    os.mkdir(_TEST_DATA_DIR)
+except FileExistsError:
+    pass
+
+def _find_env_file():
+    """Find the nearest .env, searching from the working directory upwards."""
+    path = os.getcwd()
+    while True:
+        env_path = os.path.join(path, ".env")
+        if os.path.isfile(env_path):
+            return env_path
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+
+def _fast_load_env():
+    """Load .env through a pre-parsed JSON copy kept next to it.
     
-    # Print loaded environment variables
-    print("\nLoaded environment variables:")
+    The copy is rebuilt whenever .env is newer. As with load_dotenv,
+    variables already set in the environment are left alone.
+    """
+    env_path = _find_env_file()
+    if not env_path:
+        return
+    cache_path = f"{env_path}.json"
+    try:
+        if os.path.getmtime(cache_path) < os.path.getmtime(env_path):
+            raise FileNotFoundError(cache_path)
+        with open(cache_path, encoding="utf-8") as f:
+            values = json.load(f)
+    except (OSError, ValueError):
+        # Only pay for importing dotenv when the copy has to be rebuilt
+        from dotenv import dotenv_values
+        values = {k: v for k, v in dotenv_values(env_path).items() if v is not None}
+        try:
+            with open(cache_path, "w", encoding="utf-8") as f:
+                json.dump(values, f)
+        except OSError:
+            pass
+    for key, value in values.items():
+        os.environ.setdefault(key, value)
+
+@pytest.fixture(scope="session", autouse=True)
+def load_env():
+    """Load environment variables once for the test session."""
+    _fast_load_env()
+
+def pytest_report_header(config):
+    """Show the loaded environment variables once, in the session header."""
+    _fast_load_env()
+    env = os.environ
+    lines = ["Loaded environment variables:"]
     for key in ['ANTHROPIC_API_KEY', 'ANTHROPIC_MODEL', 'MAX_TOKENS', 'TEMPERATURE']:
-        value = os.getenv(key)
+        value = env.get(key)
         if value:
             if 'API_KEY' in key:
-                print(f"{key}: {'*' * 10}{value[-5:]}")
+                lines.append(f"  {key}: {'*' * 10}{value[-5:]}")
             else:
-                print(f"{key}: {value}")
+                lines.append(f"  {key}: {value}")
         else:
-            print(f"{key}: Not set")
+            lines.append(f"  {key}: Not set")
+    return lines
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def base_dir():
     """Get the base directory of the project."""
-    return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return _BASE_DIR
 
-@pytest.fixture
-def test_data_dir(base_dir):
+@pytest.fixture(scope="session")
+def test_data_dir():
     """Get the test data directory."""
-    test_data_path = os.path.join(base_dir, "tests", "data")
-    os.makedirs(test_data_path, exist_ok=True)
-    return test_data_path
+    return _TEST_DATA_DIR
+
+@pytest.fixture(scope="session")
+def event_loop_policy():
+    """Run async tests on uvloop when it is installed."""
+    if uvloop is not None:
+        return uvloop.EventLoopPolicy()
+    return asyncio.DefaultEventLoopPolicy()
+
+def pytest_addoption(parser):
+    """Add the option that opts in to slow tests."""
+    parser.addoption(
+        "--run-slow",
+        action="store_true",
+        default=False,
+        help="run tests marked slow, which call the live API"
+    )
 
 def pytest_configure(config):
     """Register custom markers."""
@@ -42,40 +112,55 @@ def pytest_configure(config):
         "markers",
         "integration: mark test as an integration test that requires API access"
     )
+    config.addinivalue_line(
+        "markers",
+        "slow: mark test as slow; skipped unless --run-slow is given"
+    )
 
-# Test data
-TEST_ARTICLES = [
+def pytest_collection_modifyitems(config, items):
+    """Skip slow tests unless asked for, and run integration tests back to back."""
+    if not config.getoption("--run-slow"):
+        skip_slow = pytest.mark.skip(reason="slow test; pass --run-slow to run it")
+        for item in items:
+            if item.get_closest_marker("slow"):
+                item.add_marker(skip_slow)
+    # list.sort is stable, so the collected order is otherwise kept
+    items.sort(key=lambda item: 0 if item.get_closest_marker("integration") else 1)
+
+# Test data, read-only so that no test can change what the next one sees
+TEST_ARTICLES = tuple(MappingProxyType(article) for article in [
     {
         "topic": "Industrial Safety Protocols",
-        "keywords": ["safety", "industrial", "protocols"],
-        "expected_sections": ["Introduction", "Body Content", "Conclusion"],
+        "keywords": ("safety", "industrial", "protocols"),
+        "expected_sections": ("Introduction", "Body Content", "Conclusion"),
         "min_words": 1200,
         "max_words": 3000
     },
     {
         "topic": "Corrosion Prevention Methods",
-        "keywords": ["corrosion", "prevention", "maintenance"],
-        "expected_sections": ["Introduction", "Body Content", "Conclusion"],
+        "keywords": ("corrosion", "prevention", "maintenance"),
+        "expected_sections": ("Introduction", "Body Content", "Conclusion"),
         "min_words": 1200,
         "max_words": 3000
     }
-]
+])
+
+_MOCK_ENV = (
+    ("ANTHROPIC_API_KEY", "test_api_key"),
+    ("ANTHROPIC_MODEL", "claude-3-opus-20240229"),
+    ("MAX_TOKENS", "4096"),
+    ("TEMPERATURE", "0.7"),
+    ("MIN_ARTICLE_LENGTH", "1200"),
+    ("MAX_ARTICLE_LENGTH", "3000"),
+)
 
 @pytest.fixture
 def mock_env_vars(monkeypatch):
     """Set up mock environment variables for testing."""
-    monkeypatch.setenv("ANTHROPIC_API_KEY", "test_api_key")
-    monkeypatch.setenv("ANTHROPIC_MODEL", "claude-3-opus-20240229")
-    monkeypatch.setenv("MAX_TOKENS", "4096")
-    monkeypatch.setenv("TEMPERATURE", "0.7")
-    monkeypatch.setenv("MIN_ARTICLE_LENGTH", "1200")
-    monkeypatch.setenv("MAX_ARTICLE_LENGTH", "3000")
+    for key, value in _MOCK_ENV:
+        monkeypatch.setenv(key, value)
 
-@pytest.fixture
-def mock_anthropic_response():
-    """Create a mock Anthropic API response."""
-    mock_content = MagicMock()
-    mock_content.text = """# Test Article
+_MOCK_ARTICLE_MD = """# Test Article
 
 ## Introduction
 This is a test introduction that provides context about the topic.
@@ -91,21 +176,20 @@ This is the main content of the article with detailed information.
 ## Conclusion
 This is the conclusion summarizing the key points."""
 
-    mock_response = MagicMock()
-    mock_response.content = [mock_content]
-    return mock_response
-
-@pytest.fixture
-def mock_anthropic_client(mock_anthropic_response):
-    """Create a mock Anthropic client."""
-    mock_messages = MagicMock()
-    mock_messages.create = AsyncMock(return_value=mock_anthropic_response)
+@pytest.fixture(scope="session")
+def mock_anthropic():
+    """Create a mock Anthropic client and the response it returns, shared by all tests."""
+    response = SimpleNamespace(content=[SimpleNamespace(text=_MOCK_ARTICLE_MD)])
+    
+    async def create(*args, **kwargs):
+        return response
     
-    mock_client = MagicMock()
-    mock_client.messages = mock_messages
-    return mock_client
+    return SimpleNamespace(
+        client=SimpleNamespace(messages=SimpleNamespace(create=create)),
+        response=response
+    )
 
-@pytest.fixture
-def test_article_data() -> List[Dict]:
-    """Return test article data."""
+@pytest.fixture(scope="session")
+def test_article_data() -> Tuple[Mapping, ...]:
+    """Return the shared, read-only test article data."""
     return TEST_ARTICLES 
\ No newline at end of file
@@ -1,47 +1,58 @@
 """Tests for the ArticleGenerator class."""
 
+import asyncio
+import functools
 import os
 import pytest
 import json
 import logging
-from unittest.mock import AsyncMock, patch, MagicMock
+import re
+from unittest.mock import AsyncMock, MagicMock
 from anthropic import AsyncAnthropic, APIError
+from types import MappingProxyType, SimpleNamespace
 from typing import List, Dict
 
 from article_generation.llm.generator import ArticleGenerator
 
-# Shared test prompt function
-def create_test_prompt(topic, keywords, min_length=1200, max_length=3000):
-    """Create a test prompt with explicit instructions for content generation."""
-    system_prompt = f"""You are a professional technical writer specializing in creating comprehensive, detailed articles.
+logger = logging.getLogger(__name__)
+
+# Markers of YAML frontmatter or metadata that must not appear in prompts
+_FRONTMATTER_RE = re.compile(
+    r"---\n|\n---|frontmatter:|metadata:|categories:|reading time:|meta description:"
+)
+_YAML_RE = re.compile(r"yaml", re.IGNORECASE)
+_YAML_EXCLUSION_RE = re.compile(r"do not include any yaml", re.IGNORECASE)
+
+# Shared test prompt, filled in with %-formatting
+_TEST_PROMPT_TEMPLATE = """You are a professional technical writer specializing in creating comprehensive, detailed articles.
 Your task is to generate a long-form article that is thorough and informative.
-You MUST write at least {min_length} words (this is a strict requirement).
+You MUST write at least %(min_length)s words (this is a strict requirement).
 Follow the exact structure provided and include all required elements.
-The article MUST start with the exact title format: '# {topic}' (no extra spaces or characters)."""
+The article MUST start with the exact title format: '# %(topic)s' (no extra spaces or characters).
 
-    article_prompt = f"""Generate a comprehensive article about {topic} that MUST be at least {min_length} words long.
+Generate a comprehensive article about %(topic)s that MUST be at least %(min_length)s words long.
 I will reject any article that:
-1. Is shorter than {min_length} words
-2. Doesn't start with the exact title format: '# {topic}' (no extra spaces or characters)
+1. Is shorter than %(min_length)s words
+2. Doesn't start with the exact title format: '# %(topic)s' (no extra spaces or characters)
 3. Doesn't follow the required section structure
 
 Required Article Structure:
 
-# {topic}
+# %(topic)s
 
 ## Introduction
 [Write a detailed introduction (at least 300 words) that:
-- Provides context and background about {topic}
+- Provides context and background about %(topic)s
 - Explains why this topic is important
 - Outlines what the article will cover
 - Engages the reader with relevant statistics or examples]
 
 ## Body Content
-[Write extensive main content (at least 700 words) that thoroughly explains all aspects of {topic}]
+[Write extensive main content (at least 700 words) that thoroughly explains all aspects of %(topic)s]
 
 The body content MUST include ALL of the following:
 1. Detailed Overview
-   - Current state of {topic}
+   - Current state of %(topic)s
    - Historical background
    - Key concepts and terminology
    - Industry standards and best practices
@@ -71,7 +82,7 @@ The body content MUST include ALL of the following:
    - Growth opportunities
 
 Additional Requirements:
-- Naturally incorporate these keywords: {', '.join(keywords)}
+- Naturally incorporate these keywords: %(keyword_list)s
 - Include at least 3 detailed numbered lists with 5+ items each
 - Add at least 10 bullet points for key concepts
 - Write multiple paragraphs with in-depth explanations
@@ -85,66 +96,160 @@ Additional Requirements:
 - Encourages reader engagement]
 
 Critical Requirements:
-1. TITLE: The article MUST start with exactly '# {topic}'
-2. LENGTH: The article MUST be at least {min_length} words. This is non-negotiable.
+1. TITLE: The article MUST start with exactly '# %(topic)s'
+2. LENGTH: The article MUST be at least %(min_length)s words. This is non-negotiable.
 3. FORMAT: Use proper markdown formatting throughout
 4. SECTIONS: Include all sections exactly as shown above
-5. KEYWORDS: Naturally incorporate all keywords: {', '.join(keywords)}
+5. KEYWORDS: Naturally incorporate all keywords: %(keyword_list)s
 6. STYLE: Write in a professional, authoritative tone
 7. DEPTH: Provide detailed explanations and examples
 8. STRUCTURE: Use multiple paragraphs, lists, and bullet points
 
 Remember: 
-- The article MUST start with exactly '# {topic}'
-- The article MUST be at least {min_length} words
+- The article MUST start with exactly '# %(topic)s'
+- The article MUST be at least %(min_length)s words
 - Follow the exact section structure provided
 - Do not include any YAML frontmatter or metadata"""
 
-    return f"{system_prompt}\n\n{article_prompt}"
-
-# Test Data
-TEST_ARTICLES = [
-    {
-        "topic": "Construction Services",
-        "keywords": ["construction", "services", "Coatzacoalcos"],
-        "expected_sections": ["Introduction", "Body Content", "Conclusion"],
-        "min_words": 1200,
-        "max_words": 3000
-    },
-    {
-        "topic": "Industrial Maintenance",
-        "keywords": ["maintenance", "industrial", "petrochemical"],
-        "expected_sections": ["Introduction", "Body Content", "Conclusion"],
-        "min_words": 1200,
-        "max_words": 3000
+def create_test_prompt(topic, keywords, min_length=1200, max_length=3000):
+    """Create a test prompt with explicit instructions for content generation."""
+    return _create_test_prompt_cached(topic, tuple(keywords), min_length, max_length)
+
+@functools.lru_cache(maxsize=128)
+def _create_test_prompt_cached(topic, keywords, min_length, max_length):
+    """Build the test prompt once per distinct set of arguments."""
+    return _TEST_PROMPT_TEMPLATE % {
+        "topic": topic,
+        "min_length": min_length,
+        "keyword_list": ', '.join(keywords),
     }
-]
 
-@pytest.fixture
-def mock_env_vars(monkeypatch):
-    """Set up mock environment variables."""
-    # Only set test API key if real one is not provided
-    if not os.getenv("ANTHROPIC_API_KEY"):
-        monkeypatch.setenv("ANTHROPIC_API_KEY", "test_api_key")
-    monkeypatch.setenv("ANTHROPIC_MODEL", "claude-3-opus-20240229")  # Updated to latest model
-    monkeypatch.setenv("MAX_TOKENS", "4096")
-    monkeypatch.setenv("TEMPERATURE", "0.7")
-    monkeypatch.setenv("MIN_ARTICLE_LENGTH", "1200")
-    monkeypatch.setenv("MAX_ARTICLE_LENGTH", "3000")
+def _build_mock_content(test_case):
+    """Build a canned article long enough to pass the length checks."""
+    # Base content sections
+    intro_base = f"""Welcome to our comprehensive guide on {test_case['topic'].lower()}. As a leading provider in Coatzacoalcos, we understand the unique challenges and requirements of our region. Our team brings extensive experience and expertise to every project, ensuring the highest quality standards and customer satisfaction. We specialize in delivering tailored solutions that meet the specific needs of both residential and commercial clients in the Gulf of Mexico region.
 
-@pytest.fixture
+Our commitment to excellence has made us the preferred choice for clients seeking reliable and professional {test_case['topic'].lower()} solutions. With years of experience serving the Coatzacoalcos area, we have developed a deep understanding of local requirements, environmental considerations, and industry-specific challenges. Our team of certified professionals is dedicated to delivering exceptional results while maintaining the highest standards of safety and quality.
+
+In this comprehensive guide, we will explore our range of services, our approach to project management, and the unique advantages we offer to our clients. Whether you're planning a new construction project, require industrial maintenance, or need specialized services, we have the expertise and resources to meet your requirements effectively."""
+
+    body_base = f"""Our {test_case['topic'].lower()} division offers a complete range of professional services designed to meet the demanding requirements of our clients. We employ cutting-edge technology and industry-best practices to deliver exceptional results. Our team of certified professionals ensures that every project is completed to the highest standards of quality and safety.
+
+We specialize in: {', '.join(test_case['keywords'])}. Each of these services is delivered with our commitment to excellence and attention to detail. We understand the unique challenges posed by our coastal environment, including high humidity and corrosion issues, and have developed specialized approaches to address these concerns effectively.
+
+Our comprehensive approach includes:
+1. Detailed project planning and assessment - We begin each project with a thorough analysis of requirements, site conditions, and potential challenges.
+2. Implementation of industry-leading safety protocols - Safety is our top priority. We maintain strict safety standards.
+3. Regular quality control inspections - Our quality assurance team conducts regular inspections throughout the project lifecycle.
+4. Ongoing maintenance and support services - We provide comprehensive maintenance programs.
+5. Emergency response capabilities - Our 24/7 emergency response team is always ready.
+
+Our Technical Expertise:
+- Latest construction and maintenance techniques
+- Advanced project management methodologies
+- Environmental protection standards
+- Safety regulations and best practices
+- Quality control systems
+
+Regional Considerations:
+- High humidity and corrosion protection
+- Tropical weather considerations
+- Industrial zone requirements
+- Environmental protection measures
+- Local building codes and regulations"""
+
+    conclusion_base = f"""Our commitment to excellence in {test_case['topic'].lower()} sets us apart in the Coatzacoalcos region. We invite you to experience the difference our professional services can make for your project. Contact us today to discuss your specific requirements and learn how we can help you achieve your objectives efficiently and effectively.
+
+With our proven track record of successful projects, comprehensive service offerings, and dedication to customer satisfaction, we are confident in our ability to meet and exceed your expectations. Our investment in advanced technology, ongoing training, and quality management systems ensures that we remain at the forefront of industry developments."""
+
+    # Repeat sections to meet minimum word count
+    intro = intro_base * 2
+    body = body_base * 3
+    conclusion = conclusion_base * 2
+
+    return f"""# {test_case['topic']}
+
+## Introduction
+{intro}
+
+## Body Content
+{body}
+
+## Conclusion
+{conclusion}"""
+
+# Test Data, read-only; the canned article for each case is built once here
+# rather than in every parametrized run
+TEST_ARTICLES = tuple(
+    MappingProxyType(dict(case, mock_content=_build_mock_content(case)))
+    for case in (
+        {
+            "topic": "Construction Services",
+            "keywords": ("construction", "services", "Coatzacoalcos"),
+            "expected_sections": ("Introduction", "Body Content", "Conclusion"),
+            "min_words": 1200,
+            "max_words": 3000
+        },
+        {
+            "topic": "Industrial Maintenance",
+            "keywords": ("maintenance", "industrial", "petrochemical"),
+            "expected_sections": ("Introduction", "Body Content", "Conclusion"),
+            "min_words": 1200,
+            "max_words": 3000
+        }
+    )
+)
+
+def _make_mock_messages(text):
+    """Create a mock messages resource whose create() returns text."""
+    mock_messages = MagicMock(spec_set=["create"])
+    response = SimpleNamespace(content=[SimpleNamespace(text=text)])
+    mock_messages.create = AsyncMock(return_value=response)
+    return mock_messages
+
+@pytest.fixture(scope="module")
+def mock_env_vars():
+    """Set up mock environment variables for the whole module."""
+    with pytest.MonkeyPatch.context() as mp:
+        # Only set test API key if real one is not provided
+        if not os.getenv("ANTHROPIC_API_KEY"):
+            mp.setenv("ANTHROPIC_API_KEY", "test_api_key")
+        mp.setenv("ANTHROPIC_MODEL", "claude-3-opus-20240229")  # Updated to latest model
+        mp.setenv("MAX_TOKENS", "4096")
+        mp.setenv("TEMPERATURE", "0.7")
+        mp.setenv("MIN_ARTICLE_LENGTH", "1200")
+        mp.setenv("MAX_ARTICLE_LENGTH", "3000")
+        yield mp
+
+@pytest.fixture(scope="module")
 def setup_logging():
     """Configure logging for tests."""
     logging.basicConfig(level=logging.INFO)
     yield
     logging.getLogger().handlers = []
 
-@pytest.fixture
-def article_generator(mock_env_vars, setup_logging):
-    """Create an ArticleGenerator instance with mocked environment variables."""
+@pytest.fixture(scope="module")
+def _shared_article_generator(mock_env_vars, setup_logging):
+    """Create one ArticleGenerator for every test in the module."""
     api_key = os.getenv("ANTHROPIC_API_KEY")
     return ArticleGenerator(api_key=api_key)
 
+@pytest.fixture
+def article_generator(_shared_article_generator):
+    """Hand out the shared ArticleGenerator, undoing each test's changes to it."""
+    generator = _shared_article_generator
+    # Tests swap out client.messages, evaluator methods and settings, so
+    # restore every attribute and empty the caches afterwards
+    objects = (generator, generator.client, generator.evaluator)
+    snapshots = [dict(vars(obj)) for obj in objects]
+    yield generator
+    for obj, snapshot in zip(objects, snapshots):
+        vars(obj).clear()
+        vars(obj).update(snapshot)
+    generator._cache.clear()
+    generator._pending_evaluations.clear()
+    generator.evaluator._cache.clear()
+
 @pytest.fixture
 def mock_critique_response():
     """Mock response for the critique model."""
@@ -157,12 +262,22 @@ def mock_critique_response():
 class TestArticleGenerator:
     """Test suite for ArticleGenerator class."""
 
-    def test_initialization(self, mock_env_vars):
+    @pytest.mark.parametrize("env,model,max_tokens,temperature", [
+        ({}, "claude-3-opus-20240229", 4096, 0.7),
+        (
+            {"ANTHROPIC_API_KEY": "custom_api_key", "ANTHROPIC_MODEL": "custom-model",
+             "MAX_TOKENS": "5000", "TEMPERATURE": "0.5"},
+            "custom-model", 5000, 0.5
+        ),
+    ])
+    def test_initialization(self, mock_env_vars, monkeypatch, env, model, max_tokens, temperature):
         """Test ArticleGenerator initialization with environment variables."""
+        for key, value in env.items():
+            monkeypatch.setenv(key, value)
         generator = ArticleGenerator()
-        assert generator.model == "claude-3-opus-20240229"
-        assert generator.max_tokens == 4096
-        assert generator.temperature == 0.7
+        assert generator.model == model
+        assert generator.max_tokens == max_tokens
+        assert generator.temperature == temperature
         assert isinstance(generator.client, AsyncAnthropic)
 
     def test_initialization_with_custom_api_key(self):
@@ -176,56 +291,32 @@ class TestArticleGenerator:
         monkeypatch.delenv("ANTHROPIC_API_KEY", raising=False)
         with pytest.raises(ValueError) as exc_info:
             ArticleGenerator()
-        assert "API key must be provided" in str(exc_info.value)
+        assert "API key must be provided either directly or via ANTHROPIC_API_KEY environment variable" in str(exc_info.value)
 
-    @pytest.mark.asyncio
-    async def test_article_generation(self, mock_env_vars, mock_anthropic_client):
+    @pytest.mark.asyncio(scope="module")
+    async def test_article_generation(self, article_generator, mock_anthropic):
         """Test article generation with mocked client."""
-        with patch('anthropic.AsyncAnthropic', return_value=mock_anthropic_client):
-            generator = ArticleGenerator()
-            result = await generator.generate_article(
-                title="Test Topic",
-                keywords=["test", "keywords"]
-            )
-
-            assert isinstance(result, dict)
-            assert "title" in result
-            assert "content" in result
-            assert "keywords" in result
-            assert result["title"] == "Test Topic"
-            assert result["keywords"] == ["test", "keywords"]
-
-    @pytest.mark.asyncio
-    async def test_article_structure(self, mock_env_vars, mock_anthropic_client, test_article_data):
-        """Test article structure requirements."""
-        with patch('anthropic.AsyncAnthropic', return_value=mock_anthropic_client):
-            generator = ArticleGenerator()
-            
-            for test_case in test_article_data:
-                result = await generator.generate_article(
-                    title=test_case["topic"],
-                    keywords=test_case["keywords"]
-                )
-                
-                content = result["content"]
-                
-                # Check sections
-                for section in test_case["expected_sections"]:
-                    assert f"## {section}" in content
-                
-                # Check keywords
-                for keyword in test_case["keywords"]:
-                    assert keyword.lower() in content.lower()
+        article_generator.client = mock_anthropic.client
+        result = await article_generator.generate_article(
+            title="Test Topic",
+            keywords=["test", "keywords"]
+        )
 
-    def test_seo_prompt_creation(self, mock_env_vars):
+        assert isinstance(result, dict)
+        assert "title" in result
+        assert "content" in result
+        assert "keywords" in result
+        assert result["title"] == "Test Topic"
+        assert result["keywords"] == ["test", "keywords"]
+
+    @pytest.mark.parametrize("keywords", [["test", "keyword"], ["keyword1", "keyword2"]])
+    def test_seo_prompt_creation(self, article_generator, keywords):
         """Test SEO prompt creation."""
-        generator = ArticleGenerator()
         topic = "Test Topic"
-        keywords = ["test", "keyword"]
         min_length = 1000
         max_length = 2000
         
-        prompt = generator._create_seo_prompt(topic, keywords, min_length, max_length)
+        prompt = article_generator._create_seo_prompt(topic, keywords, min_length, max_length)
         
         # Check prompt content
         assert topic in prompt
@@ -236,9 +327,18 @@ class TestArticleGenerator:
         assert "Required Content Structure:" in prompt
         assert "Format Requirements:" in prompt
         assert "Regional Context:" in prompt
+        
+        # Check for YAML frontmatter markers and metadata
+        match = _FRONTMATTER_RE.search(prompt)
+        assert match is None, f"Found frontmatter indicator: {match.group(0)!r}"
+        
+        # Ensure the word YAML only appears in instructions about not including it
+        yaml_mentions = len(_YAML_RE.findall(prompt))
+        assert yaml_mentions <= 1, "YAML mentioned more than once in prompt"
+        assert _YAML_EXCLUSION_RE.search(prompt), "Missing instruction about YAML exclusion"
 
-    @pytest.mark.asyncio
-    async def test_error_handling(self, mock_env_vars):
+    @pytest.mark.asyncio(scope="module")
+    async def test_error_handling(self, article_generator):
         """Test error handling during article generation."""
         # Create a mock request and response
         mock_request = MagicMock()
@@ -250,34 +350,33 @@ class TestArticleGenerator:
         mock_response.text = "API Error"
         
         # Create a mock API error
-        error = APIError(request=mock_request)
+        error = APIError("API Error", request=mock_request, body=None)
         error.status_code = 500
         error.response = mock_response
 
-        # Create a mock client that raises our error
-        mock_client = AsyncMock()
-        mock_client.messages.create.side_effect = error
+        # Make the client's create call raise our error
+        mock_messages = MagicMock(spec_set=["create"])
+        mock_messages.create = AsyncMock(side_effect=error)
+        article_generator.client.messages = mock_messages
         
-        with patch('anthropic.AsyncAnthropic', return_value=mock_client):
-            generator = ArticleGenerator()
-            
-            with pytest.raises(APIError) as exc_info:
-                await generator.generate_article(
-                    title="Test Topic",
-                    keywords=["test"]
-                )
-            
-            # Verify error handling
-            assert exc_info.value.status_code == 500
-            assert exc_info.value.response.status_code == 500
-            assert exc_info.value.response.text == "API Error"
+        with pytest.raises(APIError) as exc_info:
+            await article_generator.generate_article(
+                title="Test Topic",
+                keywords=["test"]
+            )
+        
+        # Verify error handling
+        assert exc_info.value.status_code == 500
+        assert exc_info.value.response.status_code == 500
+        assert exc_info.value.response.text == "API Error"
 
     @pytest.mark.integration
+    @pytest.mark.slow
     @pytest.mark.skipif(
         not os.getenv("ANTHROPIC_API_KEY") or os.getenv("ANTHROPIC_API_KEY") == "test_api_key",
         reason="Integration test requires valid ANTHROPIC_API_KEY"
     )
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(scope="module")
     async def test_live_api_integration(self, mock_env_vars):
         """Test integration with live Anthropic API."""
         generator = ArticleGenerator()
@@ -288,73 +387,17 @@ class TestArticleGenerator:
         
         assert isinstance(result, dict)
         assert len(result["content"]) > 1000
-        assert all(keyword in result["content"].lower() for keyword in ["safety", "industrial", "protocols"])
+        content_lower = result["content"].lower()
+        assert all(keyword in content_lower for keyword in ["safety", "industrial", "protocols"])
 
 class TestArticleGeneration:
     """Test suite for article generation features."""
     
-    @pytest.mark.asyncio
-    @pytest.mark.parametrize("test_case", TEST_ARTICLES)
+    @pytest.mark.asyncio(scope="module")
+    @pytest.mark.parametrize("test_case", TEST_ARTICLES, ids=[case["topic"] for case in TEST_ARTICLES])
     async def test_article_structure(self, article_generator, test_case):
         """Test article structure and content requirements."""
-        # Base content sections
-        intro_base = f"""Welcome to our comprehensive guide on {test_case['topic'].lower()}. As a leading provider in Coatzacoalcos, we understand the unique challenges and requirements of our region. Our team brings extensive experience and expertise to every project, ensuring the highest quality standards and customer satisfaction. We specialize in delivering tailored solutions that meet the specific needs of both residential and commercial clients in the Gulf of Mexico region.
-
-Our commitment to excellence has made us the preferred choice for clients seeking reliable and professional {test_case['topic'].lower()} solutions. With years of experience serving the Coatzacoalcos area, we have developed a deep understanding of local requirements, environmental considerations, and industry-specific challenges. Our team of certified professionals is dedicated to delivering exceptional results while maintaining the highest standards of safety and quality.
-
-In this comprehensive guide, we will explore our range of services, our approach to project management, and the unique advantages we offer to our clients. Whether you're planning a new construction project, require industrial maintenance, or need specialized services, we have the expertise and resources to meet your requirements effectively."""
-
-        body_base = f"""Our {test_case['topic'].lower()} division offers a complete range of professional services designed to meet the demanding requirements of our clients. We employ cutting-edge technology and industry-best practices to deliver exceptional results. Our team of certified professionals ensures that every project is completed to the highest standards of quality and safety.
-
-We specialize in: {', '.join(test_case['keywords'])}. Each of these services is delivered with our commitment to excellence and attention to detail. We understand the unique challenges posed by our coastal environment, including high humidity and corrosion issues, and have developed specialized approaches to address these concerns effectively.
-
-Our comprehensive approach includes:
-1. Detailed project planning and assessment - We begin each project with a thorough analysis of requirements, site conditions, and potential challenges.
-2. Implementation of industry-leading safety protocols - Safety is our top priority. We maintain strict safety standards.
-3. Regular quality control inspections - Our quality assurance team conducts regular inspections throughout the project lifecycle.
-4. Ongoing maintenance and support services - We provide comprehensive maintenance programs.
-5. Emergency response capabilities - Our 24/7 emergency response team is always ready.
-
-Our Technical Expertise:
-- Latest construction and maintenance techniques
-- Advanced project management methodologies
-- Environmental protection standards
-- Safety regulations and best practices
-- Quality control systems
-
-Regional Considerations:
-- High humidity and corrosion protection
-- Tropical weather considerations
-- Industrial zone requirements
-- Environmental protection measures
-- Local building codes and regulations"""
-
-        conclusion_base = f"""Our commitment to excellence in {test_case['topic'].lower()} sets us apart in the Coatzacoalcos region. We invite you to experience the difference our professional services can make for your project. Contact us today to discuss your specific requirements and learn how we can help you achieve your objectives efficiently and effectively.
-
-With our proven track record of successful projects, comprehensive service offerings, and dedication to customer satisfaction, we are confident in our ability to meet and exceed your expectations. Our investment in advanced technology, ongoing training, and quality management systems ensures that we remain at the forefront of industry developments."""
-
-        # Repeat sections to meet minimum word count
-        intro = intro_base * 2
-        body = body_base * 3
-        conclusion = conclusion_base * 2
-
-        mock_content = f"""# {test_case['topic']}
-
-## Introduction
-{intro}
-
-## Body Content
-{body}
-
-## Conclusion
-{conclusion}"""
-
-        mock_response = MagicMock()
-        mock_response.content = [MagicMock(text=mock_content)]
-        
-        # Setup mock
-        mock_messages = MagicMock()
-        mock_messages.create = AsyncMock(return_value=mock_response)
+        mock_messages = _make_mock_messages(test_case["mock_content"])
         article_generator.client.messages = mock_messages
         
         # Generate article
@@ -368,38 +411,14 @@ With our proven track record of successful projects, comprehensive service offer
         assert all(section in content for section in test_case['expected_sections'])
         
         # Keyword validation
-        assert all(keyword.lower() in content.lower() for keyword in test_case['keywords'])
+        content_lower = content.lower()
+        assert all(keyword.lower() in content_lower for keyword in test_case['keywords'])
         
         # Length validation
         word_count = len(content.split())
         assert test_case['min_words'] <= word_count <= test_case['max_words'], \
             f"Article length {word_count} words is outside bounds {test_case['min_words']}-{test_case['max_words']}"
 
-    def test_no_yaml_frontmatter(self, article_generator):
-        """Test that YAML frontmatter is not included in the prompt."""
-        topic = "Test Topic"
-        keywords = ["test", "keywords"]
-        prompt = article_generator._create_seo_prompt(topic, keywords)
-        
-        # Check for YAML frontmatter markers and metadata
-        frontmatter_indicators = [
-            "---\n",
-            "\n---",
-            "frontmatter:",
-            "metadata:",
-            "categories:",
-            "reading time:",
-            "meta description:"
-        ]
-        
-        for indicator in frontmatter_indicators:
-            assert indicator not in prompt, f"Found frontmatter indicator: {indicator}"
-        
-        # Ensure the word YAML only appears in instructions about not including it
-        yaml_mentions = prompt.lower().count("yaml")
-        assert yaml_mentions <= 1, "YAML mentioned more than once in prompt"
-        assert "do not include any yaml" in prompt.lower(), "Missing instruction about YAML exclusion"
-
     def test_logging_setup(self, article_generator, caplog):
         """Test logging configuration."""
         caplog.set_level(logging.INFO)
@@ -415,7 +434,7 @@ With our proven track record of successful projects, comprehensive service offer
         assert any("starting article generation" in record.message.lower() for record in caplog.records)
         assert any("completed article generation" in record.message.lower() for record in caplog.records)
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(scope="module")
     async def test_content_quality(self, article_generator):
         """Test content quality using automated evaluation."""
         # Mock article generation
@@ -432,12 +451,7 @@ This is the main content with test and keywords.
 ## Conclusion
 This is the conclusion."""
         
-        mock_response = MagicMock()
-        mock_response.content = [MagicMock(text=mock_content)]
-        
-        # Setup mock
-        mock_messages = MagicMock()
-        mock_messages.create = AsyncMock(return_value=mock_response)
+        mock_messages = _make_mock_messages(mock_content)
         article_generator.client.messages = mock_messages
         
         # Generate article
@@ -457,30 +471,23 @@ This is the conclusion."""
         assert content.count("#") >= 4, "Should have at least 4 headings (title + 3 sections)"
 
     @pytest.mark.integration
-    @pytest.mark.asyncio
+    @pytest.mark.slow
+    @pytest.mark.asyncio(scope="module")
     async def test_llm_integration(self, article_generator):
         """Integration test using actual LLM to generate and validate content."""
         try:
             # Debug environment
-            print("\n=== Environment Debug ===")
-            print("Command line environment:")
-            import sys
-            print(f"sys.argv: {sys.argv}")
-            print("\nEnvironment variables:")
-            for key, value in os.environ.items():
-                if 'API' in key or 'TOKEN' in key:
-                    print(f"{key}: {'*' * 10}{value[-5:]}")
-                else:
-                    print(f"{key}: {value}")
-            
-            print("\nArticleGenerator configuration:")
-            print(f"API Key present: {bool(article_generator.api_key)}")
-            if article_generator.api_key:
-                print(f"API Key length: {len(article_generator.api_key)}")
-                print(f"API Key starts with: {article_generator.api_key[:10]}...")
-            print(f"Model: {article_generator.model}")
-            print(f"Max tokens: {article_generator.max_tokens}")
-            print(f"Temperature: {article_generator.temperature}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Environment variables:\n%s", "\n".join(
+                    f"{key}: {'*' * 10}{value[-5:]}" if 'API' in key or 'TOKEN' in key else f"{key}: {value}"
+                    for key, value in os.environ.items()
+                ))
+            logger.debug(
+                "ArticleGenerator configuration: API key present: %s, model: %s, "
+                "max tokens: %s, temperature: %s",
+                bool(article_generator.api_key), article_generator.model,
+                article_generator.max_tokens, article_generator.temperature
+            )
 
             # Simple test case
             test_case = {
@@ -502,37 +509,32 @@ This is the conclusion."""
             # Content validation
             content = result["content"]
             
-            print("\n=== Generated Content ===")
-            print(content)
+            logger.debug("Generated content:\n%s", content)
             
             # Basic validation
             assert content.strip(), "Content should not be empty"
             assert len(content.split()) >= test_case["min_words"], "Content should meet minimum length"
-            
-            print("\nTest passed successfully!")
 
         except Exception as e:
-            print(f"\nDetailed error in test_llm_integration: {str(e)}")
+            logger.debug("Detailed error in test_llm_integration: %s", e)
             if hasattr(e, 'response'):
-                print(f"Response details: {e.response}")
+                logger.debug("Response details: %s", e.response)
             if hasattr(e, 'content'):
-                print(f"Generated content:\n{e.content}")
+                logger.debug("Generated content:\n%s", e.content)
             pytest.skip(f"Integration test failed: {str(e)}")
 
     @pytest.mark.integration
+    @pytest.mark.slow
     @pytest.mark.skipif(
         not os.getenv("ANTHROPIC_API_KEY") or os.getenv("ANTHROPIC_API_KEY") == "test_api_key",
         reason="Integration test requires valid ANTHROPIC_API_KEY"
     )
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(scope="module")
     async def test_llm_prompt_effectiveness(self, article_generator):
         """Test the effectiveness of our prompts with the actual LLM."""
         # Debug API key information
         api_key = os.getenv("ANTHROPIC_API_KEY")
-        print("\nAPI Key Debug:")
-        print(f"API Key present: {bool(api_key)}")
-        print(f"API Key length: {len(api_key) if api_key else 0}")
-        print(f"API Key starts with: {api_key[:15]}..." if api_key else "No API key")
+        logger.debug("API key present: %s, length: %d", bool(api_key), len(api_key) if api_key else 0)
         
         try:
             # Use the shared prompt function
@@ -543,21 +545,19 @@ This is the conclusion."""
             ]
 
             for title, keywords in topics:
-                print(f"\nTesting title: {title}")
+                logger.debug("Testing title: %s", title)
                 
                 # Generate article
                 result = await article_generator.generate_article(title=title, keywords=keywords)
                 content = result["content"]
                 
                 # Debug information
-                print("\nGenerated content first 100 characters:")
-                print(repr(content[:100]))
-                
-                print("\nExpected title:")
-                print(repr(f"# {title}"))
-                
-                print("\nGenerated content structure:")
-                print("\n".join(line for line in content.split("\n") if line.startswith("#")))
+                logger.debug("Generated content first 100 characters: %r", content[:100])
+                logger.debug("Expected title: %r", f"# {title}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Generated content structure:\n%s", "\n".join(
+                        line for line in content.split("\n") if line.startswith("#")
+                    ))
                 
                 # Clean content for consistent comparison
                 content_lines = content.strip().split("\n")
@@ -573,62 +573,53 @@ This is the conclusion."""
                 )
                 
                 word_count = len(content.split())
-                print(f"Generated content length: {word_count} words")
+                logger.debug("Generated content length: %d words", word_count)
 
                 # Basic validation
                 assert content.strip(), "Content should not be empty"
-                assert len(content.split()) >= 1200, "Content should meet minimum length"
+                assert word_count >= 1200, "Content should meet minimum length"
                 
                 # Structure validation
                 sections = ["Introduction", "Body Content", "Conclusion"]
                 for section in sections:
                     section_header = f"## {section}"
                     assert section_header in content, f"Missing section: {section_header}"
-                    section_index = content.index(section_header)
-                    print(f"\nFound section '{section}' at position {section_index}")
 
                 # Keyword usage validation
+                content_lower = content.lower()
                 for keyword in keywords:
                     keyword_lower = keyword.lower()
-                    assert keyword_lower in content.lower(), f"Missing keyword: {keyword}"
-                    print(f"\nFound keyword '{keyword}' in content")
+                    assert keyword_lower in content_lower, f"Missing keyword: {keyword}"
 
                 # Quality checks
                 numbered_lists = content.count("1.")
                 bullet_points = content.count("- ")
                 paragraphs = content.count("\n\n")
                 
-                print(f"\nQuality metrics:")
-                print(f"- Numbered lists: {numbered_lists}")
-                print(f"- Bullet points: {bullet_points}")
-                print(f"- Paragraphs: {paragraphs}")
+                logger.debug(
+                    "Quality metrics: %d numbered lists, %d bullet points, %d paragraphs",
+                    numbered_lists, bullet_points, paragraphs
+                )
 
                 assert numbered_lists >= 3, f"Should have at least 3 numbered items (found {numbered_lists})"
                 assert bullet_points >= 5, f"Should have at least 5 bullet points (found {bullet_points})"
                 assert paragraphs >= 5, f"Should have multiple paragraphs (found {paragraphs})"
 
-                print("\nAll validations passed successfully!")
-
         except Exception as e:
-            print(f"\nDetailed error in test_llm_prompt_effectiveness: {str(e)}")
+            logger.debug("Detailed error in test_llm_prompt_effectiveness: %s", e)
             if hasattr(e, 'response'):
-                print(f"Response details: {e.response}")
+                logger.debug("Response details: %s", e.response)
             if hasattr(e, 'content'):
-                print(f"Generated content:\n{e.content}")
+                logger.debug("Generated content:\n%s", e.content)
             pytest.skip(f"Integration test failed: {str(e)}")
 
-@pytest.mark.asyncio
+@pytest.mark.asyncio(scope="module")
 async def test_generate_article_success(article_generator):
     """Test successful article generation."""
     # Mock data
     title = "Test Topic"
     keywords = ["test", "keywords"]
-    mock_response = MagicMock()
-    mock_response.content = [MagicMock(text="Test article content")]
-    
-    # Create a mock messages object
-    mock_messages = MagicMock()
-    mock_messages.create = AsyncMock(return_value=mock_response)
+    mock_messages = _make_mock_messages("Test article content")
     
     # Replace the client's messages attribute
     article_generator.client.messages = mock_messages
@@ -649,7 +640,7 @@ async def test_generate_article_success(article_generator):
     assert call_args["max_tokens"] == article_generator.max_tokens
     assert call_args["temperature"] == article_generator.temperature
 
-@pytest.mark.asyncio
+@pytest.mark.asyncio(scope="module")
 async def test_generate_article_error(article_generator):
     """Test article generation with API error."""
     # Mock data
@@ -657,7 +648,7 @@ async def test_generate_article_error(article_generator):
     keywords = ["test", "keywords"]
     
     # Create a mock messages object that raises an exception
-    mock_messages = MagicMock()
+    mock_messages = MagicMock(spec_set=["create"])
     mock_messages.create = AsyncMock(side_effect=Exception("API Error"))
     
     # Replace the client's messages attribute
@@ -668,45 +659,171 @@ async def test_generate_article_error(article_generator):
         await article_generator.generate_article(title=title, keywords=keywords)
     assert str(exc_info.value) == "API Error"
 
-def test_create_seo_prompt(article_generator):
-    """Test SEO prompt creation."""
-    # Test data
-    topic = "Test Topic"
-    keywords = ["keyword1", "keyword2"]
-    min_length = 1000
-    max_length = 2000
-    
-    # Generate prompt
-    prompt = article_generator._create_seo_prompt(topic, keywords, min_length, max_length)
-    
-    # Verify prompt content
-    assert topic in prompt
-    assert all(keyword in prompt for keyword in keywords)
-    assert str(min_length) in prompt
-    assert str(max_length) in prompt
-    assert "Do not include any YAML frontmatter" in prompt
-    assert "Required Content Structure:" in prompt
-
-def test_init_without_api_key(monkeypatch):
-    """Test initialization without API key."""
-    monkeypatch.delenv("ANTHROPIC_API_KEY", raising=False)
-    
-    with pytest.raises(ValueError) as exc_info:
-        ArticleGenerator()
-    assert "API key must be provided either directly or via ANTHROPIC_API_KEY environment variable" in str(exc_info.value)
-
-def test_init_with_custom_env_vars(monkeypatch):
-    """Test initialization with custom environment variables."""
-    # Set custom environment variables
-    monkeypatch.setenv("ANTHROPIC_API_KEY", "custom_api_key")
-    monkeypatch.setenv("ANTHROPIC_MODEL", "custom-model")
-    monkeypatch.setenv("MAX_TOKENS", "5000")
-    monkeypatch.setenv("TEMPERATURE", "0.5")
-    
-    # Create instance
-    generator = ArticleGenerator()
-    
-    # Verify custom values
-    assert generator.model == "custom-model"
-    assert generator.max_tokens == 5000
-    assert generator.temperature == 0.5 
\ No newline at end of file
+class _MockStream:
+    """Stand-in for the async context manager returned by messages.stream."""
+    
+    def __init__(self, chunks):
+        self.chunks = chunks
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        pass
+    
+    @property
+    async def text_stream(self):
+        for chunk in self.chunks:
+            yield chunk
+    
+    async def get_final_message(self):
+        message = MagicMock(spec_set=["content"])
+        message.content = [MagicMock(spec_set=["text"], text="".join(self.chunks))]
+        return message
+
+@pytest.mark.asyncio(scope="module")
+async def test_generate_article_streaming(article_generator):
+    """Test streamed generation reports chunks and the article prefix."""
+    chunks = ["# Test Topic\n", "Intro text. ", "Body text."]
+    mock_messages = MagicMock(spec_set=["stream"])
+    mock_messages.stream = MagicMock(side_effect=lambda **kwargs: _MockStream(chunks))
+    article_generator.client.messages = mock_messages
+    article_generator.evaluator.evaluate_semantic_llm = AsyncMock(return_value={})
+    
+    tokens = []
+    prefixes = []
+    result = await article_generator.generate_article(
+        title="Test Topic",
+        keywords=["test"],
+        on_token=tokens.append,
+        on_prefix=prefixes.append,
+        prefix_chars=20
+    )
+    
+    assert result["content"] == "".join(chunks)
+    assert tokens == chunks
+    assert prefixes == ["# Test Topic\nIntro text. "]
+    
+    streamed = [text async for text in article_generator.stream_article("Test Topic", ["test"])]
+    assert streamed == chunks
+
+@pytest.mark.asyncio(scope="module")
+async def test_generate_article_cache(article_generator):
+    """Test repeated requests reuse the cached article."""
+    mock_messages = _make_mock_messages("Test article content")
+    article_generator.client.messages = mock_messages
+    article_generator.evaluator.evaluate_semantic_llm = AsyncMock(return_value={"score": 1})
+    article_generator.cache_size = 8
+    
+    first = await article_generator.generate_article(title="Test Topic", keywords=["a", "b"])
+    second = await article_generator.generate_article(title="Test Topic", keywords=[" B", "a"])
+    assert second["content"] == first["content"]
+    assert second["keywords"] == [" B", "a"]
+    assert mock_messages.create.call_count == 1
+    assert article_generator.evaluator.evaluate_semantic_llm.call_count == 1
+    
+    await article_generator.generate_article(title="Other Topic", keywords=["a", "b"])
+    assert mock_messages.create.call_count == 2
+
+# Needs its own loop, since the API semaphore is sized once per loop
+@pytest.mark.asyncio
+async def test_generate_article_concurrency_limit(article_generator, monkeypatch):
+    """Test concurrent generations never exceed the API request limit."""
+    monkeypatch.setenv("ANTHROPIC_MAX_CONCURRENCY", "2")
+    in_flight = peak = 0
+    
+    async def create(**kwargs):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return SimpleNamespace(content=[SimpleNamespace(text="Test article content")])
+    
+    mock_messages = MagicMock(spec_set=["create"])
+    mock_messages.create = create
+    article_generator.client.messages = mock_messages
+    article_generator.evaluator.evaluate_semantic_llm = AsyncMock(return_value={"score": 1})
+    
+    await asyncio.gather(*(
+        article_generator.generate_article(title=f"Topic {i}", keywords=["test"])
+        for i in range(6)
+    ))
+    assert peak == 2
+
+@pytest.mark.asyncio(scope="module")
+async def test_generate_article_without_waiting_for_llm_eval(article_generator):
+    """Test results can be returned before the LLM judge finishes."""
+    mock_messages = _make_mock_messages("# Test Topic\n\n## Introduction\n\nA test article.")
+    article_generator.client.messages = mock_messages
+    
+    judged = asyncio.Event()
+    
+    async def evaluate(**kwargs):
+        await judged.wait()
+        return {"overall_score": 8}
+    
+    article_generator.evaluator.evaluate_semantic_llm = evaluate
+    
+    result = await article_generator.generate_article(
+        title="Test Topic", keywords=["test"], wait_for_llm_eval=False
+    )
+    assert result["evaluation"] is None
+    assert result["structural_evaluation"]["has_title"]
+    assert result["structural_evaluation"]["has_introduction"]
+    
+    judged.set()
+    while article_generator._pending_evaluations:
+        await asyncio.sleep(0)
+    assert result["evaluation"] == {"overall_score": 8}
+
+@pytest.mark.asyncio(scope="module")
+async def test_background_llm_eval_failure_is_logged(article_generator, caplog):
+    """Test a background LLM judge failure is logged rather than lost."""
+    mock_messages = _make_mock_messages("# Test Topic\n\n## Introduction\n\nA test article.")
+    article_generator.client.messages = mock_messages
+    article_generator.evaluator.evaluate_semantic_llm = AsyncMock(
+        side_effect=RuntimeError("judge crashed")
+    )
+    
+    result = await article_generator.generate_article(
+        title="Test Topic", keywords=["test"], wait_for_llm_eval=False
+    )
+    while article_generator._pending_evaluations:
+        await asyncio.sleep(0)
+    
+    assert result["evaluation"] is None
+    assert "Background LLM evaluation failed: RuntimeError: judge crashed" in caplog.text
+
+@pytest.mark.asyncio(scope="module")
+async def test_generate_article_without_llm_judge(article_generator):
+    """Test disabling the LLM judge skips the evaluation call."""
+    mock_messages = _make_mock_messages("# Test Topic\n\n## Introduction\n\nA test article.")
+    article_generator.client.messages = mock_messages
+    article_generator.evaluator.evaluate_semantic_llm = AsyncMock()
+    article_generator.evaluator.llm_judge_enabled = False
+    
+    result = await article_generator.generate_article(title="Test Topic", keywords=["test"])
+    
+    assert result["evaluation"] is None
+    assert result["structural_evaluation"]["keyword_hits"] == 2
+    article_generator.evaluator.evaluate_semantic_llm.assert_not_called()
+
+@pytest.mark.asyncio(scope="module")
+async def test_generate_article_cache_ttl(article_generator):
+    """Test cached articles expire after the configured TTL."""
+    mock_messages = _make_mock_messages("Test article content")
+    article_generator.client.messages = mock_messages
+    article_generator.evaluator.evaluate_semantic_llm = AsyncMock(return_value={"score": 1})
+    article_generator.cache_size = 8
+    article_generator.cache_ttl = 60
+    
+    await article_generator.generate_article(title="Test Topic", keywords=["test"])
+    await article_generator.generate_article(title="Test Topic", keywords=["test"])
+    assert mock_messages.create.call_count == 1
+    
+    # Age the entry past the TTL
+    (key, (stored_at, data)), = article_generator._cache.items()
+    article_generator._cache[key] = (stored_at - 61, data)
+    await article_generator.generate_article(title="Test Topic", keywords=["test"])
+    assert mock_messages.create.call_count == 2
@@ -1,20 +1,24 @@
 """Tests for the evaluation module."""
 
 import os
+import asyncio
 import pytest
 import json
 from datetime import datetime, timedelta
+from types import SimpleNamespace
 from unittest.mock import AsyncMock, MagicMock, patch
 
+import httpx
+
 from article_generation.evaluation.trace_logger import TraceLogger
-from article_generation.evaluation.evaluator import ArticleEvaluator
+from article_generation.evaluation.evaluator import ArticleEvaluator, count_words, _LoopBoundTransport
 
 @pytest.fixture
 def trace_logger(tmp_path):
     """Create a trace logger that uses a temporary directory."""
     return TraceLogger(trace_dir=str(tmp_path))
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def mock_article():
     """Create a mock article for testing."""
     return {
@@ -32,7 +36,7 @@ This is the main content.
 This is the conclusion."""
     }
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def mock_evaluation():
     """Create a mock evaluation response."""
     return {
@@ -61,6 +65,18 @@ def mock_evaluation():
         ]
     }
 
+@pytest.fixture(scope="module")
+def mock_evaluation_json(mock_evaluation):
+    """Serialize the mock evaluation once for the whole module."""
+    return json.dumps(mock_evaluation)
+
+def _make_mock_messages(text):
+    """Create a mock messages resource whose create() returns text."""
+    mock_messages = MagicMock(spec_set=["create"])
+    response = SimpleNamespace(content=[SimpleNamespace(text=text)])
+    mock_messages.create = AsyncMock(return_value=response)
+    return mock_messages
+
 class TestTraceLogger:
     """Test suite for TraceLogger."""
     
@@ -83,11 +99,26 @@ class TestTraceLogger:
         assert path.startswith(trace_logger.success_dir)
         
         with open(path) as f:
-            trace = json.load(f)
+            trace = json.loads(f.readlines()[-1])
             assert trace["title"] == mock_article["title"]
             assert trace["keywords"] == mock_article["keywords"]
             assert trace["error"] is None
     
+    @pytest.mark.asyncio
+    async def test_log_trace_async(self, trace_logger, mock_article):
+        """Test logging a trace from a worker thread."""
+        path = await trace_logger.log_trace_async(
+            title=mock_article["title"],
+            keywords=mock_article["keywords"],
+            prompt="Test prompt",
+            response=mock_article
+        )
+        
+        assert path.startswith(trace_logger.success_dir)
+        with open(path) as f:
+            trace = json.loads(f.readlines()[-1])
+            assert trace["title"] == mock_article["title"]
+    
     def test_log_error_trace(self, trace_logger, mock_article):
         """Test logging a failed generation."""
         error = Exception("Test error")
@@ -103,7 +134,7 @@ class TestTraceLogger:
         assert path.startswith(trace_logger.error_dir)
         
         with open(path) as f:
-            trace = json.load(f)
+            trace = json.loads(f.readlines()[-1])
             assert trace["error"] == str(error)
     
     def test_get_traces(self, trace_logger, mock_article):
@@ -138,10 +169,77 @@ class TestTraceLogger:
             start_date=datetime.now() + timedelta(days=1)
         )
         assert len(future_traces) == 0
+    
+    def test_get_traces_skips_files_outside_range(self, trace_logger, mock_article, caplog):
+        """Test out-of-range trace files are skipped by filename without parsing."""
+        trace_logger.log_trace(
+            title=mock_article["title"],
+            keywords=mock_article["keywords"],
+            prompt="Test prompt",
+            response=mock_article
+        )
+        
+        # An unparseable file that would log an error if it were opened
+        stale_path = os.path.join(trace_logger.success_dir, "stale_20000101_000000.json")
+        with open(stale_path, "w") as f:
+            f.write("not json")
+        
+        traces = trace_logger.get_traces(start_date=datetime.now() - timedelta(days=1))
+        assert len(traces) == 1
+        assert "Failed to load trace" not in caplog.text
+
+@pytest.mark.parametrize("text", [
+    "",
+    "   ",
+    "one",
+    "  leading and trailing  ",
+    "tabs\tand\nnewlines\r\nand\x0bvertical\x0cfeeds",
+    "separators\x1cand\x1fcontrol",
+    "Introducción: niño, café y acción",
+    "no\u00a0break\u2003em space\u3000ideographic",
+])
+def test_count_words(text):
+    """Test count_words matches str.split word counts."""
+    assert count_words(text) == len(text.split())
+
+def test_evaluators_share_connection_pool():
+    """Test evaluator instances reuse one HTTP connection pool."""
+    first = ArticleEvaluator(api_key="test_key")
+    second = ArticleEvaluator(api_key="other_key")
+    assert first.client._client is second.client._client
+
+def test_http_pool_rebuilt_per_event_loop():
+    """Test pooled connections are not reused from a different event loop."""
+    pools = []
+    
+    def make_pool(**kwargs):
+        pools.append(httpx.MockTransport(lambda request: httpx.Response(200)))
+        return pools[-1]
+    
+    transport = _LoopBoundTransport(http2=True)
+    
+    async def send_twice():
+        for _ in range(2):
+            response = await transport.handle_async_request(httpx.Request("GET", "https://example.com"))
+            assert response.status_code == 200
+    
+    with patch("httpx.AsyncHTTPTransport", side_effect=make_pool):
+        asyncio.run(send_twice())
+        assert len(pools) == 1
+        asyncio.run(send_twice())
+        assert len(pools) == 2
 
 class TestArticleEvaluator:
     """Test suite for ArticleEvaluator."""
     
+    @pytest.fixture(autouse=True)
+    def _stub_anthropic(self, monkeypatch):
+        """Skip building real Anthropic clients; each test supplies client.messages."""
+        monkeypatch.setattr(
+            "article_generation.evaluation.evaluator.AsyncAnthropic",
+            lambda **kwargs: SimpleNamespace(messages=None)
+        )
+    
     def test_initialization(self):
         """Test ArticleEvaluator initialization."""
         evaluator = ArticleEvaluator(api_key="test_key")
@@ -157,16 +255,12 @@ class TestArticleEvaluator:
         assert "API key must be provided" in str(exc_info.value)
     
     @pytest.mark.asyncio
-    async def test_evaluate_article(self, mock_article, mock_evaluation):
+    async def test_evaluate_article(self, mock_article, mock_evaluation, mock_evaluation_json):
         """Test article evaluation."""
         evaluator = ArticleEvaluator(api_key="test_key")
         
         # Mock the API response with proper JSON formatting
-        mock_response = MagicMock()
-        mock_response.content = [MagicMock(text=json.dumps(mock_evaluation))]  # Use json.dumps for proper formatting
-        
-        mock_messages = MagicMock()
-        mock_messages.create = AsyncMock(return_value=mock_response)
+        mock_messages = _make_mock_messages(mock_evaluation_json)
         evaluator.client.messages = mock_messages
         
         # Evaluate article
@@ -193,7 +287,7 @@ class TestArticleEvaluator:
         evaluator = ArticleEvaluator(api_key="test_key")
         
         # Mock an API error
-        mock_messages = MagicMock()
+        mock_messages = MagicMock(spec_set=["create"])
         mock_messages.create = AsyncMock(side_effect=Exception("API Error"))
         evaluator.client.messages = mock_messages
         
@@ -206,4 +300,99 @@ class TestArticleEvaluator:
         
         # Verify error handling
         assert "error" in result
-        assert result["error"] == "API Error" 
\ No newline at end of file
+        assert result["error"] == "API Error"
+    
+    @pytest.mark.asyncio
+    async def test_evaluate_article_fenced_json(self, mock_article, mock_evaluation, mock_evaluation_json):
+        """Test evaluation responses wrapped in a markdown code fence are parsed."""
+        evaluator = ArticleEvaluator(api_key="test_key")
+        
+        mock_messages = _make_mock_messages(f"```json\n{mock_evaluation_json}\n```")
+        evaluator.client.messages = mock_messages
+        
+        result = await evaluator.evaluate_article(
+            content=mock_article["content"],
+            title=mock_article["title"],
+            keywords=mock_article["keywords"]
+        )
+        
+        assert result == mock_evaluation
+    
+    def test_evaluate_structural(self):
+        """Test the structural checks that run without the LLM."""
+        evaluator = ArticleEvaluator(api_key="test_key")
+        content = "# Test Article\n\n## Introduction\n\nAbout SEO and more seo.\n\n## Conclusion\n\nDone."
+        
+        result = evaluator.evaluate_structural(
+            content=content,
+            title="Test Article",
+            keywords=["SEO", "evaluation"],
+            min_length=5
+        )
+        
+        assert result["word_count"] == 13
+        assert result["within_length"]
+        assert result["has_title"]
+        assert result["has_introduction"]
+        assert not result["has_body"]
+        assert result["has_conclusion"]
+        assert result["section_count"] == 2
+        assert result["keyword_counts"] == {"SEO": 2, "evaluation": 0}
+        assert result["keyword_hits"] == 2
+        assert result["missing_keywords"] == ["evaluation"]
+    
+    @pytest.mark.asyncio
+    async def test_evaluate_article_cached(self, mock_article, mock_evaluation, mock_evaluation_json):
+        """Test repeated evaluations of the same article skip the API call."""
+        evaluator = ArticleEvaluator(api_key="test_key")
+        
+        mock_messages = _make_mock_messages(mock_evaluation_json)
+        evaluator.client.messages = mock_messages
+        
+        for _ in range(2):
+            result = await evaluator.evaluate_article(
+                content=mock_article["content"],
+                title=mock_article["title"],
+                keywords=mock_article["keywords"]
+            )
+            assert result == mock_evaluation
+        
+        mock_messages.create.assert_called_once()
+    
+    @pytest.mark.asyncio
+    async def test_evaluate_batch(self, mock_article, mock_evaluation, mock_evaluation_json):
+        """Test batch evaluation returns one result per article in order."""
+        evaluator = ArticleEvaluator(api_key="test_key")
+        
+        mock_messages = _make_mock_messages(mock_evaluation_json)
+        evaluator.client.messages = mock_messages
+        
+        articles = [
+            {
+                "content": f"{mock_article['content']}\n\nRevision {i}",
+                "title": mock_article["title"],
+                "keywords": mock_article["keywords"]
+            }
+            for i in range(3)
+        ]
+        results = await evaluator.evaluate_batch(articles, concurrency=2)
+        
+        assert results == [mock_evaluation] * 3
+        assert mock_messages.create.call_count == 3
+    
+    @pytest.mark.asyncio
+    async def test_evaluate_article_invalid_schema(self, mock_article, mock_evaluation):
+        """Test evaluations missing required scores are rejected."""
+        evaluator = ArticleEvaluator(api_key="test_key")
+        
+        incomplete = {k: v for k, v in mock_evaluation.items() if k != "seo_score"}
+        mock_messages = _make_mock_messages(json.dumps(incomplete))
+        evaluator.client.messages = mock_messages
+        
+        result = await evaluator.evaluate_article(
+            content=mock_article["content"],
+            title=mock_article["title"],
+            keywords=mock_article["keywords"]
+        )
+        
+        assert result["error"] == "Failed to parse evaluation response"
@@ -3,7 +3,9 @@
 import os
 import pytest
 import json
+import numpy as np
 import pandas as pd
+from scipy import stats
 from datetime import datetime, timedelta
 from unittest.mock import patch, MagicMock
 
@@ -134,6 +136,379 @@ class TestExperiment:
         assert test_variant["mean"] > results["variants"][control_id]["mean"]
         assert test_variant["significant"] == True
     
+    def test_analyze_results_relative_improvement(self, test_experiment):
+        """Test variants are compared against the baseline variant's means."""
+        baseline_id = test_experiment.add_variant(
+            name="baseline",
+            prompt_template="Baseline prompt"
+        )
+        other_id = test_experiment.add_variant(
+            name="other",
+            prompt_template="Other prompt"
+        )
+        
+        for score in [6, 8]:
+            test_experiment.record_trial(
+                variant_id=baseline_id,
+                metrics={"structure_score": score, "content_score": 5}
+            )
+        for score in [9, 9]:
+            test_experiment.record_trial(
+                variant_id=other_id,
+                metrics={"structure_score": score, "content_score": 5}
+            )
+        
+        results = test_experiment.analyze_results()
+        
+        assert results["total_trials"] == 4
+        assert results["baseline_variant"] == "baseline"
+        performance = results["variant_performance"]["other"]
+        assert performance["structure_score"] == pytest.approx(9 / 7 - 1)
+        assert performance["content_score"] == pytest.approx(0.0)
+    
+    def test_analyze_results_significance(self, test_experiment):
+        """Test Welch's t-test and Cohen's d against the baseline."""
+        baseline_id = test_experiment.add_variant(
+            name="baseline",
+            prompt_template="Baseline prompt"
+        )
+        other_id = test_experiment.add_variant(
+            name="other",
+            prompt_template="Other prompt"
+        )
+        
+        baseline_scores = [6, 7, 7, 8, 6]
+        other_scores = [8, 9, 8, 9, 9, 10]
+        test_experiment.record_trials(
+            variant_id=baseline_id,
+            metrics=[{"structure_score": score, "content_score": 5} for score in baseline_scores]
+        )
+        test_experiment.record_trials(
+            variant_id=other_id,
+            metrics=[{"structure_score": score, "content_score": 5} for score in other_scores]
+        )
+        
+        results = test_experiment.analyze_results()
+        significance = results["significance"]["other"]["structure_score"]
+        expected = stats.ttest_ind(other_scores, baseline_scores, equal_var=False)
+        
+        assert significance["t_statistic"] == pytest.approx(expected.statistic)
+        assert significance["p_value"] == pytest.approx(expected.pvalue)
+        assert significance["p_value"] < 0.05
+        assert significance["cohens_d"] == pytest.approx(
+            (np.mean(other_scores) - np.mean(baseline_scores))
+            / np.sqrt((np.var(other_scores, ddof=1) + np.var(baseline_scores, ddof=1)) / 2)
+        )
+    
+    def test_analyze_results_cached_until_trial_recorded(self, test_experiment):
+        """Test analysis results are reused until the trials change."""
+        baseline_id = test_experiment.add_variant(
+            name="baseline",
+            prompt_template="Baseline prompt"
+        )
+        other_id = test_experiment.add_variant(
+            name="other",
+            prompt_template="Other prompt"
+        )
+        for variant_id in [baseline_id, other_id]:
+            test_experiment.record_trial(
+                variant_id=variant_id,
+                metrics={"structure_score": 5, "content_score": 5}
+            )
+        
+        results = test_experiment.analyze_results()
+        assert test_experiment.analyze_results() is results
+        
+        test_experiment.record_trial(
+            variant_id=other_id,
+            metrics={"structure_score": 8, "content_score": 5}
+        )
+        updated = test_experiment.analyze_results()
+        
+        assert updated is not results
+        assert updated["total_trials"] == 3
+        assert updated["variant_performance"]["other"]["structure_score"] == pytest.approx(0.3)
+    
+    def test_get_variant_trials(self, test_experiment):
+        """Test per-variant trial lookup and best-variant selection."""
+        variant1_id = test_experiment.add_variant(
+            name="variant1",
+            prompt_template="Prompt 1"
+        )
+        variant2_id = test_experiment.add_variant(
+            name="variant2",
+            prompt_template="Prompt 2"
+        )
+        
+        trial_ids = [
+            test_experiment.record_trial(
+                variant_id=variant_id,
+                metrics={"structure_score": score, "content_score": 5}
+            )
+            for variant_id, score in [
+                (variant1_id, 9), (variant2_id, 7), (variant1_id, 8)
+            ]
+        ]
+        
+        trials = test_experiment.get_variant_trials(variant1_id)
+        assert [t.id for t in trials] == [trial_ids[0], trial_ids[2]]
+        assert test_experiment.get_variant_trials("unknown") == []
+        assert test_experiment.get_best_variant("structure_score") == variant1_id
+    
+    def test_record_trials(self, test_experiment):
+        """Test recording several trials at once matches recording them one by one."""
+        variant_id = test_experiment.add_variant(
+            name="baseline",
+            prompt_template="Baseline prompt"
+        )
+        trial_ids = test_experiment.record_trials(
+            variant_id=variant_id,
+            metrics=[
+                {"structure_score": 6, "content_score": 5},
+                {"structure_score": 8, "content_score": 7}
+            ],
+            metadata=[{"title": "First"}, None]
+        )
+        test_experiment.record_trial(
+            variant_id=variant_id,
+            metrics={"structure_score": 7, "content_score": 6}
+        )
+        
+        trials = test_experiment.trials
+        assert [t.id for t in trials[:2]] == trial_ids
+        assert [t.metadata for t in trials] == [{"title": "First"}, {}, {}]
+        assert test_experiment.analyze_results()["total_trials"] == 3
+        
+        with pytest.raises(ValueError):
+            test_experiment.record_trials(
+                variant_id=variant_id,
+                metrics=[{"structure_score": 6, "content_score": 5}, {"structure_score": 6}]
+            )
+        assert len(test_experiment.trials) == 3
+        
+        test_experiment.close()
+        reloaded = Experiment(
+            name="test_experiment",
+            description="",
+            metrics=[],
+            experiment_dir=test_experiment.experiment_dir
+        )
+        assert [t.id for t in reloaded.trials] == [t.id for t in trials]
+        assert reloaded.trials[1].metrics == {"structure_score": 8, "content_score": 7}
+    
+    def test_trials_persist_across_reload(self, test_experiment):
+        """Test trials appended to the trial log are reloaded."""
+        variant_id = test_experiment.add_variant(
+            name="baseline",
+            prompt_template="Baseline prompt"
+        )
+        for score in [6, 8]:
+            test_experiment.record_trial(
+                variant_id=variant_id,
+                metrics={"structure_score": score, "content_score": 5},
+                metadata={"title": "Test"}
+            )
+        test_experiment.close()
+        
+        trials_path = os.path.join(test_experiment.experiment_dir, "test_experiment.trials.jsonl")
+        with open(trials_path) as f:
+            records = [json.loads(line) for line in f]
+        assert [r["vc"] for r in records] == [0, 0]
+        assert "variant_id" not in records[0]
+        
+        reloaded = Experiment(
+            name="test_experiment",
+            description="",
+            metrics=[],
+            experiment_dir=test_experiment.experiment_dir
+        )
+        
+        assert reloaded.description == "Test experiment"
+        assert reloaded.metrics == ["structure_score", "content_score"]
+        assert list(reloaded.variants) == [variant_id]
+        assert [t.id for t in reloaded.trials] == [t.id for t in test_experiment.trials]
+        assert reloaded.trials[0].timestamp == test_experiment.trials[0].timestamp
+        assert reloaded.time_range() == (
+            test_experiment.trials[0].timestamp,
+            test_experiment.trials[1].timestamp
+        )
+        assert reloaded.trials[1].metrics == {"structure_score": 8, "content_score": 5}
+        assert reloaded.trials[1].metadata == {"title": "Test"}
+    
+    def test_numpy_values_persist_across_reload(self, test_experiment):
+        """Test numpy metric and metadata values are saved as plain numbers."""
+        variant_id = test_experiment.add_variant(
+            name="baseline",
+            prompt_template="Baseline prompt",
+            metadata={"weight": np.float64(0.5)}
+        )
+        test_experiment.record_trial(
+            variant_id=variant_id,
+            metrics={"structure_score": np.float64(7.5), "content_score": np.int64(6)},
+            metadata={"word_count": np.int64(1200)}
+        )
+        test_experiment.close()
+        
+        reloaded = Experiment(
+            name="test_experiment",
+            description="",
+            metrics=[],
+            experiment_dir=test_experiment.experiment_dir
+        )
+        assert reloaded.variants[variant_id].metadata == {"weight": 0.5}
+        assert reloaded.trials[0].metrics == {"structure_score": 7.5, "content_score": 6}
+        assert reloaded.trials[0].metadata == {"word_count": 1200}
+        assert reloaded.analyze_results()["total_trials"] == 1
+    
+    def test_unserializable_trial_is_not_kept(self, test_experiment):
+        """Test a trial that fails to encode is left out of memory and the log."""
+        variant_id = test_experiment.add_variant(
+            name="baseline",
+            prompt_template="Baseline prompt"
+        )
+        with pytest.raises(TypeError):
+            test_experiment.record_trial(
+                variant_id=variant_id,
+                metrics={"structure_score": 6, "content_score": 5},
+                metadata={"source": object()}
+            )
+        test_experiment.record_trial(
+            variant_id=variant_id,
+            metrics={"structure_score": 8, "content_score": 5}
+        )
+        test_experiment.close()
+        
+        assert len(test_experiment.trials) == 1
+        assert test_experiment.analyze_results()["total_trials"] == 1
+        reloaded = Experiment(
+            name="test_experiment",
+            description="",
+            metrics=[],
+            experiment_dir=test_experiment.experiment_dir
+        )
+        assert [t.id for t in reloaded.trials] == [t.id for t in test_experiment.trials]
+    
+    def test_trials_load_lazily_from_columns_file(self, test_experiment):
+        """Test reopened experiments analyze trials before parsing the log."""
+        baseline_id = test_experiment.add_variant(
+            name="baseline",
+            prompt_template="Baseline prompt"
+        )
+        other_id = test_experiment.add_variant(
+            name="other",
+            prompt_template="Other prompt"
+        )
+        for variant_id, score in [(baseline_id, 6), (baseline_id, 8), (other_id, 9)]:
+            test_experiment.record_trial(
+                variant_id=variant_id,
+                metrics={"structure_score": score, "content_score": 5}
+            )
+        test_experiment.close()
+        
+        reloaded = Experiment(
+            name="test_experiment",
+            description="",
+            metrics=[],
+            experiment_dir=test_experiment.experiment_dir
+        )
+        results = reloaded.analyze_results()
+        assert results["total_trials"] == 3
+        assert results["variant_performance"] == test_experiment.analyze_results()["variant_performance"]
+        assert reloaded.get_best_variant("structure_score") == other_id
+        
+        reloaded.record_trial(
+            variant_id=other_id,
+            metrics={"structure_score": 7, "content_score": 5}
+        )
+        assert [t.metrics["structure_score"] for t in reloaded.trials] == [6, 8, 9, 7]
+        assert [t.id for t in reloaded.get_variant_trials(baseline_id)] == [
+            t.id for t in test_experiment.get_variant_trials(baseline_id)
+        ]
+    
+    def test_load_legacy_experiment_file(self, tmp_path):
+        """Test single-file experiments are loaded and migrated on write."""
+        legacy = {
+            "name": "legacy",
+            "description": "Legacy experiment",
+            "metrics": ["structure_score"],
+            "variants": {
+                "v1": {"name": "baseline", "prompt_template": "Prompt", "metadata": {}}
+            },
+            "trials": [
+                {
+                    "id": "t1",
+                    "variant_id": "v1",
+                    "timestamp": "2024-01-01T12:00:00",
+                    "metrics": {"structure_score": 7},
+                    "metadata": {}
+                }
+            ]
+        }
+        with open(tmp_path / "legacy.json", "w") as f:
+            json.dump(legacy, f)
+        
+        experiment = Experiment(
+            name="legacy",
+            description="",
+            metrics=[],
+            experiment_dir=str(tmp_path)
+        )
+        assert experiment.description == "Legacy experiment"
+        assert [t.id for t in experiment.trials] == ["t1"]
+        
+        experiment.record_trial(variant_id="v1", metrics={"structure_score": 9})
+        experiment.close()
+        
+        reloaded = Experiment(
+            name="legacy",
+            description="",
+            metrics=[],
+            experiment_dir=str(tmp_path)
+        )
+        assert [t.metrics["structure_score"] for t in reloaded.trials] == [7, 9]
+    
+    def test_legacy_trials_survive_add_variant(self, tmp_path):
+        """Test adding a variant first does not drop a legacy file's trials."""
+        legacy = {
+            "name": "legacy",
+            "description": "Legacy experiment",
+            "metrics": ["structure_score"],
+            "variants": {
+                "v1": {"name": "baseline", "prompt_template": "Prompt", "metadata": {}}
+            },
+            "trials": [
+                {
+                    "id": f"t{i}",
+                    "variant_id": "v1",
+                    "timestamp": "2024-01-01T12:00:00",
+                    "metrics": {"structure_score": i},
+                    "metadata": {}
+                }
+                for i in range(1, 3)
+            ]
+        }
+        with open(tmp_path / "legacy.json", "w") as f:
+            json.dump(legacy, f)
+        
+        experiment = Experiment(
+            name="legacy",
+            description="",
+            metrics=[],
+            experiment_dir=str(tmp_path)
+        )
+        variant_id = experiment.add_variant(name="new", prompt_template="New prompt")
+        experiment.record_trial(variant_id=variant_id, metrics={"structure_score": 9})
+        experiment.close()
+        
+        reloaded = Experiment(
+            name="legacy",
+            description="",
+            metrics=[],
+            experiment_dir=str(tmp_path)
+        )
+        assert [t.metrics["structure_score"] for t in reloaded.trials] == [1, 2, 9]
+        assert set(reloaded.variants) == {"v1", variant_id}
+    
     def test_get_best_variant(self, test_experiment):
         """Test getting the best variant."""
         # Add variants
@@ -297,4 +672,271 @@ class TestFeedbackManager:
         assert stats["unique_articles"] == 5
         assert stats["unique_evaluators"] == 2
         assert "Quality" in stats["criteria_stats"]
-        assert stats["criteria_stats"]["Quality"]["mean"] == 3.0  # Average of 1,2,3,4,5 
\ No newline at end of file
+        assert stats["criteria_stats"]["Quality"]["mean"] == 3.0  # Average of 1,2,3,4,5
+    
+    def test_feedback_aggregates_survive_reload(self, test_feedback_manager):
+        """Test scores and stats come from running aggregates, also after reload."""
+        quality_id = test_feedback_manager.add_criterion(
+            name="Quality",
+            description="Content quality",
+            scale=["1", "2", "3", "4", "5"],
+            weight=2.0
+        )
+        clarity_id = test_feedback_manager.add_criterion(
+            name="Clarity",
+            description="Content clarity",
+            scale=["1", "2", "3", "4", "5"]
+        )
+        for article_id, evaluator_id, quality, clarity in [
+            ("article1", "evaluator1", 4, 2),
+            ("article1", "evaluator2", 5, 3),
+            ("article2", "evaluator1", 1, 1)
+        ]:
+            test_feedback_manager.record_feedback(
+                article_id=article_id,
+                evaluator_id=evaluator_id,
+                ratings={quality_id: quality, clarity_id: clarity}
+            )
+        
+        reloaded = FeedbackManager(feedback_dir=test_feedback_manager.feedback_dir)
+        for manager in [test_feedback_manager, reloaded]:
+            scores = manager.calculate_article_score("article1")
+            assert scores["Quality"] == 4.5
+            assert scores["Clarity"] == 2.5
+            assert scores["overall"] == pytest.approx((4.5 * 2 + 2.5) / 3)
+            
+            assert [r.evaluator_id for r in manager.get_article_feedback("article1")] == [
+                "evaluator1", "evaluator2"
+            ]
+            assert [r.article_id for r in manager.get_evaluator_feedback("evaluator1")] == [
+                "article1", "article2"
+            ]
+            assert manager.get_article_feedback("unknown") == []
+            
+            stats = manager.get_feedback_stats()
+            assert stats["total_responses"] == 3
+            assert stats["unique_articles"] == 2
+            assert stats["unique_evaluators"] == 2
+            assert stats["criteria_stats"]["Quality"] == {
+                "count": 3,
+                "mean": pytest.approx(10 / 3),
+                "std": pytest.approx(np.std([4, 5, 1], ddof=1)),
+                "min": 1,
+                "max": 5
+            }
+    
+    def test_feedback_responses_appended_to_log(self, test_feedback_manager):
+        """Test responses are appended as JSONL lines and reload from the log."""
+        quality_id = test_feedback_manager.add_criterion(
+            name="Quality",
+            description="Content quality",
+            scale=["1", "2", "3", "4", "5"]
+        )
+        for rating in [3, 4]:
+            test_feedback_manager.record_feedback(
+                article_id="article1",
+                evaluator_id="evaluator1",
+                ratings={quality_id: rating}
+            )
+        test_feedback_manager.close()
+        
+        feedback_dir = test_feedback_manager.feedback_dir
+        with open(os.path.join(feedback_dir, "criteria.json")) as f:
+            assert list(json.load(f)) == [quality_id]
+        responses_path = os.path.join(feedback_dir, "responses.jsonl")
+        with open(responses_path) as f:
+            lines = f.read().splitlines()
+        assert [json.loads(line)["ratings"][quality_id] for line in lines] == [3, 4]
+        
+        # A torn final line is skipped on load and cut off before appending
+        with open(responses_path, "a") as f:
+            f.write('{"id": "partial')
+        with FeedbackManager(feedback_dir=feedback_dir) as reloaded:
+            assert len(reloaded.responses) == 2
+            reloaded.record_feedback(
+                article_id="article1",
+                evaluator_id="evaluator2",
+                ratings={quality_id: 5}
+            )
+        
+        reloaded = FeedbackManager(feedback_dir=feedback_dir)
+        assert [r.ratings[quality_id] for r in reloaded.responses] == [3, 4, 5]
+        assert reloaded.calculate_article_score("article1")["Quality"] == 4.0
+    
+    def test_load_legacy_feedback_file(self, tmp_path):
+        """Test a single-file feedback_data.json is loaded and migrated on write."""
+        legacy = {
+            "criteria": {
+                "c1": {
+                    "id": "c1",
+                    "name": "Quality",
+                    "description": "Content quality",
+                    "scale": ["1", "2", "3"],
+                    "weight": 1.0
+                }
+            },
+            "responses": [
+                {
+                    "id": "r1",
+                    "article_id": "article1",
+                    "evaluator_id": "evaluator1",
+                    "timestamp": datetime(2024, 1, 1).isoformat(),
+                    "ratings": {"c1": 2},
+                    "comments": "",
+                    "metadata": {}
+                }
+            ]
+        }
+        with open(tmp_path / "feedback_data.json", "w") as f:
+            json.dump(legacy, f)
+        
+        with FeedbackManager(feedback_dir=str(tmp_path)) as manager:
+            assert manager.calculate_article_score("article1")["Quality"] == 2.0
+            manager.record_feedback(
+                article_id="article1",
+                evaluator_id="evaluator2",
+                ratings={"c1": 3}
+            )
+        
+        assert (tmp_path / "criteria.json").exists()
+        reloaded = FeedbackManager(feedback_dir=str(tmp_path))
+        assert [r.id for r in reloaded.responses][0] == "r1"
+        assert reloaded.calculate_article_score("article1")["Quality"] == 2.5
+    
+    def test_feedback_ids(self, tmp_path):
+        """Test generated IDs are unique, with UUIDs available on request."""
+        manager = FeedbackManager(feedback_dir=str(tmp_path / "fast"))
+        criterion_id = manager.add_criterion("Quality", "Content quality", ["1", "2"])
+        response_ids = [
+            manager.record_feedback("article1", "evaluator1", {criterion_id: 1})
+            for _ in range(100)
+        ]
+        assert criterion_id.startswith("crit-")
+        assert len(set(response_ids)) == 100
+        
+        manager = FeedbackManager(feedback_dir=str(tmp_path / "uuid"), uuid_ids=True)
+        criterion_id = manager.add_criterion("Quality", "Content quality", ["1", "2"])
+        assert len(criterion_id) == 36 and criterion_id.count("-") == 4
+    
+    def test_bounded_in_memory_responses(self, tmp_path):
+        """Test only recent responses stay in memory while stats cover all."""
+        manager = FeedbackManager(
+            feedback_dir=str(tmp_path), max_in_memory_responses=3, sample_size=2
+        )
+        criterion_id = manager.add_criterion("Quality", "Content quality", ["1", "2", "3"])
+        ratings = [1, 2, 3, 1, 2, 3, 3]
+        for i, rating in enumerate(ratings):
+            manager.record_feedback(
+                article_id=f"article{i % 2}",
+                evaluator_id="evaluator1",
+                ratings={criterion_id: rating}
+            )
+        manager.close()
+        
+        reloaded = FeedbackManager(
+            feedback_dir=str(tmp_path), max_in_memory_responses=3, sample_size=2
+        )
+        for m in [manager, reloaded]:
+            assert [r.ratings[criterion_id] for r in m.responses] == [2, 3, 3]
+            assert [r.ratings[criterion_id] for r in m.get_article_feedback("article0")] == [2, 3]
+            assert len(m.get_evaluator_feedback("evaluator1")) == 3
+            assert len(m.get_response_sample()) == 2
+            
+            stats = m.get_feedback_stats()
+            assert stats["total_responses"] == 7
+            assert stats["unique_articles"] == 2
+            assert stats["unique_evaluators"] == 1
+            assert stats["criteria_stats"]["Quality"]["mean"] == pytest.approx(np.mean(ratings))
+            assert m.calculate_article_score("article0")["Quality"] == pytest.approx(
+                np.mean(ratings[::2])
+            )
+    
+    def test_numpy_ratings_persist_across_reload(self, test_feedback_manager):
+        """Test numpy ratings are accepted and reload as plain numbers."""
+        criterion_id = test_feedback_manager.add_criterion("Quality", "Content quality", ["1", "2", "3"])
+        test_feedback_manager.record_feedback(
+            article_id="article1",
+            evaluator_id="evaluator1",
+            ratings={criterion_id: np.int64(2)}
+        )
+        test_feedback_manager.close()
+        
+        reloaded = FeedbackManager(feedback_dir=test_feedback_manager.feedback_dir)
+        assert reloaded.responses[0].ratings == {criterion_id: 2}
+        assert reloaded.calculate_article_score("article1")["Quality"] == 2.0
+    
+    def test_unserializable_feedback_is_not_counted(self, test_feedback_manager):
+        """Test a response that fails to encode leaves the aggregates untouched."""
+        criterion_id = test_feedback_manager.add_criterion("Quality", "Content quality", ["1", "2", "3"])
+        test_feedback_manager.record_feedback(
+            article_id="article1",
+            evaluator_id="evaluator1",
+            ratings={criterion_id: 1}
+        )
+        assert test_feedback_manager.calculate_article_score("article1")["Quality"] == 1.0
+        
+        with pytest.raises(TypeError):
+            test_feedback_manager.record_feedback(
+                article_id="article1",
+                evaluator_id="evaluator2",
+                ratings={criterion_id: 3},
+                metadata={"source": object()}
+            )
+        
+        assert len(test_feedback_manager.responses) == 1
+        assert len(test_feedback_manager.get_response_sample()) == 1
+        assert test_feedback_manager.calculate_article_score("article1")["Quality"] == 1.0
+        stats = test_feedback_manager.get_feedback_stats()
+        assert stats["total_responses"] == 1
+        assert stats["unique_evaluators"] == 1
+    
+    def test_in_memory_response_limit_must_be_positive(self, tmp_path):
+        """Test a limit that would keep no responses in memory is rejected."""
+        with pytest.raises(ValueError):
+            FeedbackManager(feedback_dir=str(tmp_path), max_in_memory_responses=0)
+    
+    def test_article_score_cached_until_feedback(self, test_feedback_manager):
+        """Test scores are reused until the article or the criteria change."""
+        quality_id = test_feedback_manager.add_criterion("Quality", "Content quality", ["1", "2", "3"])
+        test_feedback_manager.record_feedback("article1", "evaluator1", {quality_id: 3})
+        
+        scores = test_feedback_manager.calculate_article_score("article1")
+        assert test_feedback_manager.calculate_article_score("article1") is scores
+        
+        # Feedback for another article leaves the cached score alone
+        test_feedback_manager.record_feedback("article2", "evaluator1", {quality_id: 1})
+        assert test_feedback_manager.calculate_article_score("article1") is scores
+        
+        test_feedback_manager.record_feedback("article1", "evaluator2", {quality_id: 1})
+        assert test_feedback_manager.calculate_article_score("article1")["overall"] == 2.0
+        
+        # A new criterion changes the total weight
+        test_feedback_manager.add_criterion("Clarity", "Content clarity", ["1", "2", "3"])
+        assert test_feedback_manager.calculate_article_score("article1")["overall"] == 1.0
+    
+    def test_calculate_all_scores(self, test_feedback_manager):
+        """Test batch scores match per-article scores."""
+        quality_id = test_feedback_manager.add_criterion(
+            "Quality", "Content quality", ["1", "2", "3", "4", "5"], weight=2.0
+        )
+        clarity_id = test_feedback_manager.add_criterion(
+            "Clarity", "Content clarity", ["1", "2", "3", "4", "5"]
+        )
+        for article_id, quality, clarity in [
+            ("article1", 4, 2),
+            ("article1", 5, 3),
+            ("article2", 1, 5)
+        ]:
+            test_feedback_manager.record_feedback(
+                article_id, "evaluator1", {quality_id: quality, clarity_id: clarity}
+            )
+        
+        scores = test_feedback_manager.calculate_all_scores()
+        assert list(scores.index) == ["article1", "article2"]
+        assert list(scores.columns) == ["Quality", "Clarity", "overall"]
+        for article_id in scores.index:
+            expected = test_feedback_manager.calculate_article_score(article_id)
+            assert scores.loc[article_id].to_dict() == pytest.approx(expected)
+        
+        subset = test_feedback_manager.calculate_all_scores(["unknown", "article2"])
+        assert list(subset.index) == ["article2"]